@@ -1,14 +1,28 @@
 #!/usr/bin/env python3
-from flask import Flask, request, jsonify, abort
+from flask import Flask, Response, request, jsonify, abort
+import atexit
 import os
+import threading
 import time
-import jwt
 import hmac
 import hashlib
-import json
 from pathlib import Path
 
+from github_auth import AppJWTCache, InstallationTokenCache
+from leaderboard import open_leaderboard
+from metrics import install as install_metrics, timed
+from profiling import install as install_profiling
+from ranking import MAX_SCORE, MIN_SCORE
+from webhook_events import handle_event
+from webhook_journal import DeliveryCache, EventJournal
+from webhook_queue import WebhookQueue
+
 app = Flask(__name__)
+# GitHub caps webhook payloads at 25 MB
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_CONTENT_LENGTH', 25 * 1024 * 1024))
+install_metrics(app)
+# off (and free) unless PROFILE_EVERY or PROFILE_SLOW_MS is set
+PROFILER = install_profiling(app)
 
 
 @app.route('/')
@@ -16,6 +30,18 @@ def index():
     return jsonify({"status": "ok", "message": "GitHub App scaffold running"})
 
 
+# One AppJWTCache per (app id, key path), so changing either env var still
+# takes effect on the next request.
+_jwt_caches = {}
+
+
+def app_jwt_cache(app_id, key_path):
+    cache = _jwt_caches.get((app_id, key_path))
+    if cache is None:
+        cache = _jwt_caches[(app_id, key_path)] = AppJWTCache(app_id, key_path)
+    return cache
+
+
 @app.route('/jwt')
 def get_jwt():
     app_id = os.environ.get('GITHUB_APP_ID') or os.environ.get('APP_ID')
@@ -24,83 +50,230 @@ def get_jwt():
         return jsonify({"error": "GITHUB_APP_ID not set"}), 400
     if not os.path.exists(key_path):
         return jsonify({"error": "private key not found", "path": key_path}), 400
-    with open(key_path, 'rb') as f:
-        private_key = f.read()
-    now = int(time.time())
-    payload = {"iat": now - 60, "exp": now + (9 * 60), "iss": int(app_id)}
-    token = jwt.encode(payload, private_key, algorithm='RS256')
-    if isinstance(token, bytes):
-        token = token.decode()
-    return jsonify({"jwt": token})
+    return jsonify({"jwt": app_jwt_cache(app_id, key_path).token()})
+
+
+_installation_tokens = None
+_installation_tokens_lock = threading.Lock()
+
+
+def installation_tokens():
+    """Shared InstallationTokenCache for event handlers that call the GitHub API"""
+    global _installation_tokens
+    if _installation_tokens is None:
+        # webhook workers call this concurrently; all of them must share one cache
+        with _installation_tokens_lock:
+            if _installation_tokens is None:
+                app_id = os.environ.get('GITHUB_APP_ID') or os.environ.get('APP_ID')
+                if not app_id:
+                    raise RuntimeError('GITHUB_APP_ID not set')
+                key_path = os.environ.get('GITHUB_PRIVATE_KEY_PATH', 'secrets/app-private-key.pem')
+                _installation_tokens = InstallationTokenCache(
+                    app_jwt_cache(app_id, key_path),
+                    api_url=os.environ.get('GITHUB_API_URL', 'https://api.github.com'),
+                )
+    return _installation_tokens
+
+
+# off unless WEBHOOK_JOURNAL names a file
+WEBHOOK_JOURNAL = None
+if os.environ.get('WEBHOOK_JOURNAL'):
+    WEBHOOK_JOURNAL = EventJournal(
+        os.environ['WEBHOOK_JOURNAL'],
+        max_bytes=int(os.environ.get('WEBHOOK_JOURNAL_MAX_BYTES', 10 * 1024 * 1024)),
+        backups=int(os.environ.get('WEBHOOK_JOURNAL_BACKUPS', 10)),
+        compress=os.environ.get('WEBHOOK_JOURNAL_GZIP', '') == '1',
+    )
+    # atexit runs in reverse order: the queue drains before this closes
+    atexit.register(WEBHOOK_JOURNAL.close)
+
+
+def process_event(event):
+    """Journal and handle an event; runs on a WEBHOOK_QUEUE worker thread"""
+    if WEBHOOK_JOURNAL is not None:
+        WEBHOOK_JOURNAL.append({
+            'received_at': event['received_at'],
+            'event': event['event'],
+            'delivery': event['delivery'],
+            'is_json': event['is_json'],
+            'body': event['body'].decode('utf-8', 'replace'),
+        })
+    handle_event(event)
+
+
+WEBHOOK_QUEUE = WebhookQueue(
+    process_event,
+    workers=int(os.environ.get('WEBHOOK_WORKERS', 4)),
+    maxsize=int(os.environ.get('WEBHOOK_QUEUE_SIZE', 1000)),
+).start()
+atexit.register(WEBHOOK_QUEUE.close)
+WEBHOOK_DELIVERIES = DeliveryCache(
+    maxsize=int(os.environ.get('WEBHOOK_DEDUP_SIZE', 10000)),
+    ttl=float(os.environ.get('WEBHOOK_DEDUP_TTL', 3600)),
+)
 
 
 @app.route('/webhook', methods=['POST'])
 def webhook():
+    # Read the body once; the signature check, the queue and the journal all
+    # share this buffer. Bodies over MAX_CONTENT_LENGTH are refused with 413
+    # before they are read.
+    body = request.get_data()
     secret = os.environ.get('WEBHOOK_SECRET')
     if secret:
         signature = request.headers.get('X-Hub-Signature-256', '')
-        mac = hmac.new(secret.encode(), msg=request.data, digestmod=hashlib.sha256)
-        expected = 'sha256=' + mac.hexdigest()
-        if not hmac.compare_digest(expected, signature):
+        with timed('webhook_hmac'):
+            mac = hmac.new(secret.encode(), msg=body, digestmod=hashlib.sha256)
+            valid = hmac.compare_digest('sha256=' + mac.hexdigest(), signature)
+        if not valid:
             abort(401, "Invalid signature")
-    evt = request.headers.get('X-GitHub-Event', 'unknown')
-    payload = request.get_json(silent=True)
-    print(f"Received event {evt}: {payload}")
+    delivery = request.headers.get('X-GitHub-Delivery')
+    if delivery and WEBHOOK_DELIVERIES.seen(delivery):
+        # a redelivery we already accepted
+        return '', 204
+    event = {
+        'event': request.headers.get('X-GitHub-Event', 'unknown'),
+        'delivery': delivery,
+        'is_json': request.is_json,
+        'body': body,
+        'received_at': time.time(),
+    }
+    if not WEBHOOK_QUEUE.submit(event):
+        if delivery:
+            # let GitHub's retry through
+            WEBHOOK_DELIVERIES.forget(delivery)
+        return jsonify({'error': 'webhook queue full'}), 503, {'Retry-After': '5'}
     return '', 204
 
 
+@app.route('/webhook/stats', methods=['GET'])
+def webhook_stats():
+    return jsonify(WEBHOOK_QUEUE.stats())
+
+
 # Simple leaderboard endpoints used by the static `docs/index.html` game.
 SCORES_PATH = Path('high_scores.json')
+LEADERBOARD = open_leaderboard(
+    SCORES_PATH,
+    backend=os.environ.get('SCORES_BACKEND', 'json'),
+    db_path=os.environ.get('SCORES_DB'),
+    size=int(os.environ.get('LEADERBOARD_SIZE', 100)),
+    flush_interval=float(os.environ.get('SCORES_FLUSH_INTERVAL', 2.0)),
+    flush_every=int(os.environ.get('SCORES_FLUSH_EVERY', 20)),
+    journal=os.environ.get('SCORES_JOURNAL', '') == '1',
+).start()
 
 
-def load_scores():
-    if not SCORES_PATH.exists():
-        return []
-    try:
-        with SCORES_PATH.open('r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception:
-        return []
+SCORES_MAX_BATCH = int(os.environ.get('SCORES_MAX_BATCH', 1000))
+SCORES_MAX_WINDOW = 100
+# Serialized /scores pages for the current board version. The whole dict is
+# swapped out when the version changes, so readers never see a mix, and
+# when it is full, so clients can't grow it with endless offsets.
+SCORES_CACHE_PAGES = 64
+_scores_cache = {'version': None, 'pages': {}}
 
 
-def save_scores(scores):
+def parse_submission(data):
+    """Return (name, score) for a submission payload, or None if it is invalid"""
+    if not isinstance(data, dict) or 'name' not in data or 'score' not in data:
+        return None
+    name = str(data.get('name', 'Anon'))[:64]
     try:
-        with SCORES_PATH.open('w', encoding='utf-8') as f:
-            json.dump(scores, f, indent=2)
-        return True
-    except Exception as e:
-        print('Failed to save scores:', e)
-        return False
+        score_val = int(data.get('score', 0))
+    except Exception:
+        score_val = 0
+    if not MIN_SCORE <= score_val <= MAX_SCORE:
+        # the rank index could not hold it, so /rank would report another value
+        return None
+    return name, score_val
 
 
 @app.route('/scores', methods=['GET'])
 def scores():
-    scores = load_scores()
-    # sort descending
-    scores_sorted = sorted(scores, key=lambda s: s.get('score', 0), reverse=True)
-    return jsonify(scores_sorted)
+    global _scores_cache
+    try:
+        offset = max(0, int(request.args.get('offset', 0)))
+        limit = request.args.get('limit')
+        limit = None if limit is None else max(0, int(limit))
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
+    # past the end of the board every offset and limit give the same page
+    offset = min(offset, LEADERBOARD.size)
+    if limit is not None and offset + limit >= LEADERBOARD.size:
+        limit = None
+
+    version = LEADERBOARD.version()
+    etag = f"{version}.{offset}.{limit if limit is not None else ''}"
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        cache = _scores_cache
+        if cache['version'] != version:
+            cache = _scores_cache = {'version': version, 'pages': {}}
+        body = cache['pages'].get((offset, limit))
+        if body is None:
+            # already sorted descending
+            entries = LEADERBOARD.entries()
+            end = None if limit is None else offset + limit
+            body = app.json.dumps(entries[offset:end])
+            if len(cache['pages']) >= SCORES_CACHE_PAGES:
+                cache = _scores_cache = {'version': version, 'pages': {}}
+            cache['pages'][(offset, limit)] = body
+        resp = Response(body, mimetype='application/json')
+    resp.set_etag(etag)
+    # clients may keep the page but must revalidate, which is a cheap 304
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
+
+@app.route('/rank/<name>', methods=['GET'])
+def rank(name):
+    entry = LEADERBOARD.rank(name)
+    if entry is None:
+        return jsonify({'error': 'unknown player'}), 404
+    return jsonify(entry)
+
+
+@app.route('/scores/around/<name>', methods=['GET'])
+def scores_around(name):
+    try:
+        window = min(SCORES_MAX_WINDOW, max(0, int(request.args.get('window', 10))))
+    except ValueError:
+        return jsonify({'error': 'window must be an integer'}), 400
+    entries = LEADERBOARD.around(name, window)
+    if entries is None:
+        return jsonify({'error': 'unknown player'}), 404
+    return jsonify(entries)
 
 
 @app.route('/submit_score', methods=['POST'])
 def submit_score():
-    data = request.get_json(silent=True)
-    if not data or 'name' not in data or 'score' not in data:
+    submission = parse_submission(request.get_json(silent=True))
+    if submission is None:
         return jsonify({'error': 'invalid payload'}), 400
-    name = str(data.get('name', 'Anon'))[:64]
-    try:
-        score_val = int(data.get('score', 0))
-    except Exception:
-        score_val = 0
 
-    scores = load_scores()
-    scores.append({'name': name, 'score': score_val})
-    # keep only top 100
-    scores = sorted(scores, key=lambda s: s.get('score', 0), reverse=True)[:100]
-    ok = save_scores(scores)
-    if not ok:
-        return jsonify({'error': 'failed to save'}), 500
+    LEADERBOARD.submit(*submission)
     return jsonify({'ok': True}), 201
 
 
+@app.route('/submit_scores', methods=['POST'])
+def submit_scores():
+    data = request.get_json(silent=True)
+    if not isinstance(data, list) or not data:
+        return jsonify({'error': 'expected a non-empty list of scores'}), 400
+    if len(data) > SCORES_MAX_BATCH:
+        return jsonify({'error': 'too many scores', 'max': SCORES_MAX_BATCH}), 413
+    submissions = []
+    for i, item in enumerate(data):
+        submission = parse_submission(item)
+        if submission is None:
+            return jsonify({'error': 'invalid payload', 'index': i}), 400
+        submissions.append(submission)
+
+    # one sort/persist cycle for the whole batch
+    LEADERBOARD.submit_many(submissions)
+    return jsonify({'ok': True, 'accepted': len(submissions)}), 201
+
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5000)), debug=True)
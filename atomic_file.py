@@ -0,0 +1,56 @@
+"""
+Atomic file replacement shared by the modules that persist state.
+
+Data goes to a temporary file next to the target, named after the process
+and thread so concurrent writers never share one, is fsynced, and is then
+moved over the target with ``os.replace``. The directory is fsynced as well
+so the rename survives a crash. Readers see either the old or the new file,
+never a partial one, and a failed write leaves no temporary file behind.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+
+def _fsync_path(path, flags):
+    fd = os.open(path, flags)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def replacing(path):
+    """Yield a temporary path to write; it replaces ``path`` when the block succeeds"""
+    path = os.fspath(path)
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        yield tmp
+        _fsync_path(tmp, os.O_RDWR)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    if os.name == 'posix':
+        try:
+            _fsync_path(os.path.dirname(path) or '.', os.O_RDONLY)
+        except OSError:
+            pass   # some filesystems refuse to fsync a directory
+
+
+@contextmanager
+def atomic_open(path, mode='wb', **kwargs):
+    """Open a temporary file for writing that replaces ``path`` when closed without error"""
+    with replacing(path) as tmp:
+        with open(tmp, mode, **kwargs) as f:
+            yield f
+
+
+def write_atomic(path, data: bytes):
+    with atomic_open(path, 'wb') as f:
+        f.write(data)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark the SAP Press scraper's crawl against a local stub catalog.
+
+Crawls the same stub site sequentially and with --workers, each page
+delayed by --latency seconds, and checks that both runs return the same
+books in the same order. A second run makes every --fail-every-th request
+answer 429 to check that retries still deliver every page, and a third
+checks that --rate is respected.
+
+Usage:
+  python3 benchmarks/bench_crawl.py --pages 40 --latency 0.05 --workers 8
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from urllib.parse import urlparse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from sap_press_scraper import SAPPressScraper  # noqa: E402
+from stub_catalog import StubCatalog  # noqa: E402
+
+
+def crawl(catalog, **options):
+    base_url = catalog.start()
+    try:
+        scraper = SAPPressScraper(base_url=base_url, backoff=0.01, **options)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            books = scraper.scrape_all_books()
+        # each run gets its own port, so compare books by path
+        return [(book['title'], urlparse(book['url']).path) for book in books], time.perf_counter() - start
+    finally:
+        catalog.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark concurrent crawling against a stub catalog')
+    parser.add_argument('--pages', type=int, default=40)
+    parser.add_argument('--books-per-page', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds the stub waits per response')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--fail-every', type=int, default=7)
+    parser.add_argument('--rate', type=float, default=20.0, help='Rate limit checked in the last run')
+    args = parser.parse_args()
+
+    def catalog(**kw):
+        return StubCatalog(pages=args.pages, books_per_page=args.books_per_page, latency=args.latency, **kw)
+
+    expected = args.pages * args.books_per_page
+    seq_books, seq_time = crawl(catalog(), workers=1, rate=0)
+    par_books, par_time = crawl(catalog(), workers=args.workers, rate=0)
+    print(f"sequential: {len(seq_books)} books in {seq_time:.2f}s")
+    print(f"{args.workers} workers:  {len(par_books)} books in {par_time:.2f}s ({seq_time / par_time:.1f}x)")
+    assert len(seq_books) == expected and par_books == seq_books
+
+    flaky = catalog(fail_every=args.fail_every)
+    flaky_books, flaky_time = crawl(flaky, workers=args.workers, rate=0)
+    print(f"429 on every {args.fail_every}th request: {flaky.failures} retried, "
+          f"{len(flaky_books)} books in {flaky_time:.2f}s")
+    assert flaky_books == seq_books
+
+    limited = catalog()
+    limited_books, limited_time = crawl(limited, workers=args.workers, rate=args.rate)
+    observed = limited.requests / limited_time
+    print(f"rate limit {args.rate:g}/s: {limited.requests} requests in {limited_time:.2f}s ({observed:.1f}/s)")
+    assert limited_books == seq_books and observed <= args.rate * 1.1
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark the expense ledger in daily_expenses.py.
+
+Writes --records random expenses (three years, --categories categories,
+amounts in cents) to a CSV file and ingests it into a fresh ledger. Then:
+
+  * reopens the ledger from its snapshot,
+  * answers --queries random date-range totals (half of them for one
+    category) and a monthly report from the prefix sums,
+  * answers --rescans of those queries by rescanning every record with
+    math.fsum, the way a ledger without running totals would, and checks
+    that both agree exactly.
+
+Usage:
+  python3 benchmarks/bench_expenses.py --records 10000000
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from daily_expenses import COLUMNS, ExpenseLedger, read_records  # noqa: E402
+
+START = date(2023, 1, 1)
+DAYS = 3 * 365
+
+
+def write_csv(path, records, categories, seed=4):
+    rng = random.Random(seed)
+    names = [f'category_{i:02d}' for i in range(categories)]
+    dates = [(START + timedelta(days=d)).isoformat() for d in range(DAYS)]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('date,category,amount\n')
+        for start in range(0, records, 100000):
+            n = min(100000, records - start)
+            f.write(''.join(f'{rng.choice(dates)},{rng.choice(names)},{rng.randint(1, 50000) / 100}\n'
+                            for _ in range(n)))
+    return names
+
+
+def random_range(rng):
+    first = rng.randrange(DAYS)
+    last = min(DAYS - 1, first + rng.randint(0, 400))
+    return START + timedelta(days=first), START + timedelta(days=last)
+
+
+def rescan(ledger, start, end, category):
+    # no running totals: read every record and sum the matching ones
+    days, cats, amounts = ledger._read(0, ledger.count)
+    lo, hi = start.toordinal(), end.toordinal()
+    if category is None:
+        return math.fsum(a for d, a in zip(days, amounts) if lo <= d <= hi)
+    cat = ledger.categories.index(category)
+    return math.fsum(a for d, c, a in zip(days, cats, amounts) if lo <= d <= hi and c == cat)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the expense ledger')
+    parser.add_argument('--records', type=int, default=10_000_000)
+    parser.add_argument('--categories', type=int, default=12)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--rescans', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(9)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'expenses.csv')
+        names, gen_time = timed(lambda: write_csv(csv_path, args.records, args.categories))
+        print(f"{args.records:,} records, {os.path.getsize(csv_path) / 2**20:,.0f} MiB CSV "
+              f"(generated in {gen_time:.1f}s)")
+
+        ledger_path = os.path.join(tmp, 'ledger')
+        added, ingest_time = timed(lambda: ExpenseLedger(ledger_path).append(read_records(csv_path)))
+        assert added == args.records
+        store = sum(os.path.getsize(os.path.join(ledger_path, name)) for name, _ in COLUMNS)
+        print(f"ingest: {ingest_time:.1f}s ({added / ingest_time:,.0f} records/s), "
+              f"columns {store / 2**20:,.0f} MiB ({store / added:.0f} bytes per record)")
+
+        ledger, open_time = timed(lambda: ExpenseLedger(ledger_path))
+        print(f"reopen from snapshot: {open_time * 1000:.0f} ms, {len(ledger.cells):,} day x category totals")
+
+        queries = [random_range(rng) + (rng.choice(names) if rng.random() < 0.5 else None,)
+                   for _ in range(args.queries)]
+        ledger.total()   # builds the prefix sums
+        results, query_time = timed(lambda: [ledger.total(*q) for q in queries])
+        report, report_time = timed(lambda: ledger.report('month'))
+        print(f"range totals: {query_time / len(queries) * 1e6:.1f} us per query; "
+              f"monthly report ({len(report)} months) {report_time * 1000:.1f} ms")
+
+        rescan_times = []
+        for q, (total, _) in zip(queries[:args.rescans], results):
+            expected, seconds = timed(lambda: rescan(ledger, *q))
+            rescan_times.append(seconds)
+            assert total == expected, (q, total, expected)
+        if rescan_times:
+            per_rescan = sum(rescan_times) / len(rescan_times)
+            print(f"full rescan: {per_rescan:.2f}s per query, same sums to the last bit "
+                  f"({per_rescan / (query_time / len(queries)):,.0f}x slower)")
+        everything, _ = timed(lambda: ledger.total())
+        assert everything[0] == math.fsum(ledger._read(0, ledger.count)[2]) and everything[1] == args.records
+
+
+if __name__ == '__main__':
+    main()
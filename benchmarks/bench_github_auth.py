@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark and check the cached GitHub App credentials.
+
+Generates a throwaway RSA key, then:
+  * compares JWTs served per second by the old /jwt code (read PEM + sign on
+    every call) with the cached /jwt route,
+  * runs a local stub of GitHub's access_tokens endpoint and checks that
+    concurrent callers share one refresh and that tokens close to expiry are
+    refreshed ahead of time in the background.
+
+Usage:
+  python3 benchmarks/bench_github_auth.py --iterations 200 --threads 32
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jwt  # noqa: E402
+from cryptography.hazmat.primitives import serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import rsa  # noqa: E402
+
+from github_auth import AppJWTCache, InstallationTokenCache  # noqa: E402
+
+
+def write_key(path):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    with open(path, 'wb') as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.TraditionalOpenSSL,
+                                  serialization.NoEncryption()))
+    return key.public_key()
+
+
+def legacy_jwt(app_id, key_path):
+    # the /jwt body before caching (iss as a string for current PyJWT)
+    with open(key_path, 'rb') as f:
+        private_key = f.read()
+    now = int(time.time())
+    payload = {"iat": now - 60, "exp": now + (9 * 60), "iss": str(int(app_id))}
+    return jwt.encode(payload, private_key, algorithm='RS256')
+
+
+def rate(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return iterations / (time.perf_counter() - start)
+
+
+class StubGitHub(BaseHTTPRequestHandler):
+    requests_seen = 0
+    expires_in = 3600
+    delay = 0.05
+    lock = threading.Lock()
+
+    def do_POST(self):
+        with StubGitHub.lock:
+            StubGitHub.requests_seen += 1
+            n = StubGitHub.requests_seen
+        time.sleep(StubGitHub.delay)  # make concurrent callers overlap
+        expires = datetime.now(timezone.utc) + timedelta(seconds=StubGitHub.expires_in)
+        body = json.dumps({'token': f'ghs_stub{n}', 'expires_at': expires.strftime('%Y-%m-%dT%H:%M:%SZ')}).encode()
+        self.send_response(201)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cached GitHub App JWT and installation tokens')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=32)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        key_path = os.path.join(tmp, 'app.pem')
+        public_key = write_key(key_path)
+        os.environ['GITHUB_APP_ID'] = '12345'
+        os.environ['GITHUB_PRIVATE_KEY_PATH'] = key_path
+        os.environ['WEBHOOK_JOURNAL'] = ''
+        import app as app_module
+
+        client = app_module.app.test_client()
+        token = client.get('/jwt').json['jwt']
+        claims = jwt.decode(token, public_key, algorithms=['RS256'])
+        assert claims['iss'] == '12345'
+
+        before = rate(lambda: legacy_jwt('12345', key_path), args.iterations)
+        after = rate(lambda: client.get('/jwt'), args.iterations * 10)
+        print(f"/jwt tokens/s: before {before:,.0f}, after {after:,.0f} ({after / before:,.0f}x)")
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StubGitHub)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        api_url = f'http://127.0.0.1:{server.server_port}'
+
+        tokens = InstallationTokenCache(AppJWTCache('12345', key_path), api_url=api_url)
+        with ThreadPoolExecutor(args.threads) as pool:
+            got = set(pool.map(lambda _: tokens.token(1), range(args.threads)))
+        print(f"{args.threads} concurrent callers -> {StubGitHub.requests_seen} token request(s), tokens {sorted(got)}")
+        assert StubGitHub.requests_seen == 1 and len(got) == 1
+
+        # a token inside the refresh-ahead window is served while a new one is fetched
+        StubGitHub.requests_seen = 0
+        StubGitHub.expires_in = 120
+        tokens = InstallationTokenCache(AppJWTCache('12345', key_path), api_url=api_url, refresh_ahead=300)
+        first = tokens.token(2)
+        StubGitHub.expires_in = 3600
+        start = time.perf_counter()
+        second = tokens.token(2)
+        served = time.perf_counter() - start
+        time.sleep(StubGitHub.delay * 4)
+        third = tokens.token(2)
+        print(f"refresh-ahead: served {second} in {served * 1000:.2f} ms while refreshing, "
+              f"then {third}; {StubGitHub.requests_seen} request(s)")
+        assert first == second and third != first
+
+        StubGitHub.requests_seen = 0
+        StubGitHub.delay = 0
+        tokens = InstallationTokenCache(AppJWTCache('12345', key_path), api_url=api_url)
+        hits = rate(lambda: tokens.token(3), args.iterations * 10)
+        print(f"installation tokens/s from cache: {hits:,.0f} ({StubGitHub.requests_seen} request(s))")
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark the scraper's on-disk response cache against a local stub catalog.
+
+Crawls the stub three times with one cache directory: cold (every page
+downloaded), warm (every page revalidated with If-None-Match and answered
+304) and offline (stub stopped, pages served from disk). Checks that all
+three runs return the same books, then shrinks --cache-max-mb to check
+eviction.
+
+Usage:
+  python3 benchmarks/bench_http_cache.py --pages 40 --latency 0.02
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from http_cache import ResponseCache  # noqa: E402
+from sap_press_scraper import SAPPressScraper  # noqa: E402
+from stub_catalog import StubCatalog  # noqa: E402
+
+
+def crawl(base_url, cache, offline=False):
+    scraper = SAPPressScraper(base_url=base_url, rate=0, cache=cache, offline=offline)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        books = scraper.scrape_all_books()
+    return books, scraper.stats, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the scraper response cache')
+    parser.add_argument('--pages', type=int, default=40)
+    parser.add_argument('--books-per-page', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.02, help='Seconds the stub waits per response')
+    args = parser.parse_args()
+
+    catalog = StubCatalog(pages=args.pages, books_per_page=args.books_per_page, latency=args.latency)
+    base_url = catalog.start()
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(os.path.join(tmp, 'cache'))
+
+        cold, stats, cold_time = crawl(base_url, cache)
+        cold_bytes = catalog.bytes_sent
+        print(f"cold:    {len(cold)} books, {stats['requests']} requests, "
+              f"{cold_bytes / 1024:.0f} KiB in {cold_time:.2f}s")
+
+        warm, stats, warm_time = crawl(base_url, cache)
+        warm_bytes = catalog.bytes_sent - cold_bytes
+        print(f"warm:    {len(warm)} books, {stats['requests']} requests ({stats['not_modified']} not modified), "
+              f"{warm_bytes / 1024:.0f} KiB in {warm_time:.2f}s")
+        catalog.shutdown()
+
+        offline, stats, offline_time = crawl(base_url, cache, offline=True)
+        print(f"offline: {len(offline)} books, {stats['offline']} pages from disk in {offline_time:.2f}s")
+        assert cold == warm == offline and stats['requests'] == 0
+
+        entries = len([name for name in os.listdir(cache.directory) if name.endswith('.body')])
+        page_bytes = cold_bytes / entries
+        cache.max_bytes = int(page_bytes * 10)
+        removed = cache.evict()
+        print(f"evict to {cache.max_bytes / 1024:.0f} KiB: removed {removed} of {entries} entries")
+        assert entries - removed <= 10
+
+
+if __name__ == '__main__':
+    main()
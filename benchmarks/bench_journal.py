@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Compare score submissions per second for the old rewrite-per-request path,
+the write-behind leaderboard and the journal mode.
+
+Usage:
+  python3 benchmarks/bench_journal.py --submissions 5000 --size 100
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leaderboard import Leaderboard  # noqa: E402
+
+
+def rewrite_submit(path, name, score, size):
+    # what app.py did before: parse, append, sort, truncate, rewrite
+    scores = []
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            scores = json.load(f)
+    scores.append({'name': name, 'score': score})
+    scores = sorted(scores, key=lambda s: s.get('score', 0), reverse=True)[:size]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(scores, f, indent=2)
+
+
+def run(label, submit, workload):
+    start = time.perf_counter()
+    for name, score in workload:
+        submit(name, score)
+    elapsed = time.perf_counter() - start
+    rate = len(workload) / elapsed if elapsed else float('inf')
+    print(f"{label:<24} {rate:>12,.0f} submissions/s  ({elapsed:.3f}s)")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark leaderboard persistence strategies')
+    parser.add_argument('--submissions', type=int, default=5000)
+    parser.add_argument('--size', type=int, default=100, help='Leaderboard size (K)')
+    parser.add_argument('--flush-every', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    workload = [(f"player{rng.randrange(1000)}", rng.randrange(10000)) for _ in range(args.submissions)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'rewrite.json')
+        base = run('rewrite per request', lambda n, s: rewrite_submit(path, n, s, args.size), workload)
+
+        board = Leaderboard(os.path.join(tmp, 'behind.json'), size=args.size,
+                            flush_interval=None, flush_every=args.flush_every)
+        behind = run('write-behind', board.submit, workload)
+        board.close()
+
+        board = Leaderboard(os.path.join(tmp, 'journal.json'), size=args.size,
+                            flush_interval=None, flush_every=args.flush_every, journal=True)
+        journal = run('journal + compaction', board.submit, workload)
+        board.close()
+
+        recovered = Leaderboard(os.path.join(tmp, 'journal.json'), size=args.size, journal=True)
+        assert recovered.entries() == board.entries()
+        recovered.close()
+
+    print(f"\nwrite-behind speedup: {behind / base:.1f}x, journal speedup: {journal / base:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
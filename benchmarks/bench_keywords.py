@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark topic classification on a large synthetic catalog.
+
+Compares the old is_ai_related (lowercase, then one substring scan per
+keyword, stopping at the first hit) and its straightforward whole-word fix
+(one regex search per keyword) with the compiled KeywordMatcher, called per
+book and as one batch over the whole catalog. The substring scans are fast
+mostly because "ai" occurs inside common words; the benchmark also counts
+the books only they accept, such as "ai" in "maintain" or "email". Before
+timing, it checks that keywords edged with punctuation ("c++", "c#", ".net")
+match as whole words.
+
+Usage:
+  python3 benchmarks/bench_keywords.py --books 200000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_matcher import KeywordMatcher  # noqa: E402
+from sap_press_scraper import SAPPressScraper  # noqa: E402
+
+SUBJECTS = ['SAP S/4HANA Finance', 'ABAP RESTful Programming', 'SAP Fiori Elements', 'Machine Learning',
+            'SAP Datasphere', 'Generative AI with SAP', 'Warehouse Management', 'SAP BTP Security',
+            'Deep Learning with PyTorch', 'Email Marketing', 'Maintenance Planning', 'SAP Analytics Cloud']
+FILLER = ('configure maintain detail explain contain domain certain available plain training obtain main '
+          'again email retail chain guide practical business process data reporting integration').split()
+
+
+def synthetic_catalog(n, seed=1):
+    rng = random.Random(seed)
+    books = []
+    for i in range(n):
+        subject = rng.choice(SUBJECTS)
+        words = ' '.join(rng.choice(FILLER) for _ in range(rng.randint(20, 40)))
+        books.append({'title': f'{subject}: The Practical Guide, Vol. {i}',
+                      'url': f'https://www.sap-press.com/book_{i}/',
+                      'description': f'Learn {subject.lower()} with this guide. {words}.'})
+    return books
+
+
+def legacy_is_ai_related(book_info, keywords=SAPPressScraper.AI_KEYWORDS):
+    # is_ai_related before the compiled matcher
+    text_to_search = f"{book_info['title']} {book_info['description']}".lower()
+    for keyword in keywords:
+        if keyword in text_to_search:
+            return True
+    return False
+
+
+def per_keyword_regex(keywords=SAPPressScraper.AI_KEYWORDS):
+    # whole-word matching without the compiled matcher: one search per keyword
+    patterns = [re.compile(r'(?<!\w)%ss?(?!\w)' % re.escape(keyword)) for keyword in keywords]
+
+    def is_related(book_info):
+        text_to_search = f"{book_info['title']} {book_info['description']}".lower()
+        return any(pattern.search(text_to_search) for pattern in patterns)
+    return is_related
+
+
+def check_punctuation_edges():
+    # \b needs a word character next to it, so it never matched these
+    matcher = KeywordMatcher(['c++', 'c#', '.net', 'ai'])
+    assert matcher.terms('Learn C++, C# and .NET (with AI).') == {'c++': 1, 'c#': 1, '.net': 1, 'ai': 1}
+    assert matcher.terms('c++11 asp.net c#x email') == {}
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark keyword classification')
+    parser.add_argument('--books', type=int, default=200000)
+    args = parser.parse_args()
+
+    check_punctuation_edges()
+    books = synthetic_catalog(args.books)
+    scraper = SAPPressScraper()
+    matcher, compile_time = timed(lambda: KeywordMatcher(SAPPressScraper.AI_KEYWORDS))
+    print(f"{args.books:,} books, {len(matcher.keywords)} keywords, compiled in {compile_time * 1000:.2f} ms")
+
+    old, old_time = timed(lambda: [legacy_is_ai_related(book) for book in books])
+    naive = per_keyword_regex()
+    fixed, fixed_time = timed(lambda: [naive(book) for book in books])
+    per_book, per_book_time = timed(lambda: [scraper.is_ai_related(book) for book in books])
+    batch, batch_time = timed(lambda: matcher.classify(books))
+    new = [result['score'] > 0 for result in batch]
+    assert new == per_book == fixed
+
+    for label, seconds in (('old substring scans', old_time), ('regex per keyword', fixed_time),
+                           ('matcher, per book', per_book_time), ('matcher, one batch', batch_time)):
+        print(f"  {label:<20} {seconds:>7.2f}s  {args.books / seconds:>11,.0f} books/s  "
+              f"{fixed_time / seconds:>5.1f}x vs regex per keyword")
+
+    false_hits = [book for book, o, n in zip(books, old, new) if o and not n]
+    print(f"accepted: old {sum(old):,}, new {sum(new):,}; only by substring match: {len(false_hits):,}")
+    if false_hits:
+        print(f"  e.g. {false_hits[0]['title']!r}")
+    top = max(range(len(batch)), key=lambda i: batch[i]['score'])
+    print(f"most relevant: {books[top]['title']!r} {batch[top]}")
+
+
+if __name__ == '__main__':
+    main()
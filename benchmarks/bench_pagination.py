@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Count requests per catalog page for the scraper's pagination discovery.
+
+Crawls stub catalogs that paginate as /?page=N or /page/N/, with and
+without rel="next" pager links and with soft-404s (unknown URLs answered
+with the homepage). Each is crawled with the old loop, which tried three URL
+patterns for every page number, and with the current Paginator,
+sequentially and with --workers. The old loop is capped at pages + 5
+because on soft-404 sites it never stops by itself.
+
+Usage:
+  python3 benchmarks/bench_pagination.py --pages 30 --workers 4
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from sap_press_scraper import SAPPressScraper  # noqa: E402
+from stub_catalog import StubCatalog  # noqa: E402
+
+SITES = [
+    ('query', False, False),
+    ('path', False, False),
+    ('path', True, False),
+    ('path', False, True),
+    ('query', True, True),
+]
+
+
+def legacy_crawl(scraper, max_pages):
+    # scrape_all_books before pagination discovery: three patterns per page
+    books = scraper._fetch_books(scraper.base_url) or []
+    page_num = 2
+    while page_num <= max_pages:
+        found = False
+        for pattern in scraper.PAGE_PATTERNS:
+            page_books = scraper._fetch_books(pattern.format(base=scraper.base_url, n=page_num))
+            if page_books:
+                books.extend(page_books)
+                found = True
+                break
+        if not found:
+            break
+        page_num += 1
+    return len({book['url'] for book in books}), page_num > max_pages
+
+
+def run(site, args, workers=1, legacy=False):
+    style, pager, soft_404 = site
+    catalog = StubCatalog(pages=args.pages, books_per_page=args.books_per_page,
+                          style=style, pager=pager, soft_404=soft_404)
+    base_url = catalog.start()
+    try:
+        scraper = SAPPressScraper(base_url=base_url, rate=0, workers=workers)
+        with contextlib.redirect_stdout(io.StringIO()):
+            if legacy:
+                books, capped = legacy_crawl(scraper, args.pages + 5)
+            else:
+                books, capped = len(scraper.scrape_all_books()), False
+        return books, catalog.requests, capped
+    finally:
+        catalog.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Count requests per page for pagination discovery')
+    parser.add_argument('--pages', type=int, default=30)
+    parser.add_argument('--books-per-page', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    expected = args.pages * args.books_per_page
+    print(f"{'site':<28} {'old':>13}  {'sequential':>13}  {f'{args.workers} workers':>13}   (requests per page)")
+    for site in SITES:
+        style, pager, soft_404 = site
+        name = f"/{'?page=N' if style == 'query' else 'page/N/'}" + (' +rel=next' if pager else '') + \
+            (' +soft-404' if soft_404 else '')
+        cells = []
+        for options in ({'legacy': True}, {}, {'workers': args.workers}):
+            books, requests, capped = run(site, args, **options)
+            if 'legacy' not in options:
+                assert books == expected, (name, options, books)
+            cells.append(f"{requests / args.pages:>13.2f}{'*' if capped else ' '}")
+        print(f"{name:<28} {''.join(cells)}")
+    print("* never stopped by itself; cut off at pages + 5")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Time SAPPressScraper.extract_books_from_page on saved HTML.
+
+Fixtures are the repo's test.html, london.html and cat.html, one stub
+catalog page and a large synthetic catalog page (--books tiles with cover,
+title and "more" links plus navigation and script noise). Each fixture is
+parsed and extracted with the old implementation (html.parser, a loop over
+every <a>), the current one on html.parser and, when installed, on lxml.
+All variants must return the same books.
+
+Usage:
+  python3 benchmarks/bench_parse.py --books 3000 --iterations 5
+"""
+import argparse
+import os
+import sys
+import time
+from urllib.parse import urljoin
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+import sap_press_scraper  # noqa: E402
+from stub_catalog import TOPICS, render_page  # noqa: E402
+
+
+def legacy_extract(base_url, soup):
+    # extract_books_from_page before the single-pass rewrite (no AI filter)
+    books_on_page = []
+    seen_urls = set()
+    for link in soup.find_all('a', href=True):
+        try:
+            href = link.get('href', '')
+            if href.startswith('/') and '_' in href and href.endswith('/'):
+                try:
+                    book_id = href.split('_')[-1].rstrip('/')
+                    if book_id.isdigit():
+                        title = link.get_text(strip=True)
+                        if title and title != 'More about the book' and title != 'Cover':
+                            book_url = urljoin(base_url, href)
+                            if book_url not in seen_urls:
+                                seen_urls.add(book_url)
+                                description = ""
+                                parent = link.find_parent()
+                                if parent:
+                                    p_tag = parent.find('p')
+                                    if p_tag:
+                                        description = p_tag.get_text(strip=True)
+                                books_on_page.append({
+                                    'title': title.strip(),
+                                    'url': book_url,
+                                    'description': description[:200] + '...' if len(description) > 200 else description
+                                })
+                except (IndexError, ValueError):
+                    continue
+        except Exception:
+            continue
+    return books_on_page
+
+
+def synthetic_page(books):
+    nav = ''.join(f'<li><a href="/category/{TOPICS[i % len(TOPICS)].lower().replace(" ", "-")}_{i}">'
+                  f'Category {i}</a></li>' for i in range(200))
+    tiles = []
+    for i in range(books):
+        topic = TOPICS[i % len(TOPICS)]
+        slug = f"{topic.lower().replace(' ', '-').replace('/', '')}-{i}"
+        tiles.append(
+            f'<article class="product"><a href="/{slug}_{5000 + i}/"><img src="/img/{i}.jpg" alt=""></a>'
+            f'<h3><a href="/{slug}_{5000 + i}/">{topic}: Volume {i}</a></h3>'
+            f'<p>Learn {topic} step by step. {"Covers installation, configuration and operations. " * 4}</p>'
+            f'<span class="price">$79.95</span><a href="/{slug}_{5000 + i}/">More about the book</a>'
+            f'<a href="/cart/add?id={5000 + i}">Add to cart</a></article>')
+    script = '<script>' + 'window.dataLayer = window.dataLayer || [];' * 200 + '</script>'
+    return (f'<!DOCTYPE html><html><head><title>Catalog</title>{script}</head><body>'
+            f'<nav><ul>{nav}</ul></nav><main>{"".join(tiles)}</main>{script}</body></html>').encode()
+
+
+def fixtures(books):
+    pages = {}
+    for name in ('test.html', 'london.html', 'cat.html'):
+        with open(os.path.join(REPO_DIR, name), 'rb') as f:
+            pages[name] = f.read()
+    pages['stub catalog page'] = render_page(1, 1, 20)
+    pages[f'synthetic ({books} books)'] = synthetic_page(books)
+    return pages
+
+
+def best_of(fn, iterations):
+    best = float('inf')
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark book extraction on saved HTML')
+    parser.add_argument('--books', type=int, default=3000, help='Books on the synthetic catalog page')
+    parser.add_argument('--iterations', type=int, default=5)
+    args = parser.parse_args()
+
+    scraper = sap_press_scraper.SAPPressScraper(base_url='https://www.sap-press.com')
+    base_url = scraper.base_url
+    variants = [('old, html.parser', 'html.parser', lambda soup: legacy_extract(base_url, soup)),
+                ('new, html.parser', 'html.parser', scraper.extract_books_from_page)]
+    if sap_press_scraper.HTML_PARSER == 'lxml':
+        variants.append(('new, lxml', 'lxml', scraper.extract_books_from_page))
+    else:
+        print('lxml is not installed; skipping the lxml variant')
+
+    for name, html in fixtures(args.books).items():
+        print(f"{name} ({len(html) / 1024:.0f} KiB)")
+        expected = None
+        baseline = None
+        for label, parser_name, extract in variants:
+            parse_time, soup = best_of(lambda: BeautifulSoup(html, parser_name), args.iterations)
+            extract_time, books = best_of(lambda: extract(soup), args.iterations)
+            if expected is None:
+                expected = books
+            assert books == expected, f'{label} differs on {name}'
+            total = parse_time + extract_time
+            baseline = baseline or total
+            print(f"  {label:<18} parse {parse_time * 1000:>8.2f} ms  extract {extract_time * 1000:>8.2f} ms  "
+                  f"{len(books):>5} books  {baseline / total:>5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Measure the request overhead of the sampled profiler in profiling.py.
+
+Each mode runs in its own process that imports app.py with a different
+PROFILE_* environment and sends --requests POST /submit_score and GET
+/scores requests through the Flask test client:
+
+  * off: no PROFILE_* variables, so no hooks are installed
+  * every-100 / every-10: one request in 100 or 10 under cProfile
+  * slow-50ms: only requests slower than 50 ms are stack-sampled (none are)
+  * every-1: every request under cProfile, the worst case
+
+Modes take turns for --passes passes, so a noisy neighbour slows all of
+them alike, and each mode's best round of CPU time per request is
+reported with its overhead against off. The profiler must have seen every request and profiled
+exactly one in PROFILE_EVERY of each route. As the differences for rare sampling are
+within the noise of a shared machine, Profiler.start/finish are also
+timed on their own, and the expected overhead at 1 in N is derived from them and the
+cost of a profiled request measured by every-1.
+
+Usage:
+  python3 benchmarks/bench_profiling.py --requests 5000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from profiling import Profiler  # noqa: E402
+
+ROUTES = ('/submit_score', '/scores')   # requested alternately
+MODES = {
+    'off': {},
+    'every-100': {'PROFILE_EVERY': '100'},
+    'every-10': {'PROFILE_EVERY': '10'},
+    'slow-50ms': {'PROFILE_SLOW_MS': '50'},
+    'every-1': {'PROFILE_EVERY': '1'},
+}
+
+
+def child(requests, rounds):
+    import app
+
+    client = app.app.test_client()
+    for i in range(200):   # warm up
+        client.post('/submit_score', json={'name': f'warm{i}', 'score': i})
+        client.get('/scores')
+    best = float('inf')
+    for _ in range(rounds):
+        # CPU time of the whole process, sampler thread included; wall time
+        # on a shared machine varies more than the overhead being measured
+        start = time.process_time()
+        for i in range(requests // 2):
+            client.post('/submit_score', json={'name': f'p{i % 300}', 'score': i})
+            client.get('/scores')
+        best = min(best, time.process_time() - start)
+    summary = app.PROFILER.summary() if app.PROFILER is not None else {}
+    app.LEADERBOARD.close()
+    print(json.dumps({'per_request_us': best / (requests // 2 * 2) * 1e6,
+                      'profiled': sum(r['profiled'] for r in summary.values()),
+                      'requests': sum(r['requests'] for r in summary.values())}))
+
+
+def hook_cost(calls=200000):
+    """Microseconds spent in Profiler.start/finish for a request that is not sampled"""
+    profiler = Profiler(every=calls + 1)
+    start = time.perf_counter()
+    for _ in range(calls):
+        profiler.finish(profiler.start('/scores'))
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def run_mode(mode, requests, rounds, tmp):
+    env = dict(os.environ, WEBHOOK_JOURNAL='', **MODES[mode])
+    for name in ('PROFILE_EVERY', 'PROFILE_SLOW_MS'):
+        if name not in MODES[mode]:
+            env.pop(name, None)
+    cmd = [sys.executable, os.path.abspath(__file__), '--child', '--requests', str(requests), '--rounds', str(rounds)]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True, env=env, cwd=tmp).stdout
+    return json.loads(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the overhead of sampled request profiling')
+    parser.add_argument('--requests', type=int, default=3000, help='Requests per round')
+    parser.add_argument('--passes', type=int, default=2, help='Times every mode is run, taking turns')
+    parser.add_argument('--rounds', type=int, default=3, help='Rounds per mode (best is reported)')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.requests, args.rounds)
+
+    sent = args.requests // 2 * 2 * args.rounds + 400
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for _ in range(args.passes):
+            for mode in MODES:
+                r = run_mode(mode, args.requests, args.rounds, tmp)
+                if mode not in results or r['per_request_us'] < results[mode]['per_request_us']:
+                    results[mode] = r
+    base = results['off']['per_request_us']
+    print(f"{args.requests:,} requests x {args.rounds} rounds x {args.passes} passes through the test client")
+    for mode, r in results.items():
+        if mode != 'off':
+            assert r['requests'] == sent, (mode, r)
+        every = int(MODES[mode].get('PROFILE_EVERY', 0))
+        if every:
+            # each route counts its own requests; a request is skipped when another one is
+            # being profiled, but the test client never overlaps
+            assert r['profiled'] == len(ROUTES) * (sent // len(ROUTES) // every), (mode, r)
+        print(f"  {mode:<10} {r['per_request_us']:>8.1f} us/request  {r['per_request_us'] / base - 1:>+7.1%}  "
+              f"{r['profiled']:>6,} profiled")
+
+    hooks = hook_cost()
+    profiled = results['every-1']['per_request_us'] - base
+    print(f"Profiler.start/finish {hooks:.1f} us per request, a profiled request {profiled:,.0f} us more; expected overhead "
+          + ', '.join(f"1 in {n}: {(hooks + profiled / n) / base:.1%}" for n in (1000, 100, 10)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark for ranking.RankIndex.
+
+For each player count it measures updates per second, rank and around
+lookups per second, memory used by the index (names excluded), and the
+time of one rank computed by a linear scan for comparison.
+
+Usage:
+  python3 benchmarks/bench_ranks.py --players 10000 100000 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ranking import RankIndex  # noqa: E402
+
+
+def timed(fn, items):
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return time.perf_counter() - start
+
+
+def bench(players, lookups, rng):
+    names = [f"player{i}" for i in range(players)]
+    scores = [rng.randrange(100000) for _ in range(players)]
+    best = dict(zip(names, scores))
+
+    # tracemalloc slows allocation down, so size a separate copy
+    tracemalloc.start()
+    sized = RankIndex()
+    for name, score in zip(names, scores):
+        sized.update(name, score)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del sized
+
+    index = RankIndex()
+    start = time.perf_counter()
+    for name, score in zip(names, scores):
+        index.update(name, score)
+    build = time.perf_counter() - start
+
+    # improvements move existing players, the expensive update path
+    movers = [(rng.choice(names), rng.randrange(100000, 200000)) for _ in range(lookups)]
+    improve = timed(lambda m: index.update(*m), movers)
+
+    sample = [rng.choice(names) for _ in range(lookups)]
+    rank = timed(index.rank, sample)
+    around = timed(lambda n: index.around(n, 10), sample)
+
+    target = best[sample[0]]
+    start = time.perf_counter()
+    1 + sum(1 for s in best.values() if s > target)
+    scan = time.perf_counter() - start
+
+    print(f"{players:>10,} players | build {players / build:>9,.0f}/s | "
+          f"improve {lookups / improve:>9,.0f}/s | rank {lookups / rank:>9,.0f}/s | "
+          f"around {lookups / around:>8,.0f}/s | index {memory / players:>5.1f} B/player | "
+          f"linear rank {scan * 1000:>8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark RankIndex at increasing sizes')
+    parser.add_argument('--players', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--lookups', type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    for players in args.players:
+        bench(players, args.lookups, rng)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark group-by queries over GST reports: CSV every time vs the cache.
+
+Writes --files reports of --rows rows each (Test.csv rows with random
+cities, states, invoice dates and amounts) and answers a few typical
+queries three ways:
+
+  * csv: pd.read_csv of the whole report, then the same group-by (what an
+    ad-hoc script does today)
+  * first: invoice_reports.query on an empty cache (includes conversion)
+  * cached: the same query again, reading only the needed columns
+
+Results of all three must agree.
+
+Usage:
+  python3 benchmarks/bench_reports.py --files 2 --rows 250000
+"""
+import argparse
+import csv
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import pandas as pd  # noqa: E402
+
+from bench_unique_cities import render  # noqa: E402
+from invoice_reports import CACHE_FORMAT, ReportCache, query  # noqa: E402
+
+MARKED = ['Ship To City', 'Ship To State', 'Invoice Date', 'Invoice Amount', 'Total Tax Amount', 'Igst Tax']
+QUERIES = [
+    dict(by=['Ship To City'], sums=['Invoice Amount']),
+    dict(by=['Ship To State', 'month'], sums=['Invoice Amount', 'Total Tax Amount', 'Igst Tax'], count=True),
+    dict(by=['month'], distinct=['Order Id', 'Ship To City']),
+]
+
+
+def write_reports(directory, files, rows, cities=800, seed=5):
+    rng = random.Random(seed)
+    with open(os.path.join(REPO_DIR, 'Test.csv'), newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        samples = list(reader)
+    marks = [header.index(col) for col in MARKED]
+    templates = []
+    for row in samples:
+        for i, col in enumerate(marks):
+            row[col] = f'\x00{i}\x00'
+        templates.append(render(row))
+    places = [(f'CITY {i:04d}', f'STATE {i % 36:02d}') for i in range(cities)]
+    paths = []
+    for n in range(files):
+        path = os.path.join(directory, f'report_{n}.csv')
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(render(header))
+            for _ in range(rows):
+                city, state = rng.choice(places)
+                amount = rng.randint(100, 5000)
+                tax = round(amount * 0.18, 2)
+                line = rng.choice(templates)
+                for i, value in enumerate((city, state, f'2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} '
+                                           f'{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00',
+                                           amount, tax, tax if rng.random() < 0.5 else 0)):
+                    line = line.replace(f'\x00{i}\x00', str(value))
+                f.write(line)
+        paths.append(path)
+    return paths
+
+
+def csv_query(paths, by=(), sums=(), count=False, distinct=()):
+    # no cache: parse every report in full for every query
+    df = pd.concat([pd.read_csv(path) for path in paths], ignore_index=True)
+    if 'month' in by:
+        df['month'] = pd.to_datetime(df['Invoice Date']).dt.to_period('M')
+    aggs = {col: (col, 'sum') for col in sums}
+    if count:
+        aggs['count'] = (by[0], 'size')
+    aggs.update({f'distinct {col}': (col, 'nunique') for col in distinct})
+    return df.groupby(list(by), sort=True).agg(**aggs).reset_index()
+
+
+def same(a, b):
+    if list(a.columns) != list(b.columns) or len(a) != len(b):
+        return False
+    for col in a.columns:
+        x, y = a[col], b[col]
+        if pd.api.types.is_float_dtype(x) or pd.api.types.is_float_dtype(y):
+            if not ((x - y).abs() <= 1e-6 * y.abs().clip(lower=1)).all():
+                return False
+        elif list(x.astype(str)) != list(y.astype(str)):
+            return False
+    return True
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cached group-by queries on GST reports')
+    parser.add_argument('--files', type=int, default=2)
+    parser.add_argument('--rows', type=int, default=250000, help='Rows per file')
+    parser.add_argument('--repeat', type=int, default=3, help='Cached runs per query (best is reported)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths, gen_time = timed(lambda: write_reports(tmp, args.files, args.rows))
+        size = sum(os.path.getsize(p) for p in paths)
+        print(f"{args.files} files x {args.rows:,} rows, {size / 2**20:,.0f} MiB (generated in {gen_time:.1f}s), "
+              f"cache format {CACHE_FORMAT}")
+        cache_dir = os.path.join(tmp, 'cache')
+        for n, spec in enumerate(QUERIES, 1):
+            expected, csv_time = timed(lambda: csv_query(paths, **spec))
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            first, first_time = timed(lambda: query(paths, cache=ReportCache(cache_dir), jobs=1, **spec))
+            cached_time = min(timed(lambda: query(paths, cache=ReportCache(cache_dir), **spec))[1]
+                              for _ in range(args.repeat))
+            cached = query(paths, cache=ReportCache(cache_dir), **spec)
+            assert same(first, expected) and same(cached, expected), spec
+            print(f"  query {n}: {len(expected):>4} groups  csv {csv_time:>6.2f}s  first {first_time:>6.2f}s  "
+                  f"cached {cached_time * 1000:>7.1f} ms  ({csv_time / cached_time:,.0f}x faster than csv)")
+        cache_size = sum(os.path.getsize(os.path.join(cache_dir, name)) for name in os.listdir(cache_dir))
+        print(f"cache: {cache_size / 2**20:,.1f} MiB for {size / 2**20:,.0f} MiB of CSV")
+
+
+if __name__ == '__main__':
+    main()
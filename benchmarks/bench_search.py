@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark catalog search: inverted index vs a linear scan.
+
+Writes a synthetic catalog (--books entries with Zipf-distributed words) to
+a temporary JSON file, builds the index and runs --queries random one- to
+three-word queries. Every query is also answered by scanning the catalog,
+which tokenizes each book and scores it with the same BM25 formula, and the
+top results must match.
+
+Usage:
+  python3 benchmarks/bench_search.py --books 100000 --queries 50
+"""
+import argparse
+import heapq
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog_index import TITLE_WEIGHT, CatalogIndex, build_index, tokenize  # noqa: E402
+
+SYLLABLES = ['sap', 'ab', 'ap', 'fi', 'ori', 'ha', 'na', 'data', 'cloud', 'ml', 'ops', 'net', 'gen', 'ai',
+             'pro', 'log', 'mat', 'ic', 'ser', 'vice', 'flow', 'lake', 'core', 'mod', 'el']
+
+
+def vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def synthetic_catalog(n, seed=7):
+    rng = random.Random(seed)
+    words = vocabulary(5000, rng)
+    weights = [1 / (rank + 1) for rank in range(len(words))]   # Zipf-like word frequencies
+    books = []
+    for i in range(n):
+        title = ' '.join(rng.choices(words, weights, k=rng.randint(3, 8)))
+        description = ' '.join(rng.choices(words, weights, k=rng.randint(20, 40)))
+        books.append({'title': title.title(), 'url': f'https://www.sap-press.com/book_{i}/',
+                      'description': description})
+    return books, words, weights
+
+
+def linear_search(books, query, limit=10, k1=1.2, b=0.75):
+    # no index: tokenize every book for every query
+    terms = set(tokenize(query))
+    counts = []
+    df = Counter()
+    for book in books:
+        c = Counter()
+        for term in tokenize(book['title']):
+            c[term] += TITLE_WEIGHT
+        c.update(tokenize(book['description']))
+        counts.append(c)
+        df.update(term for term in terms if term in c)
+    avgdl = sum(sum(c.values()) for c in counts) / len(counts)
+    n = len(books)
+    scores = {}
+    for doc, c in enumerate(counts):
+        dl = sum(c.values())
+        score = 0.0
+        for term in terms:
+            tf = c.get(term)
+            if tf:
+                idf = math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5))
+                score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl))
+        if score:
+            scores[doc] = score
+    best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+    return [(score, books[doc]) for doc, score in best]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark catalog search')
+    parser.add_argument('--books', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--linear', type=int, default=3, help='Queries also answered by a linear scan')
+    args = parser.parse_args()
+
+    books, words, weights = synthetic_catalog(args.books)
+    rng = random.Random(1)
+    queries = [' '.join(rng.choices(words, weights, k=rng.randint(1, 3))) for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, 'books.json')
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(books, f)
+        start = time.perf_counter()
+        index_path = build_index(json_path)
+        build_time = time.perf_counter() - start
+        print(f"{args.books:,} books: index built in {build_time:.2f}s, "
+              f"{os.path.getsize(index_path) / 2**20:.1f} MiB ({os.path.getsize(json_path) / 2**20:.1f} MiB JSON)")
+
+        index = CatalogIndex(json_path)
+        start = time.perf_counter()
+        index.search(queries[0])
+        print(f"first query (opens the index): {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query)
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        print(f"indexed search over {len(queries)} queries: median {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+              f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:.2f} ms, max {latencies[-1] * 1000:.2f} ms")
+
+        linear_times = []
+        for query in queries[:args.linear]:
+            start = time.perf_counter()
+            expected = linear_search(books, query)
+            linear_times.append(time.perf_counter() - start)
+            got = index.search(query)
+            assert [book['url'] for _, book in got] == [book['url'] for _, book in expected], query
+            assert all(math.isclose(a, b, rel_tol=1e-9) for (a, _), (b, _) in zip(got, expected)), query
+        if linear_times:
+            median = sorted(latencies)[len(latencies) // 2]
+            linear = sum(linear_times) / len(linear_times)
+            print(f"linear scan: {linear * 1000:.0f} ms per query, same top 10 "
+                  f"({linear / median:,.0f}x slower than the index)")
+        index.close()
+
+
+if __name__ == '__main__':
+    main()
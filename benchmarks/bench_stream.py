@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Check resumable streaming output and compare its memory use.
+
+Against a local stub catalog:
+  * scrapes in memory and writes JSON/CSV the old way (the reference),
+  * streams the same scrape but interrupts it after --crash-after pages,
+    leaves half a record at the end of the JSONL file, then resumes with
+    a new scraper and checks that the JSON and CSV match the reference
+    byte for byte,
+  * reports peak Python memory (tracemalloc) of both modes.
+
+Usage:
+  python3 benchmarks/bench_stream.py --pages 60 --books-per-page 200
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from catalog_stream import CatalogWriter  # noqa: E402
+from sap_press_scraper import SAPPressScraper  # noqa: E402
+from stub_catalog import StubCatalog  # noqa: E402
+
+
+class Interrupted(Exception):
+    pass
+
+
+class CrashingScraper(SAPPressScraper):
+    """Stops fetching (as if killed) once `crash_after` pages were fetched"""
+
+    def __init__(self, crash_after, **kw):
+        super().__init__(**kw)
+        self.crash_after = crash_after
+        self.fetched = 0
+
+    def fetch_page(self, url):
+        if self.fetched >= self.crash_after:
+            raise Interrupted(url)
+        self.fetched += 1
+        return super().fetch_page(url)
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def in_memory(base_url, out):
+    scraper = SAPPressScraper(base_url=base_url, rate=0)
+    scraper.scrape_all_books()
+    scraper.save_to_json(out + '.json')
+    scraper.save_to_csv(out + '.csv')
+
+
+def streamed(base_url, out, crash_after=None):
+    kw = dict(base_url=base_url, rate=0)
+    scraper = CrashingScraper(crash_after, **kw) if crash_after else SAPPressScraper(**kw)
+    scraper.writer = CatalogWriter(out + '.json', out + '.csv')
+    state = scraper.writer.start(resume=True)
+    try:
+        scraper.scrape_all_books(resume_from=state)
+    except Interrupted:
+        scraper.writer.close()
+        return False
+    scraper.writer.finish()
+    return True
+
+
+def peak_memory(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check streamed output with checkpoint/resume')
+    parser.add_argument('--pages', type=int, default=60)
+    parser.add_argument('--books-per-page', type=int, default=200)
+    parser.add_argument('--crash-after', type=int, default=25, help='Pages fetched before the interruption')
+    args = parser.parse_args()
+
+    catalog = StubCatalog(pages=args.pages, books_per_page=args.books_per_page)
+    base_url = catalog.start()
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()) as log:
+        reference = os.path.join(tmp, 'reference')
+        in_memory(base_url, reference)
+
+        out = os.path.join(tmp, 'streamed')
+        finished = streamed(base_url, out, crash_after=args.crash_after)
+        assert not finished
+        with open(out + '.json.checkpoint') as f:
+            checkpoint = f.read()
+        with open(out + '.jsonl', 'ab') as f:
+            f.write(b'{"title": "half a rec')   # the write the interruption cut short
+        assert streamed(base_url, out)
+        same = read(out + '.json') == read(reference + '.json') and read(out + '.csv') == read(reference + '.csv')
+
+        memory_ref, time_ref = peak_memory(lambda: in_memory(base_url, reference))
+        memory_stream, time_stream = peak_memory(lambda: streamed(base_url, os.path.join(tmp, 'again')))
+    catalog.shutdown()
+
+    print(f"interrupted after {args.crash_after} pages, checkpoint {checkpoint}")
+    print(f"resumed output identical to an uninterrupted run: {same}")
+    assert same, log.getvalue()[-2000:]
+    books = args.pages * args.books_per_page
+    print(f"{books:,} books, peak Python memory: in memory {memory_ref / 2**20:.1f} MiB ({time_ref:.2f}s), "
+          f"streamed {memory_stream / 2**20:.1f} MiB ({time_stream:.2f}s)")
+
+
+if __name__ == '__main__':
+    main()
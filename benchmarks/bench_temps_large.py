@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark temps_plot.py on very long series and its startup time.
+
+  * startup: wall time of `temps_plot.py --help`, against importing the
+    module plus the matplotlib modules it used to import at the top
+  * render: a --points series (minute readings with daily and seasonal
+    cycles plus a few spikes) drawn at full resolution and downsampled
+    with LTTB. Both charts must show the same y range, and the spikes must
+    survive downsampling.
+  * the old plot_temps (pyplot, a label per point) on --old-points points,
+    as it cannot cope with the full series
+
+Usage:
+  python3 benchmarks/bench_temps_large.py --points 10000000
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import numpy as np  # noqa: E402
+
+from bench_temps_plot import legacy_plot_temps  # noqa: E402
+from temps_plot import ChartRenderer, lttb  # noqa: E402
+
+SCRIPT = os.path.join(REPO_DIR, 'temps_plot.py')
+
+
+def best_of(cmd, runs=5):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, cwd=REPO_DIR)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def readings(points, seed=2):
+    rng = np.random.default_rng(seed)
+    minutes = np.arange(points)
+    y = 10 + 8 * np.sin(minutes * 2 * np.pi / 1440) + 12 * np.sin(minutes * 2 * np.pi / 525600)
+    y += rng.normal(0, 0.5, points)
+    spikes = rng.choice(points, 5, replace=False)
+    y[spikes] += np.array([25, -30, 20, -25, 35])
+    return y, spikes
+
+
+class FullResolution(ChartRenderer):
+    def width_px(self):
+        return sys.maxsize   # never downsample
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark long-series rendering and startup of temps_plot.py')
+    parser.add_argument('--points', type=int, default=10_000_000)
+    parser.add_argument('--old-points', type=int, default=2000, help='Points drawn with the old plot_temps')
+    args = parser.parse_args()
+
+    help_time = best_of([sys.executable, SCRIPT, '--help'])
+    eager_time = best_of([sys.executable, '-c', 'import temps_plot, matplotlib.figure, matplotlib.backends.backend_agg'])
+    print(f"startup: --help {help_time * 1000:.0f} ms, with matplotlib imported eagerly "
+          f"{eager_time * 1000:.0f} ms ({eager_time / help_time:.1f}x)")
+
+    y, spikes = readings(args.points)
+    renderer = ChartRenderer()
+    kept, lttb_time = timed(lambda: lttb(np.arange(len(y)), y, renderer.width_px()))
+    assert set(spikes) <= set(kept.tolist()), 'a spike was lost'
+    with tempfile.TemporaryDirectory() as tmp:
+        _, fast = timed(lambda: renderer.render(y, os.path.join(tmp, 'lttb.png')))
+        fast_ylim = renderer.ax.get_ylim()
+        full = FullResolution()
+        _, slow = timed(lambda: full.render(y, os.path.join(tmp, 'full.png')))
+        assert np.allclose(fast_ylim, full.ax.get_ylim()), (fast_ylim, full.ax.get_ylim())
+        old = y[:args.old_points]
+        _, old_time = timed(lambda: legacy_plot_temps(old, os.path.join(tmp, 'old.png')))
+        print(f"{args.points:,} points: LTTB to {len(kept):,} points in {lttb_time * 1000:.0f} ms, "
+              f"all {len(spikes)} spikes kept")
+        print(f"  render with LTTB      {fast:>7.2f}s")
+        print(f"  render every point    {slow:>7.2f}s  ({slow / fast:.1f}x slower)")
+        print(f"  old plot_temps on {args.old_points:,} points: {old_time:.2f}s "
+              f"({old_time / args.old_points * 1000:.2f} ms per point)")
+
+
+if __name__ == '__main__':
+    main()
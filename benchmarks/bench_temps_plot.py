@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark batch chart rendering in temps_plot.py.
+
+Writes --series random temperature series to a CSV file and renders them:
+
+  * pyplot: the old plot_temps, a new pyplot figure per chart that is never
+    closed (only the first --legacy series, it slows down as figures pile up)
+  * batch: render_batch with one process and one reused figure
+  * pool: render_batch with --jobs worker processes
+
+Each mode runs in its own process. Throughput is reported in charts per
+second. Peak RSS is sampled halfway and at the end of the run: it keeps
+growing for pyplot and stays flat for batch.
+
+Usage:
+  python3 benchmarks/bench_temps_plot.py --series 1000 --jobs 4
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from temps_plot import read_series, render_batch  # noqa: E402
+
+
+def legacy_plot_temps(temps, out_path):
+    # plot_temps before the Figure API
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    days = [f"Day {i+1}" for i in range(len(temps))]
+    plt.figure(figsize=(8, 4.5))
+    plt.plot(days, temps, marker='o', linestyle='-', color='tab:blue')
+    plt.title('5-Day Temperatures')
+    plt.xlabel('Day')
+    plt.ylabel('Temperature')
+    plt.grid(True, linestyle='--', alpha=0.5)
+    for i, t in enumerate(temps):
+        plt.text(i, t, f"{t:.1f}", ha='center', va='bottom')
+    plt.tight_layout()
+    plt.savefig(out_path, dpi=150)
+
+
+def write_series(path, count, points, seed=11):
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('station,' + ','.join(f't{i + 1}' for i in range(points)) + '\n')
+        for n in range(count):
+            base = rng.uniform(-10, 30)
+            f.write(f'station_{n:05d},' + ','.join(f'{base + rng.gauss(0, 3):.1f}' for _ in range(points)) + '\n')
+
+
+def peak_mib():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(mode, path, out_dir, limit, jobs):
+    series = list(read_series(path))[:limit] if mode == 'pyplot' else read_series(path)
+    samples = {}
+
+    def sampled(items, total):
+        for n, item in enumerate(items, 1):
+            yield item
+            if n in (total // 2, total):
+                samples['half' if n == total // 2 else 'end'] = peak_mib()
+
+    start = time.perf_counter()
+    if mode == 'pyplot':
+        for name, temps in sampled(series, len(series)):
+            legacy_plot_temps(temps, os.path.join(out_dir, name + '.png'))
+        count = len(series)
+    else:
+        count = render_batch(sampled(series, limit), out_dir, jobs=1 if mode == 'batch' else jobs)
+    elapsed = time.perf_counter() - start
+    workers = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    print(json.dumps(dict(samples, charts=count, seconds=elapsed, workers=workers)))
+
+
+def run_mode(mode, path, out_dir, limit, jobs):
+    cmd = [sys.executable, os.path.abspath(__file__), '--child', mode, '--input', path, '--out-dir', out_dir,
+           '--limit', str(limit), '--jobs', str(jobs)]
+    return json.loads(subprocess.run(cmd, check=True, capture_output=True, text=True).stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batch chart rendering')
+    parser.add_argument('--series', type=int, default=1000)
+    parser.add_argument('--points', type=int, default=7, help='Values per series')
+    parser.add_argument('--legacy', type=int, default=300, help='Series rendered with the old pyplot code')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--input', help=argparse.SUPPRESS)
+    parser.add_argument('--out-dir', help=argparse.SUPPRESS)
+    parser.add_argument('--limit', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.child, args.input, args.out_dir, args.limit, args.jobs)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'series.csv')
+        write_series(path, args.series, args.points)
+        print(f"{args.series:,} series of {args.points} values, {os.cpu_count()} CPU(s)")
+        runs = [('pyplot', args.legacy, 1), ('batch', args.series, 1), ('pool', args.series, args.jobs)]
+        results = {}
+        for mode, limit, jobs in runs:
+            out_dir = os.path.join(tmp, mode)
+            os.makedirs(out_dir)
+            results[mode] = result = run_mode(mode, path, out_dir, limit, jobs)
+            assert result['charts'] == limit == len(os.listdir(out_dir)), (mode, result)
+            rate = result['charts'] / result['seconds']
+            workers = f", workers {result['workers']:.0f} MiB" if mode == 'pool' else ''
+            print(f"  {mode:<7} {result['charts']:>6,} charts  {rate:>6.1f} charts/s  "
+                  f"peak RSS {result['half']:>5.0f} MiB halfway, {result['end']:>5.0f} MiB at the end{workers}"
+                  + (f"  ({jobs} workers)" if mode == 'pool' else ''))
+        legacy_rate = results['pyplot']['charts'] / results['pyplot']['seconds']
+        batch_rate = results['batch']['charts'] / results['batch']['seconds']
+        pool_rate = results['pool']['charts'] / results['pool']['seconds']
+        print(f"batch is {batch_rate / legacy_rate:.1f}x the pyplot rate, pool {pool_rate / legacy_rate:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark unique_cities.py on large generated GST reports.
+
+Writes --files CSV reports of --rows rows each, with the header and rows of
+Test.csv and --cities distinct ship-to cities. Each reading mode runs in
+its own process, so peak RSS is measured per mode:
+
+  * old: pd.read_csv of every column of every file, one file after another
+  * chunked: only the city column, streamed in chunks, one process
+  * parallel: the same, one worker process per file
+
+All modes must find the same cities. Reports are regenerated unless
+--keep-dir already holds them.
+
+Usage:
+  python3 benchmarks/bench_unique_cities.py --files 4 --rows 250000
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+import pandas as pd  # noqa: E402
+
+from unique_cities import collect, find_ship_to_city_column  # noqa: E402
+
+CITY_MARK = '\x00CITY\x00'
+
+
+def render(row):
+    buf = io.StringIO()
+    csv.writer(buf, lineterminator='\n').writerow(row)
+    return buf.getvalue()
+
+
+def row_templates(sample=os.path.join(REPO_DIR, 'Test.csv')):
+    """The CSV header and each sample row with a marker in place of the city"""
+    with open(sample, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        rows = list(reader)
+    city = header.index('Ship To City')
+    for row in rows:
+        row[city] = CITY_MARK
+    return render(header), [render(row) for row in rows]
+
+
+def write_reports(directory, files, rows, cities, seed=3):
+    rng = random.Random(seed)
+    names = [f'CITY {i:04d}' for i in range(cities)]
+    header, templates = row_templates()
+    paths = []
+    for n in range(files):
+        path = os.path.join(directory, f'report_{n}.csv')
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(header)
+            for start in range(0, rows, 10000):
+                f.write(''.join(rng.choice(templates).replace(CITY_MARK, rng.choice(names))
+                                for _ in range(min(10000, rows - start))))
+        paths.append(path)
+    return paths
+
+
+def read_old(paths):
+    # unique_cities.py before chunked reading
+    values = set()
+    for path in paths:
+        df = pd.read_csv(path)
+        col = find_ship_to_city_column(df)
+        values.update(pd.Series(df[col].dropna().unique()).tolist())
+    return values
+
+
+def child(mode, paths):
+    start = time.perf_counter()
+    if mode == 'old':
+        values = read_old(paths)
+    else:
+        values = set()
+        for _, _, found, _ in collect(paths, jobs=1 if mode == 'chunked' else None):
+            values |= found
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux; the parallel mode's workers count as children
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    print(json.dumps({'seconds': elapsed, 'peak_kib': peak, 'cities': sorted(values)}))
+
+
+def run_mode(mode, paths):
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode] + paths,
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark unique_cities.py on large CSVs')
+    parser.add_argument('--files', type=int, default=4)
+    parser.add_argument('--rows', type=int, default=250000, help='Rows per file')
+    parser.add_argument('--cities', type=int, default=800)
+    parser.add_argument('--keep-dir', help='Write the reports here and reuse them on later runs')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('paths', nargs='*', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.child, args.paths)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.keep_dir or tmp
+        os.makedirs(directory, exist_ok=True)
+        paths = [os.path.join(directory, f'report_{n}.csv') for n in range(args.files)]
+        if not all(os.path.exists(p) for p in paths):
+            start = time.perf_counter()
+            paths = write_reports(directory, args.files, args.rows, args.cities)
+            print(f"generated {args.files} reports in {time.perf_counter() - start:.1f}s")
+        size = sum(os.path.getsize(p) for p in paths)
+        print(f"{args.files} files x {args.rows:,} rows, {size / 2**20:,.0f} MiB, {args.cities} cities")
+
+        results = {mode: run_mode(mode, paths) for mode in ('old', 'chunked', 'parallel')}
+    old = results['old']
+    for mode, result in results.items():
+        assert result['cities'] == old['cities'], mode
+        print(f"  {mode:<9} {result['seconds']:>6.2f}s  peak RSS {result['peak_kib'] / 1024:>7,.0f} MiB  "
+              f"{old['seconds'] / result['seconds']:>5.1f}x faster, "
+              f"{old['peak_kib'] / result['peak_kib']:>5.1f}x less memory than old")
+    print(f"all modes found the same {len(old['cities'])} cities")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of /webhook body handling on recorded sample payloads.
+
+Compares the old handler (HMAC over request.data, a second decode through
+request.get_json and an f-string of the whole payload) with the current one
+(one get_data buffer, decode_json, summary line). Both run inline through
+the Flask test client with stdout discarded. --commits inflates the push
+sample to model the large payloads GitHub sends for big pushes.
+
+Usage:
+  python3 benchmarks/bench_webhook_body.py --iterations 300 --commits 1000
+"""
+import argparse
+import contextlib
+import hashlib
+import hmac
+import io
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+SECRET = 'bench-secret'
+
+
+def load_samples(commits):
+    samples = {}
+    for event in ('push', 'pull_request'):
+        with open(os.path.join(BENCH_DIR, 'fixtures', f'webhook_{event}.json'), 'rb') as f:
+            samples[event] = json.load(f)
+    push = samples['push']
+    if commits > len(push['commits']):
+        template = push['commits']
+        push['commits'] = [dict(template[i % len(template)], id=f"{i:040x}") for i in range(commits)]
+    return {event: json.dumps(payload).encode() for event, payload in samples.items()}
+
+
+def legacy_app():
+    from flask import Flask, request, abort
+
+    legacy = Flask('legacy')
+
+    @legacy.route('/webhook', methods=['POST'])
+    def webhook():
+        secret = os.environ.get('WEBHOOK_SECRET')
+        if secret:
+            signature = request.headers.get('X-Hub-Signature-256', '')
+            mac = hmac.new(secret.encode(), msg=request.data, digestmod=hashlib.sha256)
+            expected = 'sha256=' + mac.hexdigest()
+            if not hmac.compare_digest(expected, signature):
+                abort(401, "Invalid signature")
+        evt = request.headers.get('X-GitHub-Event', 'unknown')
+        payload = request.get_json(silent=True)
+        print(f"Received event {evt}: {payload}")
+        return '', 204
+
+    return legacy
+
+
+def run(client, event, body, iterations):
+    signature = 'sha256=' + hmac.new(SECRET.encode(), body, hashlib.sha256).hexdigest()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(iterations):
+            resp = client.post('/webhook', data=body, content_type='application/json', headers={
+                'X-GitHub-Event': event, 'X-GitHub-Delivery': f'{event}-{i}-{time.perf_counter_ns()}',
+                'X-Hub-Signature-256': signature})
+            assert resp.status_code == 204, resp.status_code
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark webhook body handling')
+    parser.add_argument('--iterations', type=int, default=300)
+    parser.add_argument('--commits', type=int, default=1000, help='Commits in the inflated push sample')
+    args = parser.parse_args()
+
+    os.environ['WEBHOOK_SECRET'] = SECRET
+    os.environ['WEBHOOK_WORKERS'] = '0'
+    os.environ['WEBHOOK_JOURNAL'] = ''
+    import app as app_module
+    import webhook_events
+
+    print(f"JSON decoder: {'orjson' if webhook_events.orjson is not None else 'json'}")
+    old_client = legacy_app().test_client()
+    new_client = app_module.app.test_client()
+    for event, body in load_samples(args.commits).items():
+        old = run(old_client, event, body, args.iterations)
+        new = run(new_client, event, body, args.iterations)
+        print(f"{event:<13} {len(body) / 1024:>8.1f} KiB | old {old * 1000:>7.3f} ms | "
+              f"new {new * 1000:>7.3f} ms | {old / new:>5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Burst load test for POST /webhook.
+
+Serves app.py from a local threaded WSGI server, swaps in a handler that
+takes --handler-ms to run, fires a burst of signed deliveries from many
+client threads and reports acknowledgement latency percentiles. Run it with
+--workers 0 to see the old behaviour, where the handler ran on the request
+thread.
+
+Usage:
+  python3 benchmarks/load_webhook.py --requests 400 --concurrency 8 --handler-ms 100
+"""
+import argparse
+import hashlib
+import hmac
+import http.client
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SECRET = 'load-test-secret'
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure webhook acknowledgement latency under a burst')
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--handler-ms', type=float, default=100.0, help='Simulated handler work per event')
+    parser.add_argument('--workers', type=int, default=4, help='WEBHOOK_WORKERS (0 = handle inline)')
+    parser.add_argument('--queue-size', type=int, default=10000)
+    args = parser.parse_args()
+
+    os.environ['WEBHOOK_SECRET'] = SECRET
+    os.environ['WEBHOOK_WORKERS'] = str(args.workers)
+    os.environ['WEBHOOK_QUEUE_SIZE'] = str(args.queue_size)
+    import app as app_module
+    from werkzeug.serving import make_server
+
+    handled = []
+
+    def slow_handler(event):
+        time.sleep(args.handler_ms / 1000.0)
+        handled.append(event['delivery'])
+
+    app_module.WEBHOOK_QUEUE.handler = slow_handler
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_port
+
+    body = json.dumps({'action': 'opened', 'number': 1, 'repository': {'full_name': 'o/r'}}).encode()
+    signature = 'sha256=' + hmac.new(SECRET.encode(), body, hashlib.sha256).hexdigest()
+    local = threading.local()
+
+    def send(i):
+        conn = getattr(local, 'conn', None)
+        if conn is None:
+            conn = local.conn = http.client.HTTPConnection('127.0.0.1', port)
+        headers = {'Content-Type': 'application/json', 'X-GitHub-Event': 'pull_request',
+                   'X-GitHub-Delivery': f'delivery-{i}', 'X-Hub-Signature-256': signature}
+        start = time.perf_counter()
+        conn.request('POST', '/webhook', body=body, headers=headers)
+        resp = conn.getresponse()
+        resp.read()
+        return resp.status, time.perf_counter() - start
+
+    began = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        results = list(pool.map(send, range(args.requests)))
+    elapsed = time.perf_counter() - began
+
+    drain_start = time.perf_counter()
+    app_module.WEBHOOK_QUEUE.close()
+    drain = time.perf_counter() - drain_start
+    server.shutdown()
+
+    latencies = [lat * 1000 for _, lat in results]
+    statuses = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    print(f"workers={args.workers} requests={args.requests} concurrency={args.concurrency} "
+          f"handler={args.handler_ms}ms statuses={statuses}")
+    print(f"ack latency ms: p50={statistics.median(latencies):.2f} "
+          f"p95={percentile(latencies, 95):.2f} p99={percentile(latencies, 99):.2f} "
+          f"max={max(latencies):.2f}")
+    print(f"burst took {elapsed:.2f}s ({args.requests / elapsed:,.0f} req/s); "
+          f"drained remaining queue in {drain:.2f}s; handled {len(handled)} events")
+    print('queue stats:', app_module.WEBHOOK_QUEUE.stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark suite, fully offline, with a local baseline.
+
+Scenarios:
+
+  * app.py and game_server.py through Flask's test client, one request at a
+    time: POST /submit_score, GET /scores, signed POST /webhook and GET /jwt
+    (with a throwaway RSA key)
+  * the same endpoints served by a local threaded WSGI server and hit by
+    --concurrency client threads on keep-alive connections
+  * SAPPressScraper fetching, parsing and extracting the pages of a local
+    stub catalog, and parsing one large catalog page
+  * unique_cities.py on generated GST reports
+
+Every scenario runs --rounds times and the round with the highest
+throughput is kept, which filters out most of the noise of a busy machine.
+It reports throughput (operations per second), p50/p95/p99 latency in ms
+and the number of errors. Results go to --output as JSON.
+When --baseline exists, each scenario is compared with it: a throughput
+drop or a latency rise of more than --threshold (a fraction) in any of the
+--gate metrics is a regression, and the script exits with status 1.
+When it does not, the results are saved as the baseline and nothing is
+gated; --save-baseline overwrites an existing one.
+
+Numbers are only comparable on the same machine with the same options, so
+no baseline is shipped: the run configuration, CPU count included, is
+stored with the results, and a baseline recorded with a different one is
+refused with an "incompatible baseline" error before anything runs.
+
+Usage:
+  python3 benchmarks/run_all.py
+  python3 benchmarks/run_all.py --only http --threshold 0.1
+  python3 benchmarks/run_all.py --save-baseline
+"""
+import argparse
+import contextlib
+import hashlib
+import hmac
+import http.client
+import itertools
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from bench_github_auth import write_key  # noqa: E402
+from bench_unique_cities import write_reports  # noqa: E402
+from load_webhook import percentile  # noqa: E402
+from stub_catalog import StubCatalog, page_path, render_page  # noqa: E402
+
+BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+SECRET = 'benchmark-secret'
+WEBHOOK_BODY = os.path.join(BENCH_DIR, 'fixtures', 'webhook_push.json')
+GROUPS = ('client', 'http', 'scraper', 'cities')
+# metrics where a larger value is worse
+HIGHER_IS_WORSE = {'p50_ms', 'p95_ms', 'p99_ms'}
+
+
+def summarize(latencies, elapsed, errors=0, ops=None):
+    """Throughput and latency percentiles of one scenario; latencies are in seconds"""
+    ms = [lat * 1000 for lat in latencies]
+    ops = len(latencies) if ops is None else ops
+    return {
+        'n': len(latencies),
+        'errors': errors,
+        'throughput': round(ops / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(ms, 50), 3),
+        'p95_ms': round(percentile(ms, 95), 3),
+        'p99_ms': round(percentile(ms, 99), 3),
+    }
+
+
+def best_round(scenario, rounds):
+    """Run ``scenario`` ``rounds`` times and keep the result with the best throughput"""
+    results = [scenario() for _ in range(max(1, rounds))]
+    best = max(results, key=lambda r: r['throughput'])
+    best['errors'] = sum(r['errors'] for r in results)
+    return best
+
+
+class Requests:
+    """Request bodies and headers shared by the client and HTTP scenarios"""
+
+    def __init__(self):
+        with open(WEBHOOK_BODY, 'rb') as f:
+            self.webhook_body = f.read()
+        self.signature = 'sha256=' + hmac.new(SECRET.encode(), self.webhook_body, hashlib.sha256).hexdigest()
+        self._deliveries = itertools.count()
+
+    def score(self, i):
+        return json.dumps({'name': f'player_{i % 500}', 'score': (i * 7919) % 100000}).encode()
+
+    def webhook_headers(self, i):
+        # a new delivery id every time, or the dedup cache answers without queueing
+        return {'Content-Type': 'application/json', 'X-GitHub-Event': 'push',
+                'X-GitHub-Delivery': f'bench-{next(self._deliveries)}', 'X-Hub-Signature-256': self.signature}
+
+    def calls(self, server):
+        """(scenario, method, path, body, headers, ok statuses) per endpoint
+
+        Bodies and headers may be functions of the request number.
+        """
+        json_headers = {'Content-Type': 'application/json'}
+        calls = [('submit_score', 'POST', '/submit_score', self.score, json_headers, (200, 201)),
+                 ('scores', 'GET', '/scores', None, {}, (200,))]
+        if server == 'app':
+            calls += [('webhook', 'POST', '/webhook', lambda i: self.webhook_body, self.webhook_headers, (204,)),
+                      ('jwt', 'GET', '/jwt', None, {}, (200,))]
+        return calls
+
+
+def resolve(value, i):
+    return value(i) if callable(value) else value
+
+
+def run_client(app, method, path, body, headers, ok, requests):
+    client = app.test_client()
+    latencies, errors = [], 0
+    began = time.perf_counter()
+    for i in range(requests):
+        start = time.perf_counter()
+        resp = client.open(path, method=method, data=resolve(body, i), headers=resolve(headers, i))
+        resp.get_data()
+        latencies.append(time.perf_counter() - start)
+        errors += resp.status_code not in ok
+    return summarize(latencies, time.perf_counter() - began, errors)
+
+
+def run_http(port, method, path, body, headers, ok, requests, concurrency):
+    local = threading.local()
+
+    def send(i):
+        conn = getattr(local, 'conn', None)
+        if conn is None:
+            conn = local.conn = http.client.HTTPConnection('127.0.0.1', port)
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body=resolve(body, i), headers=resolve(headers, i))
+            resp = conn.getresponse()
+            resp.read()
+            status = resp.status
+        except (OSError, http.client.HTTPException):
+            local.conn = None
+            conn.close()
+            status = None
+        return status in ok, time.perf_counter() - start
+
+    began = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(send, range(requests)))
+    elapsed = time.perf_counter() - began
+    return summarize([lat for _, lat in results], elapsed, sum(1 for good, _ in results if not good))
+
+
+@contextlib.contextmanager
+def serving(app):
+    from werkzeug.serving import make_server
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield server.server_port
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def wait_for_queue(queue, timeout=60):
+    deadline = time.monotonic() + timeout
+    while queue.stats()['depth'] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def web_scenarios(tmp, groups, args):
+    """The client and http groups, against app.py and game_server.py"""
+    key_path = os.path.join(tmp, 'app-private-key.pem')
+    write_key(key_path)
+    os.environ.update({
+        'WEBHOOK_SECRET': SECRET,
+        'WEBHOOK_JOURNAL': os.path.join(tmp, 'webhook_events.jsonl'),
+        'WEBHOOK_QUEUE_SIZE': str(args.requests * 4),
+        'GITHUB_APP_ID': '12345',
+        'GITHUB_PRIVATE_KEY_PATH': key_path,
+        'SCORES_BACKEND': 'json',
+    })
+    # app.py keeps high_scores.json in the working directory
+    os.chdir(tmp)
+    import app as app_module
+    # game_server.py keeps its JSON board next to the code, so give it a database here
+    os.environ.update({'SCORES_BACKEND': 'sqlite', 'SCORES_DB': os.path.join(tmp, 'game_scores.db')})
+    import game_server
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    reqs = Requests()
+    results = {}
+    # the webhook handler logs every event
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for server, module in (('app', app_module), ('game_server', game_server)):
+            calls = reqs.calls(server)
+            if 'client' in groups:
+                for name, *call in calls:
+                    results[f'client.{server}.{name}'] = best_round(
+                        lambda: run_client(module.app, *call, args.requests), args.rounds)
+                    wait_for_queue(app_module.WEBHOOK_QUEUE)
+            if 'http' in groups:
+                with serving(module.app) as port:
+                    for name, *call in calls:
+                        results[f'http.{server}.{name}'] = best_round(
+                            lambda: run_http(port, *call, args.requests, args.concurrency), args.rounds)
+                        wait_for_queue(app_module.WEBHOOK_QUEUE)
+        app_module.WEBHOOK_QUEUE.close()
+    if app_module.WEBHOOK_JOURNAL is not None:
+        app_module.WEBHOOK_JOURNAL.close()
+    app_module.LEADERBOARD.close()
+    game_server.LEADERBOARD.close()
+    return results
+
+
+def scraper_scenarios(args):
+    from bs4 import BeautifulSoup
+
+    import sap_press_scraper
+
+    def crawl():
+        latencies, errors = [], 0
+        began = time.perf_counter()
+        for page in range(1, args.pages + 1):
+            start = time.perf_counter()
+            soup = scraper.fetch_page(base_url + page_path(page, 'query'))
+            books = scraper.extract_books_from_page(soup) if soup is not None else []
+            latencies.append(time.perf_counter() - start)
+            errors += len(books) != args.books_per_page
+        return summarize(latencies, time.perf_counter() - began, errors)
+
+    def parse():
+        latencies, errors = [], 0
+        began = time.perf_counter()
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            books = scraper.extract_books_from_page(BeautifulSoup(big, sap_press_scraper.HTML_PARSER))
+            latencies.append(time.perf_counter() - start)
+            errors += len(books) != args.big_page_books
+        return summarize(latencies, time.perf_counter() - began, errors)
+
+    results = {}
+    catalog = StubCatalog(pages=args.pages, books_per_page=args.books_per_page)
+    base_url = catalog.start()
+    try:
+        scraper = sap_press_scraper.SAPPressScraper(base_url=base_url, rate=0)
+        scraper.fetch_page(base_url + '/')   # opens the pooled connection
+        results['scraper.stub_pages'] = best_round(crawl, args.rounds)
+    finally:
+        catalog.shutdown()
+    big = render_page(1, 1, args.big_page_books)
+    results['scraper.parse_large_page'] = best_round(parse, args.rounds)
+    return results
+
+
+def cities_scenarios(tmp, args):
+    from unique_cities import collect
+
+    def run():
+        latencies, errors = [], 0
+        began = time.perf_counter()
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            found = set()
+            for _, _, values, _ in collect(paths, jobs=1):
+                found |= values
+            latencies.append(time.perf_counter() - start)
+            errors += len(found) != args.cities
+        # throughput in rows per second
+        rows = args.city_files * args.city_rows * args.iterations
+        return summarize(latencies, time.perf_counter() - began, errors, ops=rows)
+
+    paths = write_reports(tmp, args.city_files, args.city_rows, cities=args.cities)
+    return {'cities.unique_cities': best_round(run, args.rounds)}
+
+
+def compare(results, baseline, threshold, gates):
+    """Regressions of ``results`` against ``baseline`` as printable lines"""
+    regressions = []
+    for name, current in sorted(results.items()):
+        before = baseline.get(name)
+        if before is None:
+            continue
+        for metric in gates:
+            old, new = before.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = new / old - 1
+            worse = change > threshold if metric in HIGHER_IS_WORSE else -change > threshold
+            if worse:
+                regressions.append(f"{name}: {metric} {old:,.3f} -> {new:,.3f} ({change:+.0%})")
+    return regressions
+
+
+def print_results(results, baseline):
+    print(f"{'scenario':<32} {'ops/s':>11} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>6}  vs baseline")
+    for name, r in sorted(results.items()):
+        before = baseline.get(name)
+        delta = f"{r['throughput'] / before['throughput'] - 1:+.0%} ops/s" if before and before['throughput'] else ''
+        print(f"{name:<32} {r['throughput']:>11,.1f} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+              f"{r['p99_ms']:>9.2f} {r['errors']:>6}  {delta}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the offline benchmark suite and compare with a baseline')
+    parser.add_argument('--output', '-o', default='benchmark_results.json', help='Where results are written')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='Write the results to --baseline')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Allowed relative regression, e.g. 0.25 for 25%% (default 0.25)')
+    parser.add_argument('--gate', default='throughput,p95_ms',
+                        help='Comma-separated metrics checked against the baseline (default throughput,p95_ms)')
+    parser.add_argument('--only', action='append', choices=GROUPS, help='Run only these groups (repeatable)')
+    parser.add_argument('--requests', type=int, default=1000, help='Requests per endpoint and mode')
+    parser.add_argument('--concurrency', type=int, default=8, help='Client threads in the http group')
+    parser.add_argument('--pages', type=int, default=30, help='Stub catalog pages scraped')
+    parser.add_argument('--books-per-page', type=int, default=20)
+    parser.add_argument('--big-page-books', type=int, default=3000, help='Books on the large page parsed')
+    parser.add_argument('--city-files', type=int, default=2)
+    parser.add_argument('--city-rows', type=int, default=200_000, help='Rows per generated GST report')
+    parser.add_argument('--cities', type=int, default=800)
+    parser.add_argument('--iterations', type=int, default=3, help='Runs of the parse and unique_cities scenarios')
+    parser.add_argument('--rounds', type=int, default=3, help='Repeats of every scenario; the fastest is kept')
+    args = parser.parse_args()
+
+    groups = args.only or list(GROUPS)
+    gates = [g.strip() for g in args.gate.split(',') if g.strip()]
+    output = os.path.abspath(args.output)
+    baseline_path = os.path.abspath(args.baseline)
+    config = {name: value for name, value in sorted(vars(args).items())
+              if name not in ('output', 'baseline', 'save_baseline', 'threshold', 'gate', 'only')}
+    config.update(python=platform.python_version(), cpus=os.cpu_count())
+
+    baseline = {}
+    if os.path.exists(baseline_path) and not args.save_baseline:
+        with open(baseline_path, encoding='utf-8') as f:
+            stored = json.load(f)
+        if stored.get('config') != config:
+            changed = sorted(k for k in set(config) | set(stored.get('config', {}))
+                             if config.get(k) != stored.get('config', {}).get(k))
+            sys.exit(f"incompatible baseline {baseline_path}: recorded with different settings "
+                     f"({', '.join(changed)}); rerun with the same options or with --save-baseline")
+        baseline = stored['results']
+
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            if 'client' in groups or 'http' in groups:
+                results.update(web_scenarios(tmp, groups, args))
+        finally:
+            os.chdir(cwd)
+        if 'scraper' in groups:
+            results.update(scraper_scenarios(args))
+        if 'cities' in groups:
+            results.update(cities_scenarios(tmp, args))
+
+    print_results(results, baseline)
+
+    report = {'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'config': config, 'results': results}
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write('\n')
+    print(f"results written to {output}")
+    if args.save_baseline or not os.path.exists(baseline_path):
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"baseline saved to {baseline_path}")
+
+    failed = [f"{name}: {r['errors']} errors" for name, r in sorted(results.items()) if r['errors']]
+    failed += compare(results, baseline, args.threshold, gates)
+    if failed:
+        print(f"FAILED ({len(failed)}, threshold {args.threshold:.0%}):")
+        for line in failed:
+            print('  ' + line)
+        sys.exit(1)
+    if baseline:
+        print(f"no regressions beyond {args.threshold:.0%} in {', '.join(gates)}")
+
+
+if __name__ == '__main__':
+    main()
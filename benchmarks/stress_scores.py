@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress test for the leaderboard backends.
+
+Starts several worker processes, each importing app.py the way a WSGI worker
+would, and has every process submit scores through the Flask test client at
+the same time. Afterwards it checks that every submission can be found.
+
+Usage:
+  python3 benchmarks/stress_scores.py --workers 8 --per-worker 500
+  python3 benchmarks/stress_scores.py --backend json   # shows lost writes
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+
+def worker(index, count, start_event):
+    import app
+
+    client = app.app.test_client()
+    start_event.wait()
+    for i in range(count):
+        resp = client.post('/submit_score', json={'name': f"w{index}-{i}", 'score': index * count + i})
+        assert resp.status_code == 201, resp.status_code
+    app.LEADERBOARD.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that concurrent workers lose no score submissions')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 4)
+    parser.add_argument('--per-worker', type=int, default=500)
+    parser.add_argument('--backend', choices=['sqlite', 'json'], default='sqlite')
+    args = parser.parse_args()
+
+    total = args.workers * args.per_worker
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        os.environ['SCORES_BACKEND'] = args.backend
+        os.environ['SCORES_DB'] = os.path.join(tmp, 'scores.db')
+        # make the board big enough to hold every submission
+        os.environ['LEADERBOARD_SIZE'] = str(total)
+
+        ctx = multiprocessing.get_context('spawn')
+        start_event = ctx.Event()
+        procs = [ctx.Process(target=worker, args=(i, args.per_worker, start_event))
+                 for i in range(args.workers)]
+        for p in procs:
+            p.start()
+        time.sleep(1.0)  # let every worker finish importing
+        began = time.perf_counter()
+        start_event.set()
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - began
+        if any(p.exitcode for p in procs):
+            sys.exit('a worker failed')
+
+        from leaderboard import open_leaderboard
+        board = open_leaderboard(os.path.join(tmp, 'high_scores.json'), backend=args.backend,
+                                 db_path=os.environ['SCORES_DB'], size=total, flush_interval=None)
+        stored = {entry['name'] for entry in board.entries()}
+        board.close()
+
+    lost = total - len(stored)
+    print(f"backend={args.backend} workers={args.workers} submitted={total} "
+          f"stored={len(stored)} lost={lost} ({total / elapsed:,.0f} submissions/s)")
+    if lost:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
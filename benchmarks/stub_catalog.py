@@ -0,0 +1,151 @@
+"""
+Local stand-in for the SAP Press catalog used by the scraper benchmarks.
+
+Serves ``/`` and ``/?page=N`` (``/page/N/`` with ``style='path'``) with
+``books_per_page`` product tiles shaped like the real site
+(``/<slug>_<id>/`` links with a description paragraph). Pages past
+``pages`` come back empty. ``pager=True`` adds ``rel="next"`` links, and
+``soft_404=True`` answers unknown URLs with the homepage instead of 404. Every response can be delayed by
+``latency`` seconds, and every ``fail_every``-th request answers 429 with
+``Retry-After: 0`` to exercise the scraper's retries. Pages carry an
+``ETag`` and ``Last-Modified`` and answer matching conditional requests
+with 304; ``not_modified`` and ``bytes_sent`` count what was saved.
+"""
+import hashlib
+import re
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+TOPICS = ['SAP S/4HANA Finance', 'ABAP Programming', 'Machine Learning with SAP', 'SAP Fiori Design',
+          'SAP BTP Integration', 'Generative AI for SAP', 'Warehouse Management', 'SAP Analytics Cloud']
+
+
+def book_tiles(page, books_per_page):
+    tiles = []
+    for i in range(books_per_page):
+        book_id = 1000 + (page - 1) * books_per_page + i
+        topic = TOPICS[book_id % len(TOPICS)]
+        slug = topic.lower().replace(' ', '-').replace('/', '')
+        tiles.append(
+            f'<div class="product"><a href="/{slug}_{book_id}/">{topic}, Volume {book_id}</a>'
+            f'<p>A practical guide to {topic}: configuration, best practices and worked examples '
+            f'for consultants and developers (edition {book_id % 7 + 1}).</p>'
+            f'<a href="/{slug}_{book_id}/">More about the book</a></div>')
+    return tiles
+
+
+def page_path(page, style):
+    return f'/?page={page}' if style == 'query' else f'/page/{page}/'
+
+
+def render_page(page, pages, books_per_page, style='query', pager=False):
+    tiles = book_tiles(page, books_per_page) if page <= pages else []
+    head = nav = ''
+    if pager and page < pages:
+        head = f'<link rel="next" href="{page_path(page + 1, style)}">'
+        nav = f'<div class="pagination"><a class="next" href="{page_path(page + 1, style)}">Next</a></div>'
+    return ('<!DOCTYPE html><html><head><title>Catalog</title>' + head + '</head><body>'
+            '<nav><a href="/">Home</a> <a href="/contact/">Contact</a></nav>'
+            f'<main>{"".join(tiles)}</main>{nav}</body></html>').encode()
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # the default of 5 drops bursts of new connections
+
+
+class StubCatalog:
+    """Threaded HTTP server serving a fake paginated catalog"""
+
+    def __init__(self, pages=30, books_per_page=20, latency=0.0, fail_every=0,
+                 style='query', pager=False, soft_404=False):
+        self.pages = pages
+        self.style = style
+        self.pager = pager
+        self.soft_404 = soft_404
+        self.books_per_page = books_per_page
+        self.latency = latency
+        self.fail_every = fail_every
+        self.requests = 0
+        self.failures = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+        self.last_modified = formatdate(time.time(), usegmt=True)
+        self._lock = threading.Lock()
+        self._server = None
+
+    def start(self) -> str:
+        catalog = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive, so pooled connections get reused
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                catalog._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = _Server(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f'http://127.0.0.1:{self._server.server_port}'
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def _page_number(self, path):
+        url = urlparse(path)
+        if url.path == '/' and not url.query:
+            return 1
+        if self.style == 'query':
+            query = parse_qs(url.query)
+            if url.path == '/' and 'page' in query:
+                return int(query['page'][0])
+            return None
+        m = re.fullmatch(r'/page/(\d+)/', url.path)
+        return int(m.group(1)) if m and not url.query else None
+
+    def _handle(self, handler):
+        with self._lock:
+            self.requests += 1
+            fail = self.fail_every and self.requests % self.fail_every == 0
+            if fail:
+                self.failures += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            handler.send_response(429)
+            handler.send_header('Retry-After', '0')
+            handler.send_header('Content-Length', '0')
+            handler.end_headers()
+            return
+        page = self._page_number(handler.path)
+        if page is None:
+            if not self.soft_404:
+                handler.send_error(404)
+                return
+            page = 1
+        body = render_page(page, self.pages, self.books_per_page, self.style, self.pager)
+        etag = '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+        if handler.headers.get('If-None-Match') == etag:
+            with self._lock:
+                self.not_modified += 1
+            handler.send_response(304)
+            handler.send_header('ETag', etag)
+            handler.end_headers()
+            return
+        with self._lock:
+            self.bytes_sent += len(body)
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'text/html; charset=utf-8')
+        handler.send_header('Content-Length', str(len(body)))
+        handler.send_header('ETag', etag)
+        handler.send_header('Last-Modified', self.last_modified)
+        handler.end_headers()
+        handler.wfile.write(body)
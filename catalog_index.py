@@ -0,0 +1,288 @@
+"""
+Inverted index with BM25 ranking over the scraped catalog.
+
+``build_index(json_path)`` tokenizes every book's title and description
+and writes ``<json_path>.idx`` next to the JSON output. Title words count
+double. The file is a JSON header (vocabulary plus section offsets)
+followed by binary sections:
+
+  * postings: uint32 book numbers and uint16 term frequencies, one run per term
+  * norms: the BM25 length normalisation of each book, precomputed
+  * spans: byte range of each book's record inside the JSON file
+
+``CatalogIndex`` maps the index and the JSON file on first query. It only
+touches the postings of the query terms and the records it returns, so
+queries stay in the millisecond range on 100k+ books. Scores are summed
+with numpy when it is installed, in plain Python otherwise. An index
+older than its JSON file (size or mtime differ) is rebuilt on open.
+
+Usage:
+  python3 catalog_index.py build sap_press_books.json
+  python3 catalog_index.py search "machine learning" --limit 5
+"""
+
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from atomic_file import atomic_open
+
+try:
+    import numpy
+except ImportError:  # optional: scores are summed in Python
+    numpy = None
+
+MAGIC = b'BOOKIDX1'
+TOKEN = re.compile(r'\w+')
+WHITESPACE = re.compile(r'\s*')
+STOP_WORDS = frozenset('a an and are as at be by for from how in is it its of on or the this that to with you your'
+                       .split())
+TITLE_WEIGHT = 2
+MAX_TF = 0xFFFF
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN.findall(text.lower()) if t not in STOP_WORDS]
+
+
+def _source_stamp(path: str) -> Dict:
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def read_books(json_path: str) -> Iterator[Tuple[Dict, int, int]]:
+    """Each book in a JSON array file with the byte range of its record"""
+    with open(json_path, 'rb') as f:
+        data = f.read()
+    text = data.decode('utf-8')
+    ascii_only = len(text) == len(data)
+    decoder = json.JSONDecoder()
+    pos = WHITESPACE.match(text).end()
+    if text[pos:pos + 1] != '[':
+        raise ValueError(f'{json_path} does not hold a JSON array')
+    pos += 1
+    char_pos = byte_pos = 0   # last position whose byte offset is known
+    while True:
+        pos = WHITESPACE.match(text, pos).end()
+        if text[pos:pos + 1] == ']':
+            return
+        book, end = decoder.raw_decode(text, pos)
+        if ascii_only:
+            start_byte, end_byte = pos, end
+        else:
+            start_byte = byte_pos + len(text[char_pos:pos].encode('utf-8'))
+            end_byte = start_byte + len(text[pos:end].encode('utf-8'))
+            char_pos, byte_pos = end, end_byte
+        yield book, start_byte, end_byte
+        pos = WHITESPACE.match(text, end).end()
+        if text[pos:pos + 1] == ',':
+            pos += 1
+
+
+def build_index(json_path: str, index_path: Optional[str] = None, k1: float = 1.2, b: float = 0.75) -> str:
+    """Index the books in ``json_path``; returns the index path"""
+    index_path = index_path or json_path + '.idx'
+    stamp = _source_stamp(json_path)
+    postings = {}   # term -> ([book numbers], [term frequencies])
+    lengths = array('I')
+    spans = array('Q')
+    for doc, (book, start, end) in enumerate(read_books(json_path)):
+        counts = Counter()
+        for term in tokenize(book.get('title') or ''):
+            counts[term] += TITLE_WEIGHT
+        counts.update(tokenize(book.get('description') or ''))
+        for term, tf in counts.items():
+            entry = postings.get(term)
+            if entry is None:
+                entry = postings[term] = (array('I'), array('H'))
+            entry[0].append(doc)
+            entry[1].append(min(tf, MAX_TF))
+        lengths.append(sum(counts.values()))
+        spans.extend((start, end))
+
+    n_docs = len(lengths)
+    avgdl = (sum(lengths) / n_docs) if n_docs else 0.0
+    norms = array('d', (k1 * (1 - b + b * length / avgdl) if avgdl else k1 for length in lengths))
+    docs = array('I')
+    tfs = array('H')
+    vocab = {}
+    for term in sorted(postings):
+        term_docs, term_tfs = postings[term]
+        vocab[term] = [len(docs), len(term_docs)]
+        docs.extend(term_docs)
+        tfs.extend(term_tfs)
+
+    sections = [('docs', docs.tobytes()), ('tfs', tfs.tobytes()), ('norms', norms.tobytes()),
+                ('spans', spans.tobytes())]
+    layout = {}
+    position = 0
+    for name, data in sections:
+        layout[name] = [position, len(data)]
+        position += len(data) + (-len(data) % 8)   # keep every section 8-byte aligned
+    header = json.dumps({'source': stamp, 'byteorder': sys.byteorder, 'n_docs': n_docs, 'k1': k1,
+                         'b': b, 'sections': layout, 'vocab': vocab}, ensure_ascii=False).encode('utf-8')
+    header += b' ' * (-(len(MAGIC) + 8 + len(header)) % 8)
+
+    with atomic_open(index_path, 'wb') as f:
+        f.write(MAGIC + struct.pack('<Q', len(header)) + header)
+        for _, data in sections:
+            f.write(data + b'\0' * (-len(data) % 8))
+    return index_path
+
+
+class CatalogIndex:
+    """Ranked search over an index written by build_index; opened on first query"""
+
+    def __init__(self, json_path: str, index_path: Optional[str] = None, rebuild: bool = True):
+        self.json_path = json_path
+        self.index_path = index_path or json_path + '.idx'
+        self.rebuild = rebuild
+        self._header = None
+        self._maps = []
+
+    def _open(self):
+        if self._header is not None:
+            return
+        if self.rebuild and self._stale():
+            build_index(self.json_path, self.index_path)
+        index = _map(self.index_path)
+        self._json = _map(self.json_path)
+        self._maps = [index, self._json]
+        if index[:len(MAGIC)] != MAGIC:
+            raise ValueError(f'{self.index_path} is not a catalog index')
+        (header_len,) = struct.unpack_from('<Q', index, len(MAGIC))
+        start = len(MAGIC) + 8
+        header = json.loads(index[start:start + header_len])
+        if header['byteorder'] != sys.byteorder:
+            raise ValueError(f'{self.index_path} was built on a machine with another byte order')
+        base = start + header_len
+        self._views = {}
+        for name, code in (('docs', 'I'), ('tfs', 'H'), ('norms', 'd'), ('spans', 'Q')):
+            offset, length = header['sections'][name]
+            self._views[name] = memoryview(index)[base + offset:base + offset + length].cast(code)
+        if numpy is not None:
+            self._arrays = {name: numpy.frombuffer(view, dtype=view.format) for name, view in self._views.items()}
+        self._header = header
+
+    def _stale(self) -> bool:
+        try:
+            with open(self.index_path, 'rb') as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    return True
+                (header_len,) = struct.unpack('<Q', f.read(8))
+                header = json.loads(f.read(header_len))
+        except (OSError, ValueError, struct.error):
+            return True
+        return header.get('source') != _source_stamp(self.json_path)
+
+    def __len__(self) -> int:
+        self._open()
+        return self._header['n_docs']
+
+    def book(self, doc: int) -> Dict:
+        self._open()
+        spans = self._views['spans']
+        return json.loads(self._json[spans[2 * doc]:spans[2 * doc + 1]])
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[float, Dict]]:
+        """The ``limit`` best matches for ``query`` as (BM25 score, book), best first"""
+        if limit <= 0:
+            return []
+        self._open()
+        vocab = self._header['vocab']
+        n_docs = self._header['n_docs']
+        k1 = self._header['k1']
+        terms = []
+        for term in set(tokenize(query)):
+            entry = vocab.get(term)
+            if entry is not None:
+                start, df = entry
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                terms.append((start, start + df, idf * (k1 + 1)))
+        if not terms:
+            return []
+        if numpy is not None:
+            best = self._top_numpy(terms, limit)
+        else:
+            best = self._top_python(terms, limit)
+        return [(score, self.book(doc)) for doc, score in best]
+
+    def _top_python(self, terms, limit):
+        docs, tfs, norms = self._views['docs'], self._views['tfs'], self._views['norms']
+        scores = {}
+        get = scores.get
+        for start, end, weight in terms:
+            for doc, tf in zip(docs[start:end], tfs[start:end]):
+                scores[doc] = get(doc, 0.0) + weight * tf / (tf + norms[doc])
+        return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+
+    def _top_numpy(self, terms, limit):
+        docs, tfs, norms = self._arrays['docs'], self._arrays['tfs'], self._arrays['norms']
+        scores = numpy.zeros(self._header['n_docs'])
+        for start, end, weight in terms:
+            term_docs = docs[start:end]
+            tf = tfs[start:end].astype(numpy.float64)
+            # a book appears once per term, so fancy-index addition is safe
+            scores[term_docs] += weight * tf / (tf + norms[term_docs])
+        matched = numpy.flatnonzero(scores)
+        if len(matched) > limit:
+            # keep everything tied with the limit-th score, then break ties by book order
+            threshold = numpy.partition(scores[matched], len(matched) - limit)[len(matched) - limit]
+            matched = matched[scores[matched] >= threshold]
+        best = sorted(((float(scores[doc]), int(doc)) for doc in matched), key=lambda item: (-item[0], item[1]))
+        return [(doc, score) for score, doc in best[:limit]]
+
+    def close(self):
+        if self._header is not None:
+            self._arrays = None
+            for view in self._views.values():
+                view.release()
+            for m in self._maps:
+                m.close()
+            self._maps = []
+            self._header = None
+
+
+def _map(path: str) -> mmap.mmap:
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Search the scraped SAP Press catalog')
+    sub = parser.add_subparsers(dest='command', required=True)
+    bld = sub.add_parser('build', help='Build the index next to a catalog JSON file')
+    bld.add_argument('json_path', nargs='?', default='sap_press_books.json')
+    srch = sub.add_parser('search', help='Ranked search over titles and descriptions')
+    srch.add_argument('query')
+    srch.add_argument('--json', dest='json_path', default='sap_press_books.json', help='Catalog JSON file')
+    srch.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+    if args.command == 'search' and args.limit < 1:
+        parser.error('--limit must be at least 1')
+
+    if args.command == 'build':
+        path = build_index(args.json_path)
+        print(f"Index written to {path}")
+    else:
+        index = CatalogIndex(args.json_path)
+        results = index.search(args.query, limit=args.limit)
+        if not results:
+            print("No matching books")
+        for rank, (score, book) in enumerate(results, 1):
+            print(f"{rank}. {book['title']}  ({score:.2f})")
+            print(f"   {book['url']}")
+
+
+if __name__ == '__main__':
+    main()
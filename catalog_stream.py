@@ -0,0 +1,134 @@
+"""
+Streaming output for long catalog scrapes.
+
+``CatalogWriter`` appends each page's new books to ``<output>.jsonl`` and to
+the CSV file as soon as the page is scraped. It also appends every book URL
+seen on that page, whether or not the topic filter kept the book, to
+``<output>.json.urls``. After each page it atomically rewrites
+``<output>.json.checkpoint`` with where to continue from and the size of
+each file at that point.
+
+``start(resume=True)`` cuts the files back to those sizes and reloads the
+URL set. A page that was half written when the scrape died is therefore
+scraped again rather than duplicated. ``finish()`` assembles the final JSON
+array from the JSONL file one book at a time (the same layout
+``json.dump(books, indent=2)`` produces) and removes the checkpoint.
+"""
+
+import csv
+import io
+import json
+import os
+from typing import Dict, Iterator, List, Optional
+
+from atomic_file import atomic_open, write_atomic
+
+CSV_FIELDS = ['title', 'url', 'description']
+TOPIC_FIELDS = ['relevance', 'matched_terms']
+
+
+class CatalogWriter:
+    """Append scraped books to JSONL/CSV page by page, with a resumable checkpoint"""
+
+    def __init__(self, json_path: str, csv_path: str, fieldnames: List[str] = CSV_FIELDS):
+        self.json_path = json_path
+        self.csv_path = csv_path
+        self.jsonl_path = os.path.splitext(json_path)[0] + '.jsonl'
+        self.urls_path = json_path + '.urls'
+        self.checkpoint_path = json_path + '.checkpoint'
+        self.fieldnames = fieldnames
+        self.seen = set()
+        self.count = 0
+        self._files = {}
+
+    def _paths(self) -> Dict[str, str]:
+        return {'jsonl': self.jsonl_path, 'csv': self.csv_path, 'urls': self.urls_path}
+
+    def start(self, resume: bool = False) -> Optional[Dict]:
+        """Open the output files; returns the checkpoint to continue from, if resuming"""
+        state = self._load_checkpoint() if resume else None
+        if state is not None and any(_size(path) < state['sizes'].get(name, 0)
+                                     for name, path in self._paths().items()):
+            print("Output files are shorter than the checkpoint says; ignoring it")
+            state = None
+        if resume and state is None:
+            print("No checkpoint found, starting from the beginning")
+        sizes = state['sizes'] if state else {}
+        for name, path in self._paths().items():
+            f = open(path, 'ab')
+            f.truncate(sizes.get(name, 0))
+            self._files[name] = f
+        if state:
+            with open(self.urls_path, encoding='utf-8') as f:
+                self.seen = set(line.rstrip('\n') for line in f)
+            self.count = state['count']
+        else:
+            self._write_csv([dict(zip(self.fieldnames, self.fieldnames))])
+        return state
+
+    def add_page(self, urls: List[str], books: List[Dict], **position):
+        """Append one page: every new book URL and the books to keep
+
+        ``position`` (page number, URL, pagination template) is stored in the
+        checkpoint and handed back by ``start(resume=True)``.
+        """
+        self._files['urls'].write(''.join(url + '\n' for url in urls).encode('utf-8'))
+        self._files['jsonl'].write(''.join(json.dumps(book, ensure_ascii=False) + '\n'
+                                           for book in books).encode('utf-8'))
+        self._write_csv(books)
+        self.count += len(books)
+        sizes = {}
+        for name, f in self._files.items():
+            f.flush()
+            sizes[name] = f.tell()
+        state = dict(position, count=self.count, sizes=sizes)
+        write_atomic(self.checkpoint_path, json.dumps(state).encode())
+
+    def _write_csv(self, books: List[Dict]):
+        buf = io.StringIO()
+        csv.DictWriter(buf, fieldnames=self.fieldnames, extrasaction='ignore').writerows(books)
+        self._files['csv'].write(buf.getvalue().encode('utf-8'))
+
+    def _load_checkpoint(self) -> Optional[Dict]:
+        try:
+            with open(self.checkpoint_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def books(self) -> Iterator[Dict]:
+        """The books written so far, read back from the JSONL file"""
+        with open(self.jsonl_path, encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+    def finish(self):
+        """Write the JSON array from the JSONL file and drop the checkpoint"""
+        self.close()
+        with atomic_open(self.json_path, 'w', encoding='utf-8') as out:
+            out.write('[')
+            first = True
+            for book in self.books():
+                out.write('\n' if first else ',\n')
+                first = False
+                out.write('  ' + json.dumps(book, indent=2, ensure_ascii=False).replace('\n', '\n  '))
+            out.write('\n]' if not first else ']')
+        for path in (self.checkpoint_path, self.urls_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        print(f"Books saved to {self.json_path}, {self.jsonl_path} and {self.csv_path}")
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
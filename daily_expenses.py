@@ -1,5 +1,279 @@
+"""
+Daily expenses: an interactive calculator and a persistent expense ledger.
+
+Without arguments the script asks for today's cab, shopping and meal costs
+and prints the total, as it always has (--save also records them).
+
+The ledger (default ``expenses.ledger/``) is an append-only store of
+fixed-width columns: day ordinals (int32), category ids (uint16) and
+amounts (float64), appended in bulk with ``array.tofile``. For every
+(day, category) it keeps the exact sum of the amounts as an integer
+multiple of 2**-1074, which can be added and subtracted without rounding.
+Prefix sums over the sorted days then answer any date range, optionally
+for one category, with two bisections. Dividing back gives the same,
+correctly rounded result as ``math.fsum`` over the records. The totals
+are snapshotted in ``totals.json`` after each write; records appended
+after the last snapshot are replayed on open.
+
+Usage:
+  python3 daily_expenses.py ingest expenses.csv more.jsonl   # date,category,amount
+  python3 daily_expenses.py add meal 12.50 --date 2025-03-01
+  python3 daily_expenses.py total --from 2025-03-01 --to 2025-03-31 --category meal
+  python3 daily_expenses.py report --by month
+"""
+import argparse
+import csv
+import json
 import math
+import os
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
 from datetime import date
+from itertools import islice
+
+from atomic_file import atomic_open
+
+SCALE_BITS = 1074		# every finite float is a whole multiple of 2**-1074
+BATCH = 100_000
+COLUMNS = (("days", "i"), ("categories", "H"), ("amounts", "d"))
+
+def _scaled(x):
+	num, den = x.as_integer_ratio()
+	return num << (SCALE_BITS - den.bit_length() + 1)
+
+def exact_sum(values):
+	"""The exact sum of floats as an integer multiple of 2**-1074"""
+	# math.fsum rounds once; summing again with the rounded result subtracted
+	# yields the remainder, which reaches zero after a pass or two
+	rest = list(values)
+	total = 0
+	while True:
+		s = math.fsum(rest)
+		if s == 0.0:
+			return total
+		total += _scaled(s)
+		rest.append(-s)
+
+def to_float(total):
+	return total / (1 << SCALE_BITS)
+
+class ExpenseLedger:
+	"""Append-only expense records with exact per-day, per-category totals"""
+
+	def __init__(self, path="expenses.ledger"):
+		self.path = path
+		os.makedirs(path, exist_ok=True)
+		self.categories = []
+		self._category_ids = {}
+		self.cells = {}		# (day ordinal, category id) -> [exact sum, count]
+		self._index = None
+		self.count = self._recover()
+
+	def _column_path(self, name):
+		return os.path.join(self.path, name)
+
+	def _recover(self):
+		try:
+			with open(self._column_path("categories.json"), encoding="utf-8") as f:
+				self.categories = json.load(f)
+		except FileNotFoundError:
+			pass
+		self._category_ids = {name: i for i, name in enumerate(self.categories)}
+		self._saved_categories = len(self.categories)
+		# a write cut short leaves the columns at different lengths
+		count = min(os.path.getsize(self._column_path(name)) // array(code).itemsize
+					if os.path.exists(self._column_path(name)) else 0 for name, code in COLUMNS)
+		for name, code in COLUMNS:
+			with open(self._column_path(name), "ab") as f:
+				f.truncate(count * array(code).itemsize)
+		done = 0
+		try:
+			with open(self._column_path("totals.json"), encoding="utf-8") as f:
+				snapshot = json.load(f)
+			if snapshot["count"] <= count:
+				done = snapshot["count"]
+				self.cells = {(day, cat): [int(total, 16), n] for day, cat, total, n in snapshot["cells"]}
+		except (FileNotFoundError, ValueError, KeyError):
+			self.cells = {}
+		if done < count:
+			print(f"Replaying {count - done:,} records written after the last snapshot")
+			days, cats, amounts = self._read(done, count)
+			self._fold(days, cats, amounts)
+			self.count = count
+			self._snapshot()
+		return count
+
+	def _read(self, start, stop):
+		columns = []
+		for name, code in COLUMNS:
+			col = array(code)
+			with open(self._column_path(name), "rb") as f:
+				f.seek(start * col.itemsize)
+				col.frombytes(f.read((stop - start) * col.itemsize))
+			columns.append(col)
+		return columns
+
+	def records(self):
+		"""Every (date, category, amount) in the order it was recorded"""
+		days, cats, amounts = self._read(0, self.count)
+		for day, cat, amount in zip(days, cats, amounts):
+			yield date.fromordinal(day), self.categories[cat], amount
+
+	def category_id(self, name):
+		cat = self._category_ids.get(name)
+		if cat is None:
+			cat = self._category_ids[name] = len(self.categories)
+			self.categories.append(name)
+		return cat
+
+	def _fold(self, days, cats, amounts):
+		groups = defaultdict(list)
+		for key, amount in zip(zip(days, cats), amounts):
+			groups[key].append(amount)
+		for key, values in groups.items():
+			cell = self.cells.get(key)
+			if cell is None:
+				cell = self.cells[key] = [0, 0]
+			cell[0] += exact_sum(values)
+			cell[1] += len(values)
+		self._index = None
+
+	def append(self, records):
+		"""Store (date or day ordinal, category, amount) records; returns how many were added"""
+		added = 0
+		records = iter(records)
+		try:
+			while True:
+				batch = list(islice(records, BATCH))
+				if not batch:
+					return added
+				days, cats, amounts = zip(*batch)
+				if isinstance(days[0], date):
+					days = [day.toordinal() for day in days]
+				amounts = array("d", amounts)
+				if min(amounts) < 0 or not math.isfinite(sum(amounts)):
+					for day, category, amount in zip(days, cats, amounts):
+						if not math.isfinite(amount) or amount < 0:
+							raise ValueError(f"Invalid amount {amount!r} for {category} on {date.fromordinal(day)}")
+				for name in set(cats).difference(self._category_ids):
+					self.category_id(name)
+				self._write(array("i", days), array("H", map(self._category_ids.__getitem__, cats)), amounts)
+				added += len(batch)
+		finally:
+			if added:
+				# records appended after this are replayed from the columns on open
+				self._snapshot()
+
+	def _write(self, days, cats, amounts):
+		if len(self.categories) != self._saved_categories:
+			with atomic_open(self._column_path("categories.json"), "w", encoding="utf-8") as f:
+				json.dump(self.categories, f, ensure_ascii=False)
+			self._saved_categories = len(self.categories)
+		for (name, _), col in zip(COLUMNS, (days, cats, amounts)):
+			with open(self._column_path(name), "ab") as f:
+				col.tofile(f)
+		self._fold(days, cats, amounts)
+		self.count += len(days)
+
+	def _snapshot(self):
+		cells = [[day, cat, format(total, "x"), n] for (day, cat), (total, n) in self.cells.items()]
+		with atomic_open(self._column_path("totals.json"), "w", encoding="utf-8") as f:
+			json.dump({"count": self.count, "cells": cells}, f, separators=(",", ":"))
+
+	def _prefix_sums(self):
+		# key (None for every category, else a category id) -> (days, exact prefix sums, prefix counts)
+		if self._index is None:
+			index = {}
+			for (day, cat), (total, n) in sorted(self.cells.items()):
+				for key in (None, cat):
+					days, sums, counts = index.setdefault(key, ([], [0], [0]))
+					if days and days[-1] == day:
+						sums[-1] += total
+						counts[-1] += n
+					else:
+						days.append(day)
+						sums.append(sums[-1] + total)
+						counts.append(counts[-1] + n)
+			self._index = index
+		return self._index
+
+	def total(self, start=None, end=None, category=None):
+		"""(sum, count) of the amounts between two dates, both included"""
+		key = None
+		if category is not None:
+			key = self._category_ids.get(category)
+			if key is None:
+				return 0.0, 0
+		days, sums, counts = self._prefix_sums().get(key, ([], [0], [0]))
+		lo = bisect_left(days, start.toordinal()) if start else 0
+		hi = bisect_right(days, end.toordinal()) if end else len(days)
+		if hi <= lo:
+			return 0.0, 0
+		return to_float(sums[hi] - sums[lo]), counts[hi] - counts[lo]
+
+	def span(self):
+		days = self._prefix_sums().get(None, ([],))[0]
+		return (date.fromordinal(days[0]), date.fromordinal(days[-1])) if days else (None, None)
+
+	def report(self, by="month", start=None, end=None, category=None):
+		"""Rows of (label, sum, count) grouped by day, month or category"""
+		first, last = self.span()
+		if first is None:
+			return []
+		start = max(start, first) if start else first
+		end = min(end, last) if end else last
+		if end < start:
+			return []
+		if by == "category":
+			rows = [(name,) + self.total(start, end, name) for name in sorted(self.categories)
+					if category in (None, name)]
+		elif by == "day":
+			days = self._prefix_sums().get(self._category_ids.get(category) if category else None, ([],))[0]
+			rows = [(date.fromordinal(d).isoformat(),) + self.total(date.fromordinal(d), date.fromordinal(d), category)
+					for d in days[bisect_left(days, start.toordinal()):bisect_right(days, end.toordinal())]]
+		else:
+			rows = []
+			month = date(start.year, start.month, 1)
+			while month <= end:
+				following = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+				first_day, last_day = max(month, start), min(date.fromordinal(following.toordinal() - 1), end)
+				rows.append((month.strftime("%Y-%m"),) + self.total(first_day, last_day, category))
+				month = following
+		return [row for row in rows if row[2]]
+
+def read_records(path):
+	"""Yield (day ordinal, category, amount) from a CSV or JSONL file of expenses"""
+	parsed_days = {}
+
+	def day_of(text, where):
+		try:
+			day = parsed_days[text] = date.fromisoformat(text.strip()[:10]).toordinal()
+		except ValueError:
+			raise ValueError(f"{where}: invalid date {text!r}") from None
+		return day
+
+	with (sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")) as f:
+		if path.endswith((".jsonl", ".json")):
+			for n, line in enumerate(f, 1):
+				if line.strip():
+					record = json.loads(line)
+					text = record["date"]
+					day = parsed_days.get(text) or day_of(text, f"{path}:{n}")
+					yield day, str(record["category"]), float(record["amount"])
+			return
+		reader = csv.reader(f)
+		header = [h.strip().lower() for h in next(reader, [])]
+		try:
+			d, c, a = header.index("date"), header.index("category"), header.index("amount")
+		except ValueError:
+			raise ValueError(f"{path}: expected date, category and amount columns, got {header}") from None
+		for row in reader:
+			if row:
+				# dates repeat, so each distinct one is parsed once
+				day = parsed_days.get(row[d]) or day_of(row[d], f"{path}:{reader.line_num}")
+				yield day, row[c], float(row[a])
 
 def get_cost(prompt):
 	while True:
@@ -15,7 +289,7 @@ def get_cost(prompt):
 		except ValueError:
 			print("Invalid number. Try again.")
 
-def main():
+def interactive(ledger_path=None):
 	today = date.today().isoformat()
 	print(f"Daily expenses for {today}")
 	cab = get_cost("Enter cab cost: ")
@@ -29,5 +303,52 @@ def main():
 	print(f" - Meal:     ${meal:.2f}")
 	print(f"Total for today: ${total:.2f}")
 
+	if ledger_path:
+		entries = [(date.today(), name, cost) for name, cost in (("cab", cab), ("shopping", shopping), ("meal", meal)) if cost]
+		ExpenseLedger(ledger_path).append(entries)
+		print(f"Saved {len(entries)} expense(s) to {ledger_path}")
+
+def main():
+	parser = argparse.ArgumentParser(description="Track daily expenses")
+	parser.add_argument("--ledger", default="expenses.ledger", help="Ledger directory")
+	parser.add_argument("--save", action="store_true", help="Record the interactively entered costs in the ledger")
+	sub = parser.add_subparsers(dest="command")
+	ingest = sub.add_parser("ingest", help="Append expenses from CSV (date,category,amount) or JSONL files")
+	ingest.add_argument("inputs", nargs="+", help='Files to read, "-" for stdin')
+	add = sub.add_parser("add", help="Record one expense")
+	add.add_argument("category")
+	add.add_argument("amount", type=float)
+	add.add_argument("--date", type=date.fromisoformat, default=date.today(), help="YYYY-MM-DD (default: today)")
+	for name, help_text in (("total", "Sum of expenses in a date range"), ("report", "Totals per day, month or category")):
+		q = sub.add_parser(name, help=help_text)
+		q.add_argument("--from", dest="start", type=date.fromisoformat, help="First day, YYYY-MM-DD")
+		q.add_argument("--to", dest="end", type=date.fromisoformat, help="Last day, YYYY-MM-DD")
+		q.add_argument("--category")
+		if name == "report":
+			q.add_argument("--by", choices=["day", "month", "category"], default="month")
+	args = parser.parse_args()
+
+	if args.command is None:
+		interactive(args.ledger if args.save else None)
+		return
+	ledger = ExpenseLedger(args.ledger)
+	try:
+		if args.command == "ingest":
+			for path in args.inputs:
+				added = ledger.append(read_records(path))
+				print(f"Added {added:,} expenses from {path}")
+			print(f"Ledger holds {ledger.count:,} expenses")
+		elif args.command == "add":
+			ledger.append([(args.date, args.category, args.amount)])
+			print(f"Added {args.category} ${args.amount:.2f} on {args.date.isoformat()}")
+		elif args.command == "total":
+			total, count = ledger.total(args.start, args.end, args.category)
+			print(f"Total: ${total:.2f} over {count:,} expense(s)")
+		else:
+			for label, total, count in ledger.report(args.by, args.start, args.end, args.category):
+				print(f"{label:<12} ${total:>14,.2f}  {count:>10,}")
+	except (OSError, ValueError) as e:
+		parser.error(str(e))
+
 if __name__ == "__main__":
 	main()
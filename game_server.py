@@ -1,29 +1,55 @@
-from flask import Flask, request, jsonify, send_from_directory
-import json
+from flask import Flask, request, jsonify, abort
+from werkzeug.security import safe_join
 import os
 
+from leaderboard import open_leaderboard
+from metrics import install as install_metrics
+from profiling import install as install_profiling
+from ranking import MAX_SCORE, MIN_SCORE
+from static_cache import StaticAssets
+
 APP_DIR = os.path.dirname(os.path.abspath(__file__))
 SCORES_FILE = os.path.join(APP_DIR, 'high_scores.json')
 
 app = Flask(__name__, static_folder=APP_DIR)
+install_metrics(app)
+PROFILER = install_profiling(app)
 
-def read_scores():
-    if not os.path.exists(SCORES_FILE):
-        return []
-    try:
-        with open(SCORES_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception:
-        return []
+LEADERBOARD = open_leaderboard(
+    SCORES_FILE,
+    backend=os.environ.get('SCORES_BACKEND', 'json'),
+    db_path=os.environ.get('SCORES_DB'),
+    size=int(os.environ.get('LEADERBOARD_SIZE', 50)),
+    flush_interval=float(os.environ.get('SCORES_FLUSH_INTERVAL', 2.0)),
+    flush_every=int(os.environ.get('SCORES_FLUSH_EVERY', 20)),
+    journal=os.environ.get('SCORES_JOURNAL', '') == '1',
+    ensure_ascii=False,
+).start()
 
-def write_scores(scores):
-    with open(SCORES_FILE, 'w', encoding='utf-8') as f:
-        json.dump(scores, f, ensure_ascii=False, indent=2)
+# game.html and docs/ are served from memory with precompressed variants
+ASSETS = StaticAssets(
+    APP_DIR,
+    preload=['game.html'],
+    max_age=int(os.environ.get('STATIC_MAX_AGE', 86400)),
+).preload_dir('docs')
 
 @app.route('/')
 def index():
     # serve the game page
-    return send_from_directory(APP_DIR, 'game.html')
+    resp = ASSETS.response('game.html', request)
+    if resp is None:
+        abort(404)
+    return resp
+
+@app.route('/docs/', defaults={'filename': 'index.html'})
+@app.route('/docs/<path:filename>')
+def docs(filename):
+    # safe_join keeps the path inside docs/
+    name = safe_join('docs', filename)
+    resp = ASSETS.response(name, request) if name is not None else None
+    if resp is None:
+        abort(404)
+    return resp
 
 @app.route('/submit_score', methods=['POST'])
 def submit_score():
@@ -33,19 +59,16 @@ def submit_score():
         score = int(data.get('score', 0))
     except Exception:
         score = 0
+    if not MIN_SCORE <= score <= MAX_SCORE:
+        return jsonify({'error': 'score out of range'}), 400
 
-    scores = read_scores()
-    scores.append({'name': name, 'score': score})
-    # keep sorted descending
-    scores = sorted(scores, key=lambda x: x['score'], reverse=True)
-    # keep top 50
-    scores = scores[:50]
-    write_scores(scores)
+    # keeps only the top entries, sorted descending
+    LEADERBOARD.submit(name, score)
     return jsonify({'status':'ok'})
 
 @app.route('/scores')
 def scores():
-    return jsonify(read_scores())
+    return jsonify(LEADERBOARD.entries())
 
 if __name__ == '__main__':
     # simple dev server
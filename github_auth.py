@@ -0,0 +1,144 @@
+"""
+Cached GitHub App credentials.
+
+``AppJWTCache`` parses the App's PEM key once (again only when the file's
+mtime changes) and hands out the same RS256 JWT until shortly before it
+expires, so ``/jwt`` no longer signs on every call.
+
+``InstallationTokenCache`` exchanges that JWT for installation access tokens
+and keeps one per installation ID. Tokens are refreshed ahead of expiry in
+the background while the current one is still handed out, and concurrent
+refreshes of the same installation share a single request to GitHub.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import jwt
+import requests
+from cryptography.hazmat.primitives import serialization
+
+from metrics import timed
+
+
+class AppJWTCache:
+    """Reuse the App JWT and the parsed private key between calls"""
+
+    def __init__(self, app_id, key_path, lifetime: int = 9 * 60, refresh_margin: int = 60):
+        # PyJWT 2.10+ insists that iss is a string; GitHub accepts either
+        self.app_id = str(int(app_id))
+        self.key_path = key_path
+        self.lifetime = lifetime
+        self.refresh_margin = refresh_margin
+        self._lock = threading.Lock()
+        self._key = None
+        self._key_mtime = None
+        self._token = None
+        self._expires = 0
+
+    def _private_key(self):
+        mtime = os.stat(self.key_path).st_mtime_ns
+        if self._key is None or mtime != self._key_mtime:
+            with timed('jwt_key_load'), open(self.key_path, 'rb') as f:
+                self._key = serialization.load_pem_private_key(f.read(), password=None)
+            self._key_mtime = mtime
+            # a new key invalidates the token signed with the old one
+            self._token = None
+        return self._key
+
+    def token(self) -> str:
+        with self._lock:
+            key = self._private_key()
+            now = int(time.time())
+            if self._token is None or now >= self._expires - self.refresh_margin:
+                payload = {"iat": now - 60, "exp": now + self.lifetime, "iss": self.app_id}
+                with timed('jwt_sign'):
+                    token = jwt.encode(payload, key, algorithm='RS256')
+                if isinstance(token, bytes):
+                    token = token.decode()
+                self._token, self._expires = token, payload['exp']
+            return self._token
+
+
+class InstallationTokenCache:
+    """Installation access tokens keyed by installation ID"""
+
+    def __init__(self, app_jwt: AppJWTCache, api_url: str = 'https://api.github.com',
+                 refresh_ahead: int = 5 * 60, min_validity: int = 30, timeout: float = 10.0):
+        self.app_jwt = app_jwt
+        self.api_url = api_url.rstrip('/')
+        self.refresh_ahead = refresh_ahead
+        self.min_validity = min_validity
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._lock = threading.Lock()
+        self._tokens = {}      # installation id -> (token, expires at)
+        self._inflight = {}    # installation id -> Event set when the refresh ends
+
+    def token(self, installation_id: int) -> str:
+        """A token valid for at least ``min_validity`` more seconds"""
+        with self._lock:
+            cached = self._tokens.get(installation_id)
+            now = time.time()
+            if cached and now < cached[1] - self.min_validity:
+                if now >= cached[1] - self.refresh_ahead and installation_id not in self._inflight:
+                    # still usable: refresh in the background and hand this one out
+                    self._inflight[installation_id] = threading.Event()
+                    threading.Thread(target=self._refresh, args=(installation_id,), daemon=True).start()
+                return cached[0]
+            waiter = self._inflight.get(installation_id)
+            leader = waiter is None
+            if leader:
+                waiter = self._inflight[installation_id] = threading.Event()
+        if leader:
+            error = self._refresh(installation_id)
+            if error is not None:
+                raise error
+        else:
+            # somebody else is already asking GitHub; share their answer
+            waiter.wait()
+        with self._lock:
+            cached = self._tokens.get(installation_id)
+        if cached is None or time.time() >= cached[1]:
+            raise RuntimeError(f'could not get a token for installation {installation_id}')
+        return cached[0]
+
+    def _refresh(self, installation_id: int) -> Optional[Exception]:
+        try:
+            resp = self.session.post(
+                f'{self.api_url}/app/installations/{installation_id}/access_tokens',
+                headers={'Authorization': f'Bearer {self.app_jwt.token()}',
+                         'Accept': 'application/vnd.github+json'},
+                timeout=self.timeout,
+            )
+            resp.raise_for_status()
+            data = resp.json()
+            expires = parse_github_time(data['expires_at'])
+            with self._lock:
+                self._tokens[installation_id] = (data['token'], expires)
+            return None
+        except Exception as e:
+            print(f'Failed to refresh token for installation {installation_id}:', e)
+            return e
+        finally:
+            with self._lock:
+                self._inflight.pop(installation_id).set()
+
+    def invalidate(self, installation_id: Optional[int] = None):
+        with self._lock:
+            if installation_id is None:
+                self._tokens.clear()
+            else:
+                self._tokens.pop(installation_id, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'cached': len(self._tokens), 'refreshing': len(self._inflight)}
+
+
+def parse_github_time(value: str) -> float:
+    """Epoch seconds for a GitHub timestamp like 2026-01-13T09:43:00Z"""
+    return datetime.strptime(value, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc).timestamp()
@@ -0,0 +1,111 @@
+"""
+On-disk cache of HTTP responses for the scraper.
+
+Each URL is stored as two files named after the SHA-256 of the URL: the raw
+body (``<key>.body``) and a small JSON header (``<key>.json``) holding the
+``ETag`` and ``Last-Modified`` validators. Callers send those back as
+``If-None-Match``/``If-Modified-Since`` and reuse the stored body on 304.
+
+``evict()`` bounds disk use: entries not used for ``max_age`` seconds are
+dropped, then the least recently used ones until the cache fits in
+``max_bytes``. The body file's mtime records the last use.
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Optional
+
+from atomic_file import write_atomic
+
+
+class CacheEntry:
+    __slots__ = ('url', 'body', 'etag', 'last_modified', 'stored')
+
+    def __init__(self, url: str, body: bytes, etag: Optional[str], last_modified: Optional[str], stored: float):
+        self.url = url
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored = stored
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """Response bodies and validators keyed by URL"""
+
+    def __init__(self, directory: str, max_age: float = 30 * 86400, max_bytes: int = 200 * 1024 * 1024):
+        self.directory = directory
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(url.encode()).hexdigest())
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        path = self._path(url)
+        try:
+            with open(path + '.json', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(path + '.body', 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        if meta.get('url') != url:
+            return None
+        return CacheEntry(url, body, meta.get('etag'), meta.get('last_modified'), meta.get('stored', 0))
+
+    def put(self, url: str, body: bytes, headers) -> CacheEntry:
+        """Store a 200 response; ``headers`` is the response's header mapping"""
+        entry = CacheEntry(url, body, headers.get('ETag'), headers.get('Last-Modified'), time.time())
+        path = self._path(url)
+        meta = {'url': url, 'etag': entry.etag, 'last_modified': entry.last_modified, 'stored': entry.stored}
+        # body first: a header without its body is never read back as a hit
+        write_atomic(path + '.body', body)
+        write_atomic(path + '.json', json.dumps(meta).encode())
+        return entry
+
+    def touch(self, url: str):
+        """Mark an entry as used (e.g. after a 304)"""
+        try:
+            os.utime(self._path(url) + '.body')
+        except OSError:
+            pass
+
+    def evict(self) -> int:
+        """Drop stale entries, then the least recently used beyond max_bytes; returns entries removed"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.body'):
+                continue
+            path = os.path.join(self.directory, name[:-len('.body')])
+            try:
+                st = os.stat(path + '.body')
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        entries.sort(reverse=True)   # most recently used first
+        now = time.time()
+        total = 0
+        removed = 0
+        for used, size, path in entries:
+            if now - used <= self.max_age and total + size <= self.max_bytes:
+                total += size
+            else:
+                for suffix in ('.json', '.body'):
+                    try:
+                        os.remove(path + suffix)
+                    except OSError:
+                        pass
+                removed += 1
+        return removed
+
@@ -0,0 +1,229 @@
+"""
+Columnar cache and group-by queries over Amazon GST invoice reports.
+
+``ReportCache.load(path)`` parses a report CSV once and keeps it in
+``.report_cache/`` as Parquet, or as a pandas pickle when pyarrow is not
+installed (pyarrow also parses the CSV about twice as fast). Cached files
+are named after the report's absolute path, mtime and size, so an edited
+report is converted again and its old copy is removed. Dtypes are
+normalized on conversion: ``... Date`` columns become datetimes, and
+cities, states, countries and other repetitive text columns become
+categories.
+
+``query`` sums, counts and distinct-counts columns grouped by any columns
+(and ``month`` of the invoice date). It reads only the columns the query
+needs from the cache, so repeat queries never parse CSV.
+
+Usage:
+  python3 invoice_reports.py convert reports/*.csv
+  python3 invoice_reports.py query reports/*.csv --by "Ship To State" --by month \\
+      --sum "Invoice Amount" --sum "Total Tax Amount" --count --distinct "Order Id"
+"""
+
+import argparse
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+try:
+    import pyarrow  # noqa: F401
+    CACHE_FORMAT = 'parquet'
+    CSV_ENGINE = 'pyarrow'
+except ImportError:  # optional: cache as pickles, parse with the C reader
+    CACHE_FORMAT = 'pickle'
+    CSV_ENGINE = 'c'
+
+from atomic_file import replacing
+from unique_cities import expand_inputs
+
+CACHE_DIR = '.report_cache'
+DATE_COLUMN = 'Invoice Date'
+MONTH = 'month'
+CATEGORY_WORDS = ('city', 'state', 'country')
+
+
+def normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """Parse date columns and store repetitive text columns as categories"""
+    for col in df.columns:
+        low = col.strip().lower()
+        if low.endswith('date'):
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+        elif pd.api.types.is_string_dtype(df[col]) or pd.api.types.is_object_dtype(df[col]):
+            if any(word in low for word in CATEGORY_WORDS) or df[col].nunique() <= len(df) // 2:
+                df[col] = df[col].astype('category')
+    return df
+
+
+def resolve_column(columns: Sequence[str], name: str) -> str:
+    """The column called ``name``, ignoring case and surrounding spaces"""
+    wanted = name.strip().lower()
+    for col in columns:
+        if col.strip().lower() == wanted:
+            return col
+    raise KeyError(f'No column {name!r}; available: {", ".join(columns)}')
+
+
+class ReportCache:
+    """Reports converted to a columnar format, keyed by path, mtime and size"""
+
+    def __init__(self, directory: str = CACHE_DIR, fmt: str = CACHE_FORMAT):
+        self.directory = directory
+        self.fmt = fmt
+        os.makedirs(directory, exist_ok=True)
+
+    def _prefix(self, path: str) -> str:
+        return hashlib.sha256(os.path.abspath(path).encode('utf-8')).hexdigest()[:32]
+
+    def path_for(self, path: str) -> str:
+        st = os.stat(path)
+        name = f'{self._prefix(path)}-{st.st_mtime_ns}-{st.st_size}.{self.fmt}'
+        return os.path.join(self.directory, name)
+
+    def convert(self, path: str) -> str:
+        """Parse ``path`` into the cache unless an up-to-date copy exists; returns the cached file"""
+        cached = self.path_for(path)
+        if os.path.exists(cached):
+            return cached
+        df = normalize(pd.read_csv(path, engine=CSV_ENGINE))
+        with replacing(cached) as tmp:
+            if self.fmt == 'parquet':
+                df.to_parquet(tmp, index=False)
+            else:
+                df.to_pickle(tmp)
+        prefix = self._prefix(path) + '-'
+        for name in os.listdir(self.directory):
+            # copies of earlier versions of the same report
+            if name.startswith(prefix) and os.path.join(self.directory, name) != cached and '.tmp' not in name:
+                os.remove(os.path.join(self.directory, name))
+        return cached
+
+    def columns(self, path: str) -> List[str]:
+        cached = self.convert(path)
+        if self.fmt == 'parquet':
+            import pyarrow.parquet as pq
+            return pq.read_schema(cached).names
+        return list(pd.read_pickle(cached).columns)
+
+    def load(self, path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        cached = self.convert(path)
+        if self.fmt == 'parquet':
+            return pd.read_parquet(cached, columns=columns)
+        df = pd.read_pickle(cached)
+        return df[columns] if columns is not None else df
+
+
+def _convert_job(args):
+    directory, fmt, path = args
+    return ReportCache(directory, fmt).convert(path)
+
+
+def convert_all(cache: ReportCache, paths: List[str], jobs: Optional[int] = None) -> List[str]:
+    """Convert reports in parallel, one process per file"""
+    jobs = min(jobs or os.cpu_count() or 1, len(paths))
+    if jobs <= 1:
+        return [cache.convert(path) for path in paths]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(_convert_job, [(cache.directory, cache.fmt, path) for path in paths]))
+
+
+def _concat(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    if len(frames) == 1:
+        return frames[0]
+    df = pd.concat(frames, ignore_index=True)
+    for col in frames[0].columns:
+        if all(isinstance(frame[col].dtype, pd.CategoricalDtype) for frame in frames):
+            # concat turns categories that differ between reports back into text
+            df[col] = union_categoricals([frame[col] for frame in frames])
+    return df
+
+
+def query(paths: List[str], by: Sequence[str] = (), sums: Sequence[str] = (), count: bool = False,
+          distinct: Sequence[str] = (), date_column: str = DATE_COLUMN, cache: Optional[ReportCache] = None,
+          jobs: Optional[int] = None) -> pd.DataFrame:
+    """Group the reports by ``by`` and aggregate; one row per group, or one row without ``by``"""
+    cache = cache or ReportCache()
+    convert_all(cache, paths, jobs)
+    available = cache.columns(paths[0])
+    keys = [MONTH if name.strip().lower() == MONTH else resolve_column(available, name) for name in by]
+    sums = [resolve_column(available, name) for name in sums]
+    distinct = [resolve_column(available, name) for name in distinct]
+    needed = [k for k in keys if k != MONTH] + sums + distinct
+    if MONTH in keys:
+        needed.append(resolve_column(available, date_column))
+    needed = list(dict.fromkeys(needed))
+    if not (sums or count or distinct):
+        raise ValueError('Nothing to compute: give --sum, --count or --distinct')
+    if not needed:
+        needed = [available[0]]   # a count of rows still needs one column
+
+    df = _concat([cache.load(path, columns=needed) for path in paths])
+    if MONTH in keys:
+        df[MONTH] = df[resolve_column(available, date_column)].dt.to_period('M')
+
+    aggs: Dict[str, tuple] = {}
+    for col in sums:
+        aggs[col] = (col, 'sum')
+    if count:
+        aggs['count'] = (needed[0], 'size')
+    for col in distinct:
+        aggs[f'distinct {col}'] = (col, 'nunique')
+    if not keys:
+        return pd.DataFrame([{name: df[col].agg(how) for name, (col, how) in aggs.items()}])
+    return df.groupby(keys, observed=True, sort=True).agg(**aggs).reset_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cache GST invoice reports as columns and query them')
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help='Where converted reports are kept')
+    parser.add_argument('--jobs', '-j', type=int, help='Reports converted in parallel (default: one per CPU)')
+    sub = parser.add_subparsers(dest='command', required=True)
+    conv = sub.add_parser('convert', help='Convert reports into the cache')
+    conv.add_argument('inputs', nargs='+', help='CSV files or glob patterns')
+    q = sub.add_parser('query', help='Group-by aggregation over cached reports')
+    q.add_argument('inputs', nargs='+', help='CSV files or glob patterns')
+    q.add_argument('--by', action='append', default=[], help=f'Group by this column, or "{MONTH}" (repeatable)')
+    q.add_argument('--sum', dest='sums', action='append', default=[], help='Sum this column (repeatable)')
+    q.add_argument('--count', action='store_true', help='Count rows per group')
+    q.add_argument('--distinct', action='append', default=[], help='Count distinct values (repeatable)')
+    q.add_argument('--date-column', default=DATE_COLUMN, help=f'Column "{MONTH}" is taken from')
+    q.add_argument('--sort', help='Sort the result by this output column, largest first')
+    q.add_argument('--limit', type=int, help='Print at most this many rows')
+    q.add_argument('--output', '-o', help='Also write the result to this CSV file')
+    args = parser.parse_args()
+
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        return
+    cache = ReportCache(args.cache_dir)
+    start = time.perf_counter()
+    if args.command == 'convert':
+        for path, cached in zip(paths, convert_all(cache, paths, args.jobs)):
+            print(f"{path} -> {cached}")
+        print(f"Converted {len(paths)} report(s) in {time.perf_counter() - start:.2f}s")
+        return
+
+    try:
+        result = query(paths, args.by, args.sums, args.count, args.distinct, args.date_column, cache, args.jobs)
+    except (KeyError, ValueError) as e:
+        parser.error(e.args[0])
+    if args.sort:
+        # output columns are only known once the query has run
+        try:
+            sort_column = resolve_column(list(result.columns), args.sort)
+        except KeyError as e:
+            parser.error(f'--sort: {e.args[0]}')
+        result = result.sort_values(sort_column, ascending=False)
+    if args.output:
+        result.to_csv(args.output, index=False)
+    shown = result.head(args.limit) if args.limit else result
+    print(shown.to_string(index=False))
+    print(f"{len(result)} group(s) from {len(paths)} report(s) in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
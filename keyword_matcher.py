@@ -0,0 +1,99 @@
+"""
+Keyword matching for the scraper's topic filters.
+
+``KeywordMatcher`` compiles a keyword list into one regex that only matches
+whole words (an optional plural "s" is allowed), so "ai" no longer matches
+inside "maintain" or "email". A match must not touch a word character on
+either side; unlike ``\b`` this also works for keywords that begin or end
+with punctuation, such as "c++", "c#" or ".net". The alternation is shaped as a trie, so the
+engine branches once per character instead of trying every keyword in
+turn, and text is lowercased up front rather than matched with IGNORECASE.
+The longest keyword wins, so "generative ai" counts once as itself rather
+than also as "ai".
+
+``classify(books)`` scores a whole list of books in one pass: the titles
+and descriptions are joined into one string, the regex runs over it once
+and every hit is mapped back to its book. A hit in the title counts double.
+"""
+
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Dict, Iterable, List
+
+
+class KeywordMatcher:
+    """Whole-word matcher for a fixed set of keywords"""
+
+    FIELDS = ('title', 'description')
+    WEIGHTS = (2, 1)
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = sorted({k.strip().lower() for k in keywords if k.strip()}, key=lambda k: (-len(k), k))
+        if not self.keywords:
+            raise ValueError('no keywords given')
+        self._regex = re.compile(r'(?<!\w)(%s)s?(?!\w)' % _trie_pattern(self.keywords))
+
+    def terms(self, text: str) -> Dict[str, int]:
+        """Matched keywords in ``text`` with their counts"""
+        counts = {}
+        for m in self._regex.finditer(text.lower()):
+            term = m.group(1)
+            counts[term] = counts.get(term, 0) + 1
+        return counts
+
+    def score(self, book: Dict) -> Dict:
+        return self.classify([book])[0]
+
+    def classify(self, books: List[Dict]) -> List[Dict]:
+        """``{'score': int, 'terms': {keyword: count}}`` for each book, in order"""
+        texts = []
+        starts = []
+        offset = 0
+        for book in books:
+            for field in self.FIELDS:
+                # lowercase each text separately: lower() can change the length
+                text = (book.get(field) or '').lower()
+                starts.append(offset)
+                texts.append(text)
+                offset += len(text) + 1
+        results = [{'score': 0, 'terms': {}} for _ in books]
+        n_fields = len(self.FIELDS)
+        for m in self._regex.finditer('\n'.join(texts)):
+            index = bisect_right(starts, m.start()) - 1
+            book, field = divmod(index, n_fields)
+            result = results[book]
+            term = m.group(1)
+            result['terms'][term] = result['terms'].get(term, 0) + 1
+            result['score'] += self.WEIGHTS[field]
+        return results
+
+
+def _trie_pattern(words: List[str]) -> str:
+    """Regex alternation of `words` nested by common prefix, longest match first"""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def build(node) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:%s)' % '|'.join(branches)
+        # a word may end here: the longer continuations are tried first
+        return '(?:%s)?' % body if '' in node else body
+
+    return build(trie)
+
+
+@lru_cache(maxsize=32)
+def _cached(keywords: tuple) -> KeywordMatcher:
+    return KeywordMatcher(keywords)
+
+
+def matcher_for(keywords: Iterable[str]) -> KeywordMatcher:
+    """Shared matcher for a keyword list, compiled on first use"""
+    return _cached(tuple(keywords))
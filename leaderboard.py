@@ -0,0 +1,557 @@
+"""
+In-memory top-K leaderboard with write-behind persistence.
+
+Submissions go into a bounded min-heap in O(log K); the sorted list is only
+built when somebody reads it or when it is flushed to disk. Flushing happens
+on a background timer, after a number of dirty writes, and once more at
+interpreter shutdown. The file format is the same JSON list of
+``{"name": ..., "score": ...}`` objects the apps always wrote, so existing
+``high_scores.json`` files load unchanged. Snapshots are written to a
+temporary file and moved into place with ``os.replace``, so a crash can never
+leave a truncated board behind.
+
+In journal mode every accepted submission is also appended to
+``<path>.journal`` as one JSONL record, and the background flush becomes a
+compaction: the journal is frozen, a fresh snapshot is written and the frozen
+segment is removed. The first line of each journal names the digest of the
+snapshot it continues from, which lets recovery tell whether a leftover
+frozen segment is already part of the snapshot or still has to be replayed.
+
+Both of those keep state per process. To run the apps under several WSGI
+workers, pick the SQLite backend instead (see ``open_leaderboard``): every
+submission is its own committed INSERT, so concurrent workers never overwrite
+each other, and the board is read through an index on score.
+
+Both backends also keep every player's best score in a ``ranking.RankIndex``
+for ``rank()`` and ``around()``. The JSON backend saves those bests the way
+it saves the board in journal mode: each flush appends the bests that changed
+to ``<path>.bests.log`` (one ``[name, score]`` JSON line each), and only once
+the log holds more lines than there are players is it compacted into
+``<path>.bests`` (a JSON list of pairs in the order players were first seen,
+which keeps ties stable). Submissions that set a new best are journaled too,
+so players below the top K keep their rank across restarts. The SQLite backend keeps every
+score and catches up with rows written by other workers before each lookup.
+
+Scores are stored as integers; a float in an old or hand-edited file is
+truncated on load, and entries without a usable score, or with one outside
+the ``ranking.MIN_SCORE``..``MAX_SCORE`` range the rank index holds, are
+skipped.
+
+Import an existing board into SQLite once with:
+  python3 leaderboard.py import high_scores.json --db high_scores.db
+"""
+
+import atexit
+import hashlib
+import heapq
+import json
+import os
+import sqlite3
+import threading
+from itertools import count
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from atomic_file import write_atomic
+from metrics import timed
+from ranking import MAX_SCORE, MIN_SCORE, RankIndex
+
+# the bests log is compacted once it has more lines than this or than there
+# are players, so appending stays O(changes) and compaction is amortized
+BESTS_COMPACT_MIN = 10000
+
+
+class Leaderboard:
+    """Top-K scores kept in process memory and written back lazily"""
+
+    def __init__(self, path, size: int = 100, flush_interval: Optional[float] = 2.0,
+                 flush_every: int = 20, ensure_ascii: bool = True, journal: bool = False):
+        self.path = Path(path)
+        self.size = size
+        self.flush_interval = flush_interval
+        self.flush_every = max(1, flush_every)
+        self.ensure_ascii = ensure_ascii
+        self.journal_path = self.path.with_name(self.path.name + '.journal') if journal else None
+        self.bests_path = self.path.with_name(self.path.name + '.bests')
+        self.bests_log_path = self.path.with_name(self.path.name + '.bests.log')
+        self._journal = None
+        # Min-heap of (score, -seq, entry): the root is the entry that drops
+        # off first. Among equal scores the later submission ranks lower,
+        # which matches the stable sort the apps used before.
+        self._heap = []
+        self._seq = count()
+        self.ranks = RankIndex()
+        self._dirty = 0
+        self._bests_changed = {}   # name -> best score not yet in the bests log
+        self._bests_logged = 0     # lines in the bests log since the last compaction
+        # changes whenever the board does; the random prefix keeps versions
+        # from a previous process from matching this one
+        self._instance = os.urandom(4).hex()
+        self._version = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.load()
+
+    def load(self):
+        """(Re)load the board from disk, keeping only the top entries
+
+        In journal mode this is also crash recovery: the snapshot is loaded
+        first and the journal tail is replayed on top of it.
+        """
+        with timed('score_load'):
+            self._load()
+
+    def _load(self):
+        raw = self._read_snapshot()
+        try:
+            entries = json.loads(raw) if raw else []
+        except ValueError as e:
+            print('Failed to load scores:', e)
+            entries = []
+        with self._lock:
+            self._heap = []
+            self._seq = count()
+            self.ranks = RankIndex()
+            self._dirty = 0
+            self._bests_changed = {}
+            self._version += 1
+            # bests first, so players get their pids back in the same order
+            for name, score in self._read_bests():
+                self.ranks.update(name, score)
+            self._bests_logged = 0
+            for name, score in self._read_bests_log():
+                self.ranks.update(name, score)
+                self._bests_logged += 1
+            for entry in entries:
+                if isinstance(entry, dict):
+                    self._push(entry)
+            if self.journal_path is not None:
+                self._recover(self._digest(raw))
+
+    def _read_bests(self):
+        try:
+            pairs = json.loads(self.bests_path.read_bytes())
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            print('Failed to load best scores:', e)
+            return []
+        bests = []
+        for pair in pairs if isinstance(pairs, list) else ():
+            if isinstance(pair, list) and len(pair) == 2:
+                entry = _clean({'name': pair[0], 'score': pair[1]})
+                if entry is not None:
+                    bests.append((entry['name'], entry['score']))
+        return bests
+
+    def _read_bests_log(self):
+        try:
+            f = self.bests_log_path.open('r', encoding='utf-8')
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                try:
+                    pair = json.loads(line)
+                except ValueError:
+                    # torn final line from a crash mid-append
+                    continue
+                if isinstance(pair, list) and len(pair) == 2:
+                    entry = _clean({'name': pair[0], 'score': pair[1]})
+                    if entry is not None:
+                        yield entry['name'], entry['score']
+
+    def _read_snapshot(self) -> bytes:
+        try:
+            return self.path.read_bytes()
+        except FileNotFoundError:
+            return b''
+        except OSError as e:
+            print('Failed to load scores:', e)
+            return b''
+
+    def _frozen_path(self):
+        return self.journal_path.with_name(self.journal_path.name + '.old')
+
+    def _read_journal(self, path):
+        """Return (base digest, records) from a journal file"""
+        base, records = None, []
+        if not path.exists():
+            return base, records
+        with path.open('r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # torn final line from a crash mid-append
+                    continue
+                if not isinstance(record, dict):
+                    continue
+                if 'base' in record:
+                    base = record['base']
+                else:
+                    records.append(record)
+        return base, records
+
+    def _recover(self, snapshot_digest):
+        frozen = self._frozen_path()
+        base, records = self._read_journal(self.journal_path)
+        if frozen.exists():
+            # A compaction was interrupted. If the live journal was started
+            # against the snapshot on disk, the frozen segment made it in.
+            if base != snapshot_digest:
+                _, old_records = self._read_journal(frozen)
+                records = old_records + records
+            else:
+                frozen.unlink()
+        for record in records:
+            self._push({'name': record.get('name', 'Anon'), 'score': record.get('score', 0)})
+        self._dirty = len(records)
+        if self._journal is None:
+            self._journal = self.journal_path.open('a', encoding='utf-8', buffering=1)
+
+    def _push(self, entry: Dict) -> Tuple[bool, bool]:
+        """Add an entry; returns (whether it made the board, whether it is a new best)"""
+        entry = _clean(entry)
+        if entry is None:
+            return False, False
+        best = self.ranks.update(entry['name'], entry['score'])
+        if best:
+            self._bests_changed[entry['name']] = entry['score']
+        item = (entry['score'], -next(self._seq), entry)
+        if len(self._heap) < self.size:
+            heapq.heappush(self._heap, item)
+            return True, best
+        return heapq.heappushpop(self._heap, item) is not item, best
+
+    def submit(self, name: str, score: int) -> bool:
+        """Record a score; returns True if it made the board"""
+        return self.submit_many([(name, score)]) == 1
+
+    def submit_many(self, scores) -> int:
+        """Record (name, score) pairs in one pass; returns how many made the board"""
+        lines = []
+        made = 0
+        with self._lock:
+            for name, score in scores:
+                entry = {'name': name, 'score': score}
+                on_board, best = self._push(entry)
+                made += on_board
+                if on_board or best:
+                    # a new best below the board still has to survive a crash
+                    lines.append(json.dumps(entry, ensure_ascii=self.ensure_ascii) + '\n')
+            if lines:
+                if self._journal is not None:
+                    self._journal.write(''.join(lines))
+                self._dirty += len(lines)
+            if made:
+                self._version += 1
+            due = self._dirty >= self.flush_every
+        if due:
+            if self._thread is not None:
+                self._wake.set()
+            else:
+                self.flush()
+        return made
+
+    def version(self) -> str:
+        """Opaque token that changes whenever the board changes"""
+        return f"{self._instance}-{self._version}"
+
+    def rank(self, name: str) -> Optional[Dict]:
+        """Best score and rank of a player, or None if they are unknown"""
+        with self._lock:
+            return _rank_entry(self.ranks, name)
+
+    def around(self, name: str, window: int = 10) -> Optional[List[Dict]]:
+        """Players ranked up to ``window`` places either side of ``name``"""
+        with self._lock:
+            return self.ranks.around(name, window)
+
+    def entries(self) -> List[Dict]:
+        """Current board, best score first"""
+        with self._lock, timed('score_sort'):
+            items = sorted(self._heap, reverse=True)
+        return [entry for _, _, entry in items]
+
+    def _serialize(self, heap) -> bytes:
+        entries = [entry for _, _, entry in sorted(heap, reverse=True)]
+        return json.dumps(entries, ensure_ascii=self.ensure_ascii, indent=2).encode('utf-8')
+
+    @staticmethod
+    def _digest(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def flush(self) -> bool:
+        """Write the board to disk if anything changed since the last flush
+
+        In journal mode this compacts the journal into a new snapshot.
+        """
+        with self._flush_lock:
+            frozen = None
+            with self._lock:
+                if not self._dirty and not self._bests_changed:
+                    return True
+                dirty = self._dirty
+                self._dirty = 0
+                data = self._serialize(self._heap)
+                # only swap and copy under the lock; serializing a million
+                # players would block every submit and read
+                changed, self._bests_changed = self._bests_changed, {}
+                snapshot = None
+                if changed and self._bests_logged + len(changed) > max(BESTS_COMPACT_MIN, len(self.ranks)):
+                    snapshot = self.ranks.snapshot()
+                if self._journal is not None:
+                    # Freeze the current segment; new submissions go to a
+                    # fresh journal based on the snapshot we are about to write.
+                    frozen = self._frozen_path()
+                    self._journal.close()
+                    if frozen.exists():
+                        # left over from a failed compaction: keep its records
+                        with frozen.open('ab') as out:
+                            out.write(self.journal_path.read_bytes())
+                        self.journal_path.unlink()
+                    else:
+                        os.replace(self.journal_path, frozen)
+                    self._journal = self.journal_path.open('a', encoding='utf-8', buffering=1)
+                    self._journal.write(json.dumps({'base': self._digest(data)}) + '\n')
+            try:
+                with timed('score_save'):
+                    self._save_bests(changed, snapshot)
+                    write_atomic(self.path, data)
+            except Exception as e:
+                print('Failed to save scores:', e)
+                with self._lock:
+                    self._dirty += dirty
+                    # bests only grow, so newer entries win
+                    changed.update(self._bests_changed)
+                    self._bests_changed = changed
+                return False
+            if frozen is not None:
+                frozen.unlink()
+            return True
+
+    def _save_bests(self, changed: Dict, snapshot):
+        """Append the changed bests to the log, or compact everything into the bests file"""
+        if snapshot is not None:
+            pairs = self.ranks.items(snapshot)
+            write_atomic(self.bests_path, json.dumps(pairs, ensure_ascii=self.ensure_ascii).encode('utf-8'))
+            # the snapshot holds everything the log did
+            try:
+                self.bests_log_path.unlink()
+            except FileNotFoundError:
+                pass
+            self._bests_logged = 0
+        elif changed:
+            lines = ''.join(json.dumps([name, score], ensure_ascii=self.ensure_ascii) + '\n'
+                            for name, score in changed.items())
+            with self.bests_log_path.open('a', encoding='utf-8') as f:
+                f.write(lines)
+            self._bests_logged += len(changed)
+
+    def start(self):
+        """Start the background flusher and flush again at shutdown"""
+        if self._thread is not None:
+            return self
+        if self.flush_interval:
+            self._thread = threading.Thread(target=self._run, name='leaderboard-flush', daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+        return self
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        """Stop the flusher and write out any pending changes"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+
+class SQLiteLeaderboard:
+    """Leaderboard stored in SQLite, safe to share between processes
+
+    Every score is kept; the board is the top ``size`` rows by score, read
+    with ``ORDER BY score DESC LIMIT`` against an index. The database runs in
+    WAL mode so readers never block the single writer. Each process keeps one
+    connection, shared by its threads behind a lock, so a server that starts
+    a thread per request does not open a connection per request.
+    """
+
+    def __init__(self, path, size: int = 100, timeout: float = 30.0):
+        self.path = Path(path)
+        self.size = size
+        self.timeout = timeout
+        self._conn = None
+        self._lock = threading.Lock()
+        self.ranks = RankIndex()
+        self._ranks_synced = 0
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS scores ('
+                    'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                    'name TEXT NOT NULL, '
+                    'score INTEGER NOT NULL)'
+                )
+                # id breaks ties so earlier submissions rank higher, as before
+                conn.execute('CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC, id)')
+            # WAL is a property of the database file; it only has to be set once
+            if conn.execute('PRAGMA journal_mode').fetchone()[0].lower() != 'wal':
+                conn.execute('PRAGMA journal_mode=WAL')
+
+    def _connect(self) -> sqlite3.Connection:
+        # callers hold self._lock: the connection is shared between threads
+        if self._conn is None:
+            self._conn = sqlite3.connect(str(self.path), timeout=self.timeout, check_same_thread=False)
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+        return self._conn
+
+    def submit(self, name: str, score: int) -> bool:
+        """Record a score; returns True once it is committed"""
+        return self.submit_many([(name, score)]) == 1
+
+    def submit_many(self, scores) -> int:
+        """Record (name, score) pairs in one transaction; returns rows added"""
+        rows = list(scores)
+        with timed('score_save'), self._lock, self._connect() as conn:
+            conn.executemany('INSERT INTO scores (name, score) VALUES (?, ?)', rows)
+        return len(rows)
+
+    def entries(self) -> List[Dict]:
+        """Current board, best score first"""
+        with timed('score_load'), self._lock:
+            rows = self._connect().execute(
+                'SELECT name, score FROM scores ORDER BY score DESC, id LIMIT ?', (self.size,)
+            ).fetchall()
+        return [{'name': name, 'score': score} for name, score in rows]
+
+    def version(self) -> str:
+        """Opaque token that changes whenever the board changes
+
+        Rows are never deleted, so the newest row id moves with every
+        insert from any process.
+        """
+        with self._lock:
+            return str(self._connect().execute('SELECT MAX(id) FROM scores').fetchone()[0] or 0)
+
+    def _sync_ranks(self):
+        # pick up rows written since the last lookup, by any process
+        rows = self._connect().execute(
+            'SELECT id, name, score FROM scores WHERE id > ? ORDER BY id', (self._ranks_synced,)
+        )
+        for row_id, name, score in rows:
+            # rows from before scores were range-checked are left out
+            if MIN_SCORE <= score <= MAX_SCORE:
+                self.ranks.update(name, score)
+            self._ranks_synced = row_id
+
+    def rank(self, name: str) -> Optional[Dict]:
+        """Best score and rank of a player, or None if they are unknown"""
+        with self._lock:
+            self._sync_ranks()
+            return _rank_entry(self.ranks, name)
+
+    def around(self, name: str, window: int = 10) -> Optional[List[Dict]]:
+        """Players ranked up to ``window`` places either side of ``name``"""
+        with self._lock:
+            self._sync_ranks()
+            return self.ranks.around(name, window)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connect().execute('SELECT COUNT(*) FROM scores').fetchone()[0]
+
+    def import_json(self, json_path) -> Tuple[int, int]:
+        """Load a high_scores.json board in one transaction; returns (rows added, entries skipped)"""
+        with open(json_path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        rows = []
+        for entry in entries if isinstance(entries, list) else ():
+            entry = _clean(entry) if isinstance(entry, dict) else None
+            if entry is not None:
+                rows.append((entry['name'], entry['score']))
+        skipped = (len(entries) if isinstance(entries, list) else 0) - len(rows)
+        return self.submit_many(rows), skipped
+
+    def flush(self) -> bool:
+        # every submission is already committed
+        return True
+
+    def start(self):
+        atexit.register(self.close)
+        return self
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def _clean(entry: Dict) -> Optional[Dict]:
+    """``entry`` as {'name': str, 'score': int}, or None without a usable score"""
+    try:
+        score = int(entry.get('score', 0))
+    except (TypeError, ValueError, OverflowError):
+        return None
+    if not MIN_SCORE <= score <= MAX_SCORE:
+        return None
+    return {'name': str(entry.get('name', 'Anon')), 'score': score}
+
+
+def _rank_entry(ranks: RankIndex, name: str) -> Optional[Dict]:
+    rank = ranks.rank(name)
+    if rank is None:
+        return None
+    return {'name': name, 'score': ranks.score(name), 'rank': rank, 'players': len(ranks)}
+
+
+def open_leaderboard(path, backend: str = 'json', size: int = 100, db_path=None, **options):
+    """Create the leaderboard backend the apps were configured with
+
+    ``backend`` is ``'json'`` for the in-process board persisted to ``path``
+    (``options`` are passed to ``Leaderboard``) or ``'sqlite'`` for a database
+    at ``db_path``, defaulting to ``path`` with a ``.db`` suffix.
+    """
+    if backend == 'sqlite':
+        return SQLiteLeaderboard(db_path or Path(path).with_suffix('.db'), size=size)
+    if backend != 'json':
+        raise ValueError(f"unknown leaderboard backend: {backend!r}")
+    return Leaderboard(path, size=size, **options)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Leaderboard storage tools')
+    sub = parser.add_subparsers(dest='command', required=True)
+    imp = sub.add_parser('import', help='Import a high_scores.json board into SQLite')
+    imp.add_argument('json_path', nargs='?', default='high_scores.json')
+    imp.add_argument('--db', default='high_scores.db', help='SQLite database file')
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        board = SQLiteLeaderboard(args.db)
+        added, skipped = board.import_json(args.json_path)
+        print(f"Imported {added} scores into {args.db} ({board.count()} total)"
+              + (f", skipped {skipped} unusable entries" if skipped else ''))
+        board.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""
+Prometheus-style metrics shared by app.py and game_server.py.
+
+``install(app)`` adds request hooks that count requests per route, method and
+status, track in-flight requests and record latency histograms with fixed
+buckets, and registers ``GET /metrics`` serving the Prometheus text format.
+``timed(name)`` times internal hot spots (score load/sort/save, webhook HMAC
+checks, JWT signing) into ``app_operation_duration_seconds``.
+
+Every thread writes to its own shard of plain dicts, so recording a sample
+takes no lock; shards are only merged when ``/metrics`` is scraped.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Registry:
+    """Counters, gauges and histograms, sharded per thread"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self._local = threading.local()
+        self._shards = []       # (thread, shard) for live threads
+        self._retired = self._new_shard()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _new_shard() -> Dict:
+        return {'counter': {}, 'gauge': {}, 'histogram': {}}
+
+    def _shard(self) -> Dict:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = self._new_shard()
+            with self._lock:
+                # servers that start a thread per request would otherwise
+                # leave one shard behind per request
+                self._retire_dead()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _retire_dead(self):
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                for kind in shard:
+                    _merge(self._retired[kind], shard[kind])
+        self._shards = live
+
+    def inc(self, name: str, labels: Tuple = (), value: float = 1.0):
+        counters = self._shard()['counter']
+        key = (name, labels)
+        counters[key] = counters.get(key, 0.0) + value
+
+    def gauge_add(self, name: str, labels: Tuple = (), value: float = 1.0):
+        gauges = self._shard()['gauge']
+        key = (name, labels)
+        gauges[key] = gauges.get(key, 0.0) + value
+
+    def observe(self, name: str, labels: Tuple, seconds: float):
+        histograms = self._shard()['histogram']
+        key = (name, labels)
+        h = histograms.get(key)
+        if h is None:
+            # one slot per bucket plus +Inf, then sum
+            h = histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        h[bisect_left(self.buckets, seconds)] += 1
+        h[-1] += seconds
+
+    def _merged(self, kind: str) -> Dict:
+        with self._lock:
+            self._retire_dead()
+            merged = _merge({}, self._retired[kind])
+            shards = [shard for _, shard in self._shards]
+        for shard in shards:
+            # dict.copy() is atomic, so a thread writing meanwhile is harmless
+            _merge(merged, shard[kind].copy())
+        return merged
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for kind, merged in (('counter', self._merged('counter')), ('gauge', self._merged('gauge'))):
+            for name in sorted({name for name, _ in merged}):
+                lines.append(f'# TYPE {name} {kind}')
+                for (n, labels), value in sorted(merged.items()):
+                    if n == name:
+                        lines.append(f'{name}{_labels(labels)} {_number(value)}')
+        merged = self._merged('histogram')
+        for name in sorted({name for name, _ in merged}):
+            lines.append(f'# TYPE {name} histogram')
+            for (n, labels), h in sorted(merged.items()):
+                if n != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), h):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else _number(bound)
+                    lines.append(f'{name}_bucket{_labels(labels + (("le", le),))} {cumulative}')
+                lines.append(f'{name}_sum{_labels(labels)} {_number(h[-1])}')
+                lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+def _merge(into: Dict, values: Dict) -> Dict:
+    for key, value in values.items():
+        if isinstance(value, list):
+            total = into.setdefault(key, [0] * len(value))
+            for i, v in enumerate(value):
+                total[i] += v
+        else:
+            into[key] = into.get(key, 0.0) + value
+    return into
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels: Tuple) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels) + '}'
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+REGISTRY = Registry()
+
+
+@contextmanager
+def timed(operation: str):
+    """Record how long the block takes under app_operation_duration_seconds"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.observe('app_operation_duration_seconds', (('operation', operation),),
+                         time.perf_counter() - start)
+
+
+def install(app, registry: Registry = REGISTRY):
+    """Add request instrumentation and GET /metrics to a Flask app"""
+    from flask import Response, g, request
+
+    def _route() -> str:
+        # the URL rule, not the path, so /rank/<name> stays one series
+        rule = request.url_rule
+        return rule.rule if rule is not None else 'unmatched'
+
+    @app.before_request
+    def _metrics_start():
+        g._metrics_start = time.perf_counter()
+        g._metrics_route = _route()
+        registry.gauge_add('http_requests_in_flight', (('route', g._metrics_route),), 1)
+
+    @app.after_request
+    def _metrics_status(response):
+        g._metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _metrics_finish(exc):
+        start = g.pop('_metrics_start', None)
+        if start is None:
+            return
+        route = g.pop('_metrics_route')
+        status = g.pop('_metrics_status', 500)
+        labels = (('route', route), ('method', request.method))
+        registry.gauge_add('http_requests_in_flight', (('route', route),), -1)
+        registry.inc('http_requests_total', labels + (('status', str(status)),))
+        registry.observe('http_request_duration_seconds', labels, time.perf_counter() - start)
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+    return app
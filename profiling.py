@@ -0,0 +1,361 @@
+"""
+Sampled profiling for app.py, game_server.py and the scraper.
+
+``install(app)`` is a no-op unless ``PROFILE_EVERY`` or ``PROFILE_SLOW_MS``
+is set, so requests pay nothing while profiling is off. When it is on, two
+kinds of data are collected per route (the URL rule, as in metrics.py):
+
+  * one request in ``PROFILE_EVERY`` of each route runs under the route's
+    cProfile profiler, which adds up its runs, so nothing is converted
+    until the stats are read. Counting per route keeps routes whose
+    requests alternate from never being sampled. Only one request is
+    profiled at a time; requests that come up for sampling meanwhile are
+    skipped.
+  * a sampler thread wakes every ``PROFILE_INTERVAL_MS`` and records the
+    Python stack of every request that is being profiled or has been
+    running for longer than ``PROFILE_SLOW_MS``. Stacks are kept in the
+    collapsed format ("outer;inner;leaf count") read by flamegraph.pl and
+    speedscope.
+
+Memory stays bounded: each route keeps at most ``PROFILE_MAX_STACKS``
+distinct stacks (later ones are counted as "[truncated]") of at most
+MAX_DEPTH frames, and pstats totals grow only with the number of functions.
+
+``GET /admin/profile`` summarizes the routes; ``/admin/profile/collapsed``
+and ``/admin/profile/pstats`` serve the data (``?route=`` for one route),
+and ``POST /admin/profile/reset`` clears it. They require
+``Authorization: Bearer $PROFILE_TOKEN`` and answer 404 while
+``PROFILE_TOKEN`` is unset. ``PROFILE_LOCALHOST=1`` opts in to serving them
+to 127.0.0.1/::1 without a token instead; behind a reverse proxy on the same
+host every client looks local, so do not combine the two.
+
+``Profiler.profile()`` profiles any block of code the same way, e.g.
+``sap_press_scraper.py --profile`` around ``scrape_all_books``.
+"""
+
+import cProfile
+import hmac
+import io
+import itertools
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Optional
+
+MAX_DEPTH = 64
+TRUNCATED = '[truncated]'
+
+
+class RouteProfile:
+    """What has been collected for one route"""
+
+    def __init__(self):
+        self.requests = 0
+        self.profiled = 0
+        self.slow = 0
+        self.samples = 0
+        self.counter = itertools.count(1)   # picks every PROFILE_EVERY-th request
+        # enabled only for the sampled requests; cProfile adds up the runs itself
+        self.profile = cProfile.Profile()
+        self.stacks: Dict[str, int] = {}
+
+    def summary(self) -> Dict:
+        return {'requests': self.requests, 'profiled': self.profiled, 'slow': self.slow,
+                'samples': self.samples, 'stacks': len(self.stacks)}
+
+
+@lru_cache(maxsize=4096)
+def _frame_name(code) -> str:
+    # the path below its sys.path entry, so flask/app.py and our app.py differ
+    filename = code.co_filename
+    for root in sorted((p for p in sys.path if p), key=len, reverse=True):
+        if filename.startswith(root.rstrip(os.sep) + os.sep):
+            filename = filename[len(root.rstrip(os.sep)) + 1:]
+            break
+    return f"{filename}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def merge_stats(into: Dict, stats: Dict):
+    """Add raw cProfile stats (a pstats.Stats.stats dict) to ``into``"""
+    for func, (cc, nc, tt, ct, callers) in stats.items():
+        total = into.get(func)
+        if total is None:
+            into[func] = (cc, nc, tt, ct, dict(callers))
+        else:
+            into[func] = (total[0] + cc, total[1] + nc, total[2] + tt, total[3] + ct,
+                          pstats.add_callers(total[4], callers))
+
+
+class _Snapshot:
+    """Raw stats in the shape pstats.Stats loads profiles from"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def collapse(frame, depth: int = MAX_DEPTH) -> str:
+    """The stack ending at ``frame``, outermost first, joined with ';'"""
+    names = []
+    while frame is not None and len(names) < depth:
+        names.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class Profiler:
+    """Profiles a sample of requests (or blocks of code) and aggregates them per key"""
+
+    def __init__(self, every: int = 0, slow_ms: float = 0.0, interval_ms: float = 10.0,
+                 max_stacks: int = 2000):
+        self.every = every
+        self.slow = slow_ms / 1000.0
+        self.interval = interval_ms / 1000.0
+        self.max_stacks = max_stacks
+        self.routes: Dict[str, RouteProfile] = {}
+        self._lock = threading.Lock()
+        # cProfile runs one request at a time (and from 3.12 on only one
+        # profiler can be active in the whole process)
+        self._cprofile = threading.Lock()
+        self._active = {}   # thread id -> (key, start, profile, all threads)
+        self._sampler = None
+        self._sampler_lock = threading.Lock()
+
+    def _route(self, key: str) -> RouteProfile:
+        route = self.routes.get(key)
+        if route is None:
+            route = self.routes[key] = RouteProfile()
+        return route
+
+    def start(self, key: str, force: bool = False, all_threads: bool = False):
+        """Start watching the current thread for ``key``; pass the result to finish()
+
+        The block is run under cProfile when ``force`` is set or it is the
+        PROFILE_EVERY-th for ``key``, and the profiler is free.
+        ``all_threads`` samples the stacks of every thread, not just this one.
+        """
+        profile = None
+        if not force and self.every:
+            route = self.routes.get(key)
+            if route is None:
+                with self._lock:
+                    route = self._route(key)
+            force = next(route.counter) % self.every == 0
+        if force:
+            if self._cprofile.acquire(blocking=False):
+                with self._lock:
+                    profile = self._route(key).profile
+                profile.enable()
+        entry = (key, time.perf_counter(), profile, all_threads)
+        self._active[threading.get_ident()] = entry
+        if self._sampler is None and self.interval > 0 and (self.slow or profile is not None):
+            self._start_sampler()
+        return entry
+
+    def finish(self, entry):
+        key, start, profile, _ = entry
+        elapsed = time.perf_counter() - start
+        self._active.pop(threading.get_ident(), None)
+        if profile is not None:
+            profile.disable()
+            self._cprofile.release()
+        with self._lock:
+            route = self._route(key)
+            route.requests += 1
+            if self.slow and elapsed >= self.slow:
+                route.slow += 1
+            if profile is not None:
+                route.profiled += 1
+
+    @contextmanager
+    def profile(self, key: str, all_threads: bool = False):
+        """Profile the block with cProfile and the stack sampler"""
+        entry = self.start(key, force=True, all_threads=all_threads)
+        try:
+            yield self
+        finally:
+            self.finish(entry)
+
+    def _start_sampler(self):
+        with self._sampler_lock:
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample, name='profile-sampler', daemon=True)
+                self._sampler.start()
+
+    def _sample(self):
+        me = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            if not self._active:
+                continue
+            now = time.perf_counter()
+            frames = sys._current_frames()
+            for ident, (key, start, profile, all_threads) in list(self._active.items()):
+                if profile is None and not (self.slow and now - start >= self.slow):
+                    continue
+                idents = [i for i in frames if i != me] if all_threads else [ident]
+                stacks = [collapse(frames[i]) for i in idents if i in frames]
+                self._record(key, stacks)
+            del frames
+
+    def _record(self, key, stacks):
+        with self._lock:
+            route = self._route(key)
+            for stack in stacks:
+                route.samples += 1
+                if stack not in route.stacks and len(route.stacks) >= self.max_stacks:
+                    stack = TRUNCATED
+                route.stacks[stack] = route.stacks.get(stack, 0) + 1
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {key: route.summary() for key, route in sorted(self.routes.items())}
+
+    def collapsed(self, key: Optional[str] = None) -> str:
+        """Collapsed stacks of one route, or of all of them under their route name"""
+        with self._lock:
+            if key is not None:
+                route = self.routes.get(key)
+                lines = [f'{stack} {n}' for stack, n in (route.stacks.items() if route else ())]
+            else:
+                lines = [f'{name};{stack} {n}' for name, route in self.routes.items()
+                         for stack, n in route.stacks.items()]
+        return '\n'.join(sorted(lines)) + ('\n' if lines else '')
+
+    def stats(self, key: Optional[str] = None) -> Optional[pstats.Stats]:
+        """pstats totals of one route or of all routes, None before anything was profiled"""
+        merged = {}
+        # create_stats() disables the profile, so wait until no request is using one
+        with self._cprofile, self._lock:
+            for name, route in self.routes.items():
+                if key in (None, name) and route.profiled:
+                    route.profile.create_stats()
+                    merge_stats(merged, route.profile.stats)
+        if not merged:
+            return None
+        return pstats.Stats(_Snapshot(merged), stream=io.StringIO())
+
+    def pstats_text(self, key: Optional[str] = None, sort: str = 'cumulative', limit: int = 40) -> Optional[str]:
+        stats = self.stats(key)
+        if stats is None:
+            return None
+        stats.stream = io.StringIO()
+        stats.sort_stats(sort).print_stats(limit)
+        return stats.stream.getvalue()
+
+    def pstats_dump(self, key: Optional[str] = None) -> Optional[bytes]:
+        """The stats in the format of Stats.dump_stats, readable with pstats.Stats(path)"""
+        stats = self.stats(key)
+        return None if stats is None else marshal.dumps(stats.stats)
+
+    def write(self, prefix: str):
+        """Write <prefix>.pstats and <prefix>.collapsed; returns the paths written"""
+        paths = []
+        dump = self.pstats_dump()
+        if dump is not None:
+            with open(prefix + '.pstats', 'wb') as f:
+                f.write(dump)
+            paths.append(prefix + '.pstats')
+        with open(prefix + '.collapsed', 'w', encoding='utf-8') as f:
+            f.write(self.collapsed())
+        paths.append(prefix + '.collapsed')
+        return paths
+
+    def reset(self):
+        with self._cprofile, self._lock:
+            self.routes = {}
+
+
+def from_env(environ=os.environ) -> Optional[Profiler]:
+    """A Profiler configured from PROFILE_* variables, or None when profiling is off"""
+    every = int(environ.get('PROFILE_EVERY', 0))
+    slow_ms = float(environ.get('PROFILE_SLOW_MS', 0))
+    if every <= 0 and slow_ms <= 0:
+        return None
+    return Profiler(every=max(0, every), slow_ms=max(0.0, slow_ms),
+                    interval_ms=float(environ.get('PROFILE_INTERVAL_MS', 10)),
+                    max_stacks=int(environ.get('PROFILE_MAX_STACKS', 2000)))
+
+
+def install(app, profiler: Optional[Profiler] = None) -> Optional[Profiler]:
+    """Add sampled profiling and the /admin/profile endpoints to a Flask app
+
+    ``profiler`` defaults to one configured from the environment. Nothing is
+    installed, and None is returned, when profiling is off.
+    """
+    profiler = profiler or from_env()
+    if profiler is None:
+        return None
+    from flask import Response, abort, g, jsonify, request
+
+    token = os.environ.get('PROFILE_TOKEN')
+    localhost = os.environ.get('PROFILE_LOCALHOST', '') == '1'
+
+    def _check_access():
+        if token:
+            if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+                abort(401)
+        elif not localhost:
+            abort(404)
+        elif request.remote_addr not in ('127.0.0.1', '::1'):
+            abort(403)
+
+    @app.before_request
+    def _profile_start():
+        rule = request.url_rule
+        route = rule.rule if rule is not None else 'unmatched'
+        if not route.startswith('/admin/profile'):
+            g._profile = profiler.start(route)
+
+    @app.teardown_request
+    def _profile_finish(exc):
+        entry = g.pop('_profile', None)
+        if entry is not None:
+            profiler.finish(entry)
+
+    @app.route('/admin/profile')
+    def profile_summary():
+        _check_access()
+        return jsonify({'every': profiler.every, 'slow_ms': profiler.slow * 1000,
+                        'interval_ms': profiler.interval * 1000, 'routes': profiler.summary()})
+
+    @app.route('/admin/profile/collapsed')
+    def profile_collapsed():
+        _check_access()
+        return Response(profiler.collapsed(request.args.get('route')), mimetype='text/plain')
+
+    @app.route('/admin/profile/pstats')
+    def profile_pstats():
+        _check_access()
+        route = request.args.get('route')
+        if request.args.get('format') == 'text':
+            try:
+                limit = max(0, int(request.args.get('limit', 40)))
+            except ValueError:
+                return jsonify({'error': 'limit must be an integer'}), 400
+            sort = request.args.get('sort', 'cumulative')
+            if sort not in pstats.Stats.sort_arg_dict_default:
+                return jsonify({'error': 'unknown sort key'}), 400
+            body = profiler.pstats_text(route, sort=sort, limit=limit)
+            mimetype = 'text/plain'
+        else:
+            body = profiler.pstats_dump(route)
+            mimetype = 'application/octet-stream'
+        if body is None:
+            return jsonify({'error': 'no profiled requests yet'}), 404
+        return Response(body, mimetype=mimetype)
+
+    @app.route('/admin/profile/reset', methods=['POST'])
+    def profile_reset():
+        _check_access()
+        profiler.reset()
+        return '', 204
+
+    return profiler
@@ -0,0 +1,206 @@
+"""
+Per-player best scores with logarithmic rank lookups.
+
+``RankIndex`` keeps every player's best score in an order-statistics index so
+the apps can answer "you are #4,812" and "who is around me" without scanning
+the whole history. Each player is one unsigned 64-bit key packed from their
+score and player id, stored in sorted ``array('Q')`` blocks, so scores must
+fit in a signed 32-bit integer (MIN_SCORE..MAX_SCORE); callers reject the
+rest rather than store a different value. A Fenwick tree over the
+block sizes turns a key into its position and a position back into a key in
+O(log n), and the arrays keep the index at a few dozen bytes per player on
+top of the name itself.
+
+The index is not thread-safe; callers hold their own lock.
+"""
+
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+SEQ_BITS = 32
+MAX_SCORE = (1 << 31) - 1
+MIN_SCORE = -(1 << 31)
+
+
+class RankIndex:
+    """Best score per player, ordered best first"""
+
+    def __init__(self, load: int = 512):
+        self.load = load
+        self._ids = {}              # name -> player id
+        self._names = []            # player id -> name
+        self._keys = array('Q')     # player id -> current key
+        self._blocks = []           # sorted arrays of keys
+        self._maxes = []            # last key of each block
+        self._tree = [0]            # Fenwick tree over block sizes, 1-based
+
+    @staticmethod
+    def _key(score: int, pid: int) -> int:
+        # Higher scores sort first; equal scores keep registration order.
+        if not MIN_SCORE <= score <= MAX_SCORE:
+            raise ValueError(f'score {score} outside {MIN_SCORE}..{MAX_SCORE}')
+        return ((MAX_SCORE - score) << SEQ_BITS) | pid
+
+    @staticmethod
+    def _score(key: int) -> int:
+        return MAX_SCORE - (key >> SEQ_BITS)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name) -> bool:
+        return name in self._ids
+
+    def update(self, name: str, score: int) -> bool:
+        """Record a score; returns True if it is the player's new best"""
+        pid = self._ids.get(name)
+        if pid is None:
+            pid = len(self._names)
+            if pid >> SEQ_BITS:
+                raise OverflowError('too many players for RankIndex')
+            key = self._key(score, pid)
+            self._ids[name] = pid
+            self._names.append(name)
+            self._keys.append(key)
+            self._insert(key)
+            return True
+        old = self._keys[pid]
+        key = self._key(score, pid)
+        if key >= old:
+            return False
+        self._remove(old)
+        self._insert(key)
+        self._keys[pid] = key
+        return True
+
+    def snapshot(self) -> Tuple[List[str], array]:
+        """Copies of the names and keys for items(); cheap enough to take under a lock"""
+        return self._names[:], self._keys[:]
+
+    def items(self, snapshot=None) -> List:
+        """(name, best score) for every player, in the order they were first seen
+
+        Pass a snapshot() to build the list without holding the caller's lock.
+        """
+        names, keys = snapshot or (self._names, self._keys)
+        return [(name, self._score(key)) for name, key in zip(names, keys)]
+
+    def score(self, name: str) -> Optional[int]:
+        pid = self._ids.get(name)
+        return None if pid is None else self._score(self._keys[pid])
+
+    def rank(self, name: str) -> Optional[int]:
+        """1-based rank; players with the same score share a rank"""
+        pid = self._ids.get(name)
+        if pid is None:
+            return None
+        return self._rank_of(self._keys[pid])
+
+    def _rank_of(self, key: int) -> int:
+        # one more than the number of players with a strictly higher score
+        return self._index((key >> SEQ_BITS) << SEQ_BITS) + 1
+
+    def around(self, name: str, window: int = 10) -> Optional[List[Dict]]:
+        """Up to ``window`` players either side of ``name``, best first"""
+        pid = self._ids.get(name)
+        if pid is None:
+            return None
+        pos = self._index(self._keys[pid])
+        return self.slice(max(0, pos - window), pos + window + 1)
+
+    def slice(self, start: int, stop: int) -> List[Dict]:
+        """Players at positions [start, stop), best first"""
+        stop = min(stop, len(self._names))
+        out = []
+        if start >= stop:
+            return out
+        b, pos = self._locate(start)
+        rank, last_score = None, None
+        remaining = stop - start
+        while remaining and b < len(self._blocks):
+            block = self._blocks[b]
+            for key in block[pos:pos + remaining]:
+                score = self._score(key)
+                if score != last_score:
+                    rank, last_score = self._rank_of(key), score
+                out.append({'rank': rank, 'name': self._names[key & ((1 << SEQ_BITS) - 1)],
+                            'score': score})
+            remaining -= min(remaining, len(block) - pos)
+            b, pos = b + 1, 0
+        return out
+
+    # -- blocked sorted list ----------------------------------------------
+
+    def _insert(self, key: int):
+        if not self._blocks:
+            self._blocks.append(array('Q', [key]))
+            self._maxes.append(key)
+            self._rebuild()
+            return
+        b = bisect_left(self._maxes, key)
+        if b == len(self._blocks):
+            b -= 1
+        block = self._blocks[b]
+        block.insert(bisect_left(block, key), key)
+        self._maxes[b] = block[-1]
+        if len(block) > 2 * self.load:
+            self._blocks.insert(b + 1, block[self.load:])
+            del block[self.load:]
+            self._maxes.insert(b, block[-1])
+            self._rebuild()
+        else:
+            self._add(b, 1)
+
+    def _remove(self, key: int):
+        b = bisect_left(self._maxes, key)
+        block = self._blocks[b]
+        del block[bisect_left(block, key)]
+        if block:
+            self._maxes[b] = block[-1]
+            self._add(b, -1)
+        else:
+            del self._blocks[b]
+            del self._maxes[b]
+            self._rebuild()
+
+    def _index(self, key: int) -> int:
+        """Number of stored keys smaller than ``key``"""
+        b = bisect_left(self._maxes, key)
+        if b == len(self._blocks):
+            return len(self._names)
+        return self._prefix(b) + bisect_left(self._blocks[b], key)
+
+    def _rebuild(self):
+        tree = [0] * (len(self._blocks) + 1)
+        for i, block in enumerate(self._blocks, 1):
+            tree[i] += len(block)
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _add(self, b: int, delta: int):
+        i = b + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, b: int) -> int:
+        """Total size of blocks before block ``b``"""
+        total = 0
+        while b:
+            total += self._tree[b]
+            b -= b & -b
+        return total
+
+    def _locate(self, pos: int):
+        """(block, offset) holding the key at position ``pos``"""
+        b, step = 0, 1 << (len(self._tree).bit_length() - 1)
+        while step:
+            nxt = b + step
+            if nxt < len(self._tree) and self._tree[nxt] <= pos:
+                b = nxt
+                pos -= self._tree[nxt]
+            step >>= 1
+        return b, pos
@@ -7,9 +7,123 @@ import requests
 from bs4 import BeautifulSoup
 import json
 import csv
+import re
 from typing import List, Dict, Optional
+import threading
 import time
-from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
+from requests.adapters import HTTPAdapter
+
+from catalog_index import build_index
+from catalog_stream import CSV_FIELDS, TOPIC_FIELDS, CatalogWriter
+from http_cache import ResponseCache
+from keyword_matcher import matcher_for
+from profiling import Profiler
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:  # optional: the stdlib parser is several times slower
+    HTML_PARSER = 'html.parser'
+
+# Responses worth retrying after a pause
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Book links look like /some-title_1234/
+BOOK_HREF = re.compile(r'^/.*_\d+/+$', re.S)
+# Link texts of book links that aren't the title
+NON_TITLES = {'More about the book', 'Cover'}
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` requests per second, shared between threads"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            # Take the token even if it isn't there yet; the debt is the wait
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+
+class Paginator:
+    """Finds the URL of the next catalog page
+
+    Prefers a ``rel="next"`` or pager link on the current page. Otherwise it
+    tries the known URL patterns until one works, and from then on builds
+    page URLs from the template of the URL that worked.
+    """
+
+    NEXT_TEXT = {'next', 'next page', '\u203a', '\u00bb', '>', '>>'}
+
+    def __init__(self, base_url: str, patterns: List[str]):
+        self.base_url = base_url
+        self.patterns = patterns
+        self.template = None   # e.g. "https://host/?page={n}" once known
+
+    def next_link(self, soup: BeautifulSoup, page_url: str) -> Optional[str]:
+        """Absolute URL of the next page linked from `soup`, if any"""
+        tag = soup.find(['link', 'a'], rel='next', href=True)
+        if tag is None:
+            for a in soup.find_all('a', href=True):
+                classes = ' '.join(a.get('class', [])).lower()
+                label = (a.get('aria-label') or a.get_text(strip=True)).lower()
+                if re.search(r'\bnext\b', classes) or label in self.NEXT_TEXT:
+                    tag = a
+                    break
+        if tag is None:
+            return None
+        return urljoin(page_url, tag['href'])
+
+    def candidates(self, page_num: int) -> List[str]:
+        """URLs to try for `page_num` when the page links to no next page"""
+        if self.template is not None:
+            return [self.template.format(n=page_num)]
+        return [pattern.format(base=self.base_url, n=page_num) for pattern in self.patterns]
+
+    def url(self, page_num: int) -> str:
+        return self.template.format(n=page_num)
+
+    def found(self, url: str, page_num: int):
+        """Remember `url` as the address of `page_num`"""
+        if self.template is None:
+            self.template = url_template(url, page_num)
+
+
+def _first_tag(container, name: str):
+    """Same as container.find(name), without bs4's generic filter machinery"""
+    for element in container.descendants:
+        if element.name == name:
+            return element
+    return None
+
+
+def url_template(url: str, page_num: int) -> Optional[str]:
+    """`url` with the last occurrence of `page_num` replaced by ``{n}``"""
+    matches = list(re.finditer(r'(?<!\d)%d(?!\d)' % page_num, url))
+    if not matches:
+        return None
+    m = matches[-1]
+    return _escape_braces(url[:m.start()]) + '{n}' + _escape_braces(url[m.end():])
+
+
+def _escape_braces(text: str) -> str:
+    return text.replace('{', '{{').replace('}', '}}')
 
 
 class SAPPressScraper:
@@ -23,148 +137,326 @@ class SAPPressScraper:
         'ai-powered', 'generative ai', 'llm', 'algorithm', 'automation',
         'intelligent', 'cognitive'
     ]
+
+    # Keyword lists selectable with --topic
+    TOPICS = {
+        'ai': AI_KEYWORDS,
+    }
+
+    # Common pagination URL patterns for websites, tried in order
+    PAGE_PATTERNS = [
+        "{base}/?page={n}",
+        "{base}/page/{n}/",
+        "{base}/?p={n}",
+    ]
     
-    def __init__(self, base_url: str = "https://www.sap-press.com", filter_ai: bool = False):
+    def __init__(self, base_url: str = "https://www.sap-press.com", filter_ai: bool = False,
+                 workers: int = 1, rate: float = 1.0, max_retries: int = 3, backoff: float = 1.0,
+                 cache: Optional[ResponseCache] = None, offline: bool = False,
+                 keywords: Optional[List[str]] = None, min_score: int = 1):
         self.base_url = base_url
         self.books = []
         self.filter_ai = filter_ai
+        # Books are kept when they score at least `min_score` on these keywords
+        self.keywords = keywords or (self.AI_KEYWORDS if filter_ai else None)
+        self.matcher = matcher_for(self.keywords) if self.keywords else None
+        self.min_score = min_score
+        # With a writer, books are streamed to disk page by page instead of kept in self.books
+        self.writer = None
+        self.workers = max(1, workers)
+        self.rate = rate
+        self.max_retries = max_retries
+        self.backoff = backoff
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
+        # One pooled session so pages reuse TCP/TLS connections
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._limiters = {}
+        self._limiters_lock = threading.Lock()
+        self.cache = cache
+        self.offline = offline
+        self.stats = {'requests': 0, 'not_modified': 0, 'offline': 0}
+        self._stats_lock = threading.Lock()
     
     def is_ai_related(self, book_info: Dict) -> bool:
         """Check if a book is related to AI/ML"""
-        text_to_search = f"{book_info['title']} {book_info['description']}".lower()
-        for keyword in self.AI_KEYWORDS:
-            if keyword in text_to_search:
-                return True
-        return False
+        return matcher_for(self.AI_KEYWORDS).score(book_info)['score'] > 0
+
+    def filter_books(self, books: List[Dict]) -> List[Dict]:
+        """Books matching the topic keywords, tagged with their relevance"""
+        if self.matcher is None:
+            return books
+        kept = []
+        for book, result in zip(books, self.matcher.classify(books)):
+            if result['score'] >= self.min_score:
+                book['relevance'] = result['score']
+                book['matched_terms'] = ', '.join(f"{term}:{count}" for term, count in result['terms'].items())
+                kept.append(book)
+        return kept
     
+    def _limiter(self, url: str) -> RateLimiter:
+        """Rate limiter for the host of `url`"""
+        host = urlparse(url).netloc
+        with self._limiters_lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                limiter = self._limiters[host] = RateLimiter(self.rate)
+            return limiter
+
+    def _retry_delay(self, attempt: int, response=None) -> float:
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return float(retry_after)
+        return self.backoff * (2 ** attempt)
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def fetch(self, url: str) -> Optional[bytes]:
+        """Body of `url`, revalidated against the response cache when there is one"""
+        entry = self.cache.get(url) if self.cache is not None else None
+        if self.offline:
+            if entry is None:
+                print(f"Not in cache (offline): {url}")
+                return None
+            self._count('offline')
+            self.cache.touch(url)
+            return entry.body
+
+        headers = entry.conditional_headers() if entry is not None else {}
+        for attempt in range(self.max_retries + 1):
+            self._limiter(url).acquire()
+            self._count('requests')
+            try:
+                response = self.session.get(url, headers=headers, timeout=15)
+            except requests.RequestException as e:
+                if attempt < self.max_retries:
+                    time.sleep(self._retry_delay(attempt))
+                    continue
+                print(f"Error fetching {url}: {e}")
+                return None
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                time.sleep(self._retry_delay(attempt, response))
+                continue
+            if response.status_code == 304 and entry is not None:
+                self._count('not_modified')
+                self.cache.touch(url)
+                return entry.body
+            try:
+                response.raise_for_status()
+            except requests.RequestException as e:
+                print(f"Error fetching {url}: {e}")
+                return None
+            if self.cache is not None and response.status_code == 200:
+                self.cache.put(url, response.content, response.headers)
+            return response.content
+        return None
+
     def fetch_page(self, url: str) -> Optional[BeautifulSoup]:
-        """Fetch and parse a page"""
-        try:
-            response = requests.get(url, headers=self.headers, timeout=15)
-            response.raise_for_status()
-            return BeautifulSoup(response.content, 'html.parser')
-        except requests.RequestException as e:
-            print(f"Error fetching {url}: {e}")
+        """Fetch and parse a page, retrying on 429/5xx and connection errors"""
+        body = self.fetch(url)
+        if body is None:
             return None
-    
-    def extract_books_from_page(self, soup: BeautifulSoup) -> List[Dict]:
+        return BeautifulSoup(body, HTML_PARSER)
+
+    def extract_books_from_page(self, soup: BeautifulSoup, apply_filter: bool = True) -> List[Dict]:
         """Extract book information from a page"""
         books_on_page = []
         seen_urls = set()
-        
-        # Find all links that look like book links (format: /title_id/)
-        all_links = soup.find_all('a', href=True)
-        
-        for link in all_links:
-            try:
-                href = link.get('href', '')
-                # Book links contain an underscore followed by digits at the end
-                # Pattern: /something-something_digits/
-                if href.startswith('/') and '_' in href and href.endswith('/'):
-                    # Extract the ID part
-                    try:
-                        book_id = href.split('_')[-1].rstrip('/')
-                        if book_id.isdigit():
-                            # This looks like a book link
-                            title = link.get_text(strip=True)
-                            if title and title != 'More about the book' and title != 'Cover':
-                                book_url = urljoin(self.base_url, href)
-                                
-                                # Avoid duplicates
-                                if book_url not in seen_urls:
-                                    seen_urls.add(book_url)
-                                    
-                                    # Get the description (usually in a nearby p tag)
-                                    description = ""
-                                    parent = link.find_parent()
-                                    if parent:
-                                        p_tag = parent.find('p')
-                                        if p_tag:
-                                            description = p_tag.get_text(strip=True)
-                                    
-                                    book_info = {
-                                        'title': title.strip(),
-                                        'url': book_url,
-                                        'description': description[:200] + '...' if len(description) > 200 else description
-                                    }
-                                    
-                                    # Apply AI filter if enabled
-                                    if self.filter_ai:
-                                        if self.is_ai_related(book_info):
-                                            books_on_page.append(book_info)
-                                    else:
-                                        books_on_page.append(book_info)
-                    except (IndexError, ValueError):
-                        continue
-            except Exception as e:
+        descriptions = {}   # id(container) -> text of its first <p>
+
+        origin = '{0.scheme}://{0.netloc}'.format(urlparse(self.base_url))
+
+        # Book links end in an underscore and digits: /something-something_1234/
+        # (matching href here is much cheaper than passing the regex to find_all)
+        for link in soup.find_all('a'):
+            href = link.get('href')
+            if not href or not BOOK_HREF.match(href):
                 continue
-        
+            title = link.get_text(strip=True)
+            if not title or title in NON_TITLES:
+                continue
+            if href.startswith('//') or '/.' in href:
+                book_url = urljoin(self.base_url, href)
+            else:
+                book_url = origin + href
+            if book_url in seen_urls:
+                continue
+            seen_urls.add(book_url)
+
+            # The description is usually the first <p> next to the link; the
+            # cover, title and "more" links of one book share that container
+            parent = link.parent
+            description = descriptions.get(id(parent))
+            if description is None:
+                p_tag = _first_tag(parent, 'p')
+                description = descriptions[id(parent)] = p_tag.get_text(strip=True) if p_tag else ""
+
+            book_info = {
+                'title': title,
+                'url': book_url,
+                'description': description[:200] + '...' if len(description) > 200 else description
+            }
+
+            books_on_page.append(book_info)
+
+        # Apply the topic filter if enabled
+        if apply_filter:
+            books_on_page = self.filter_books(books_on_page)
         return books_on_page
-    
-    def scrape_all_books(self, max_pages: Optional[int] = None) -> List[Dict]:
+
+    def _fetch_books(self, url: str) -> Optional[List[Dict]]:
+        """All books found at `url` (unfiltered); None if it could not be fetched"""
+        soup = self.fetch_page(url)
+        if not soup:
+            return None
+        return self.extract_books_from_page(soup, apply_filter=False)
+
+    def _add_page(self, books: Optional[List[Dict]], seen_urls: set, **position):
+        """Add the books not seen before; returns (new book URLs, books kept by the filter)
+
+        `position` (page, page_url, template) goes into the writer's checkpoint.
+        """
+        new = []
+        for book in books or ():
+            if book['url'] not in seen_urls:
+                seen_urls.add(book['url'])
+                new.append(book)
+        if not new:
+            return 0, 0
+        kept = self.filter_books(new)
+        if self.writer is not None:
+            self.writer.add_page([book['url'] for book in new], kept, **position)
+        else:
+            self.books.extend(kept)
+        return len(new), len(kept)
+
+    def scrape_all_books(self, max_pages: Optional[int] = None, resume_from: Optional[Dict] = None) -> List[Dict]:
         """
         Scrape all books from SAP Press website
         
         Args:
             max_pages: Maximum number of pages to scrape (None for all)
+            resume_from: Checkpoint from CatalogWriter.start(resume=True)
         
         Returns:
-            List of book dictionaries
+            List of book dictionaries (empty when streaming to self.writer)
         """
         print("Starting to scrape SAP Press website...")
         print(f"Base URL: {self.base_url}")
-        
-        # Start with the homepage
-        soup = self.fetch_page(self.base_url)
-        if not soup:
-            print("Failed to fetch the homepage")
-            return []
-        
-        # Extract books from the first page
-        self.books.extend(self.extract_books_from_page(soup))
-        print(f"Found {len(self.books)} books on the homepage")
-        
-        # Try to find pagination links for more pages
-        page_num = 2
-        while max_pages is None or page_num <= max_pages:
-            # Common pagination URL patterns for websites
-            page_urls = [
-                f"{self.base_url}/?page={page_num}",
-                f"{self.base_url}/page/{page_num}/",
-                f"{self.base_url}/?p={page_num}",
-            ]
-            
-            found_books = False
-            for page_url in page_urls:
-                soup = self.fetch_page(page_url)
-                if soup:
-                    books_on_page = self.extract_books_from_page(soup)
-                    if books_on_page:
-                        self.books.extend(books_on_page)
-                        print(f"Found {len(books_on_page)} books on page {page_num}")
-                        found_books = True
-                        time.sleep(1)  # Be respectful to the server
+        paginator = Paginator(self.base_url, self.PAGE_PATTERNS)
+        if self.writer is not None:
+            seen_urls = self.writer.seen
+        else:
+            seen_urls = set(book['url'] for book in self.books)
+
+        if resume_from:
+            # Continue after the last page the checkpoint recorded
+            page_url = resume_from['page_url']
+            paginator.template = resume_from['template']
+            print(f"Resuming after page {resume_from['page']} ({self.writer.count} books so far)")
+            soup = self.fetch_page(page_url)
+            if not soup:
+                print(f"Failed to fetch {page_url}")
+                return []
+            page_num = resume_from['page']
+            pages = 0
+        else:
+            # Start with the homepage
+            page_url = self.base_url
+            soup = self.fetch_page(page_url)
+            if not soup:
+                print("Failed to fetch the homepage")
+                return []
+            page_num = pages = 1
+
+            # Extract books from the first page
+            _, kept = self._add_page(self.extract_books_from_page(soup, apply_filter=False), seen_urls,
+                                     page=1, page_url=page_url, template=None)
+            print(f"Found {kept} books on the homepage")
+
+        # Follow the pagination until a page adds no new books
+        visited = {page_url}
+        page_num += 1
+        pool = ThreadPoolExecutor(self.workers) if self.workers > 1 else None
+        batching = followed_links = False
+        try:
+            while max_pages is None or page_num <= max_pages:
+                if not batching:
+                    next_url = paginator.next_link(soup, page_url)
+                    if next_url in visited:
+                        next_url = None
+                    # Once page URLs are predictable, fetch the next `workers`
+                    # pages at once and merge them in order
+                    batching = (pool is not None and paginator.template is not None
+                                and next_url in (None, paginator.url(page_num)))
+                if batching:
+                    last = page_num + self.workers - 1
+                    if max_pages is not None:
+                        last = min(last, max_pages)
+                    numbers = range(page_num, last + 1)
+                    results = pool.map(lambda n: self._fetch_books(paginator.url(n)), numbers)
+                    done = False
+                    for n, books_on_page in zip(numbers, results):
+                        found, kept = self._add_page(books_on_page, seen_urls, page=n,
+                                                     page_url=paginator.url(n), template=paginator.template)
+                        if not found:
+                            print(f"No more pages found at page {n}")
+                            done = True
+                            break
+                        pages += 1
+                        print(f"Found {kept} books on page {n}")
+                    if done:
                         break
-            
-            if not found_books:
-                print(f"No more pages found at page {page_num}")
-                break
-            
-            page_num += 1
-        
-        # Remove duplicates while preserving order
-        seen_urls = set()
-        unique_books = []
-        for book in self.books:
-            if book['url'] not in seen_urls:
-                seen_urls.add(book['url'])
-                unique_books.append(book)
-        
-        self.books = unique_books
-        print(f"\nTotal unique books found: {len(self.books)}")
+                    page_num = last + 1
+                    continue
+
+                if next_url is None and followed_links:
+                    # the site links its pages and this one has no next page
+                    print(f"No more pages found at page {page_num}")
+                    break
+                followed_links = next_url is not None
+                found = kept = 0
+                for candidate in [next_url] if next_url else paginator.candidates(page_num):
+                    if candidate in visited:
+                        continue
+                    page_soup = self.fetch_page(candidate)
+                    if page_soup is None:
+                        continue
+                    visited.add(candidate)
+                    books_on_page = self.extract_books_from_page(page_soup, apply_filter=False)
+                    if any(book['url'] not in seen_urls for book in books_on_page):
+                        paginator.found(candidate, page_num)
+                        soup, page_url = page_soup, candidate
+                        found, kept = self._add_page(books_on_page, seen_urls, page=page_num,
+                                                     page_url=candidate, template=paginator.template)
+                        break
+
+                if not found:
+                    print(f"No more pages found at page {page_num}")
+                    break
+
+                pages += 1
+                print(f"Found {kept} books on page {page_num}")
+                page_num += 1
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        total = self.writer.count if self.writer is not None else len(self.books)
+        print(f"\nTotal unique books found: {total}")
+        requests_made = self.stats['requests'] + self.stats['offline']
+        print(f"Requests: {requests_made} for {pages} catalog pages ({requests_made / max(pages, 1):.2f} per page), "
+              f"{self.stats['not_modified']} not modified, {self.stats['offline']} served offline")
+        if self.cache is not None:
+            self.cache.evict()
         
         return self.books
     
@@ -185,7 +477,10 @@ class SAPPressScraper:
                 return
             
             with open(filename, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=['title', 'url', 'description'])
+                fieldnames = CSV_FIELDS
+                if 'relevance' in self.books[0]:
+                    fieldnames = CSV_FIELDS + TOPIC_FIELDS
+                writer = csv.DictWriter(f, fieldnames=fieldnames)
                 writer.writeheader()
                 writer.writerows(self.books)
             print(f"Books saved to {filename}")
@@ -274,32 +569,104 @@ def main():
     parser.add_argument('--demo', action='store_true',
                         help='Use sample books for demonstration (no actual scraping)')
     parser.add_argument('--ai-only', action='store_true',
-                        help='Filter books to show only AI and Machine Learning related titles')
+                        help='Filter books to show only AI and Machine Learning related titles (same as --topic ai)')
+    parser.add_argument('--topic',
+                        help='Keep only books about a topic: a built-in name (%s) or comma-separated keywords'
+                             % ', '.join(SAPPressScraper.TOPICS))
+    parser.add_argument('--min-score', type=int, default=1,
+                        help='Minimum relevance for --topic; a keyword in the title scores 2, in the description 1')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of pages to fetch concurrently')
+    parser.add_argument('--rate', type=float, default=1.0,
+                        help='Maximum requests per second to the site (0 for no limit)')
+    parser.add_argument('--retries', type=int, default=3,
+                        help='Retries for a page answering 429/5xx or failing to connect')
+    parser.add_argument('--cache-dir', default='.http_cache',
+                        help='Directory for cached responses, revalidated on later runs')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always download pages in full')
+    parser.add_argument('--offline', action='store_true',
+                        help='Serve pages from the cache only, without network access')
+    parser.add_argument('--cache-max-age', type=float, default=30,
+                        help='Days an unused cached page is kept')
+    parser.add_argument('--cache-max-mb', type=float, default=200,
+                        help='Maximum size of the cache in megabytes')
+    parser.add_argument('--stream', action='store_true',
+                        help='Append books to the JSONL/CSV output page by page, with a checkpoint')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue a streamed scrape from its last checkpoint (implies --stream)')
+    parser.add_argument('--no-index', action='store_true',
+                        help='Skip building the search index (see catalog_index.py search)')
+    parser.add_argument('--profile', nargs='?', const='scrape_profile', metavar='PREFIX',
+                        help='Profile the scrape into PREFIX.pstats and PREFIX.collapsed (default scrape_profile)')
     
     args = parser.parse_args()
     
+    if args.offline and args.no_cache:
+        parser.error('--offline needs the cache')
+    cache = None
+    if not args.no_cache:
+        cache = ResponseCache(args.cache_dir, max_age=args.cache_max_age * 86400,
+                              max_bytes=int(args.cache_max_mb * 1024 * 1024))
+
+    topic = args.topic or ('ai' if args.ai_only else None)
+    keywords = None
+    if topic:
+        keywords = SAPPressScraper.TOPICS.get(topic.lower()) or topic.split(',')
+
     # Create scraper and run it
-    scraper = SAPPressScraper(filter_ai=args.ai_only)
+    scraper = SAPPressScraper(workers=args.workers, rate=args.rate, max_retries=args.retries,
+                              cache=cache, offline=args.offline,
+                              keywords=keywords, min_score=args.min_score)
+
+    def scrape(**kwargs):
+        if not args.profile:
+            return scraper.scrape_all_books(**kwargs)
+        # cProfile sees this thread; the sampler also catches the fetch workers
+        profiler = Profiler(interval_ms=5)
+        try:
+            with profiler.profile('scrape_all_books', all_threads=True):
+                return scraper.scrape_all_books(**kwargs)
+        finally:
+            print(f"Profile saved to {', '.join(profiler.write(args.profile))}")
+            print(profiler.pstats_text(limit=15))
     
     if args.demo:
         print("Using sample books for demonstration...")
         scraper.books = get_sample_books()
-        if args.ai_only:
-            print("Filtering for AI-related books only...\n")
-            scraper.books = [book for book in scraper.books if scraper.is_ai_related(book)]
+        if topic:
+            print(f"Filtering for books about {topic} only...\n")
+            scraper.books = scraper.filter_books(scraper.books)
+    elif args.stream or args.resume:
+        fieldnames = CSV_FIELDS + TOPIC_FIELDS if keywords else CSV_FIELDS
+        scraper.writer = CatalogWriter(args.output_json, args.output_csv, fieldnames)
+        state = scraper.writer.start(resume=args.resume)
+        try:
+            scrape(max_pages=args.max_pages, resume_from=state)
+        except BaseException:
+            scraper.writer.close()
+            print(f"Interrupted; continue with --resume (checkpoint: {scraper.writer.checkpoint_path})")
+            raise
+        scraper.writer.finish()
+        if args.print:
+            scraper.books = list(scraper.writer.books())
     else:
-        scraper.scrape_all_books(max_pages=args.max_pages)
+        scrape(max_pages=args.max_pages)
     
     # Save results
-    scraper.save_to_json(args.output_json)
-    scraper.save_to_csv(args.output_csv)
+    if scraper.writer is None:
+        scraper.save_to_json(args.output_json)
+        scraper.save_to_csv(args.output_csv)
+    if not args.no_index:
+        print(f"Search index saved to {build_index(args.output_json)}")
     
     # Print if requested
     if args.print:
         scraper.print_books()
     
-    filter_text = " (AI-related only)" if args.ai_only else ""
-    print(f"\nScraping completed! Total books found{filter_text}: {len(scraper.books)}")
+    total = scraper.writer.count if scraper.writer is not None else len(scraper.books)
+    filter_text = f" (topic: {topic})" if topic else ""
+    print(f"\nScraping completed! Total books found{filter_text}: {total}")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,125 @@
+"""
+In-memory static assets with precompressed variants.
+
+``StaticAssets`` loads files once, precomputes gzip (and brotli, when the
+``brotli`` package is installed) bodies plus a content-hash ETag, and answers
+requests from memory: it negotiates ``Accept-Encoding``, returns 304 for a
+matching ``If-None-Match`` and sets ``Cache-Control``. A file is re-read when
+its mtime or size changes; the stat is done at most once per
+``check_interval`` seconds per file.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from flask import Response
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSIBLE = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+MIN_COMPRESS_SIZE = 256
+
+
+class Asset:
+    __slots__ = ('path', 'mtime_ns', 'size', 'mimetype', 'etag', 'bodies', 'checked')
+
+    def __init__(self, path: str):
+        st = os.stat(path)
+        with open(path, 'rb') as f:
+            data = f.read()
+        self.path = path
+        self.mtime_ns = st.st_mtime_ns
+        self.size = st.st_size
+        self.mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.etag = hashlib.sha256(data).hexdigest()[:32]
+        self.bodies = {'identity': data}
+        if len(data) >= MIN_COMPRESS_SIZE and self.mimetype.startswith(COMPRESSIBLE):
+            self.bodies['gzip'] = gzip.compress(data, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.bodies['br'] = brotli.compress(data, quality=11)
+        self.checked = time.monotonic()
+
+    def stale(self) -> bool:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return True
+        return st.st_mtime_ns != self.mtime_ns or st.st_size != self.size
+
+
+class StaticAssets:
+    """Serve files under ``root`` from memory"""
+
+    def __init__(self, root: str, preload=(), max_age: int = 86400, check_interval: float = 1.0):
+        self.root = root
+        self.max_age = max_age
+        self.check_interval = check_interval
+        self._assets = {}   # relative path -> Asset
+        self._lock = threading.Lock()
+        for name in preload:
+            self.get(name)
+
+    def preload_dir(self, subdir: str):
+        """Load every file under ``root/subdir``"""
+        base = os.path.join(self.root, subdir)
+        for dirpath, _, filenames in os.walk(base):
+            for filename in filenames:
+                self.get(os.path.relpath(os.path.join(dirpath, filename), self.root))
+        return self
+
+    def get(self, name: str) -> Optional[Asset]:
+        asset = self._assets.get(name)
+        if asset is not None:
+            now = time.monotonic()
+            if now - asset.checked < self.check_interval:
+                return asset
+            asset.checked = now
+            if not asset.stale():
+                return asset
+        path = safe_join(self.root, name)
+        if path is None or not os.path.isfile(path):
+            with self._lock:
+                self._assets.pop(name, None)
+            return None
+        asset = Asset(path)
+        with self._lock:
+            self._assets[name] = asset
+        return asset
+
+    def response(self, name: str, request) -> Optional[Response]:
+        """Response for ``name`` negotiated against ``request``, or None if missing"""
+        asset = self.get(name)
+        if asset is None:
+            return None
+        encoding = self._negotiate(asset.bodies, request)
+        etag = asset.etag if encoding == 'identity' else f'{asset.etag}-{encoding}'
+        if request.if_none_match.contains(etag):
+            resp = Response(status=304)
+        else:
+            resp = Response(asset.bodies[encoding], mimetype=asset.mimetype)
+            if encoding != 'identity':
+                resp.headers['Content-Encoding'] = encoding
+        resp.set_etag(etag)
+        resp.headers['Cache-Control'] = f'public, max-age={self.max_age}'
+        resp.headers['Vary'] = 'Accept-Encoding'
+        return resp
+
+    @staticmethod
+    def _negotiate(bodies: Dict, request) -> str:
+        accepted = request.accept_encodings
+        best, best_q = 'identity', 0.0
+        for encoding in ('br', 'gzip'):
+            if encoding in bodies:
+                q = accepted[encoding]
+                if q > best_q:
+                    best, best_q = encoding, q
+        return best
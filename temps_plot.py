@@ -7,14 +7,36 @@ Usage:
     python3 temps_plot.py
   - Non-interactive: pass 5 temperature values as args
     python3 temps_plot.py 20 22 19 21 23
+  - Batch: one chart per series from CSV (name,t1,t2,...) or JSONL
+    ({"name": ..., "temps": [...]}), "-" reads stdin
+    python3 temps_plot.py --batch stations.csv --out-dir charts --jobs 8
+  - Long series: one value per line, or a .npy file
+    python3 temps_plot.py --series readings.npy -o readings.png
+
+Charts are drawn with matplotlib's object-oriented Figure API, not pyplot,
+so nothing is kept in global state. In batch mode every worker process
+draws all of its charts on one reused figure, and series are read and
+handed out a few at a time, so memory stays flat however long the input.
+
+Series longer than the plot is wide are downsampled with
+Largest-Triangle-Three-Buckets to about one point per pixel before
+drawing, and point labels and markers are dropped above LABEL_LIMIT
+points. matplotlib and NumPy are only imported once something is drawn,
+so --help and argument errors return immediately.
 """
+import argparse
+import csv
+import json
+import os
+import re
 import sys
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+LABEL_LIMIT = 31   # longest series drawn with markers, a label per point and a tick per day
 
-def parse_args():
-    args = sys.argv[1:]
+def parse_args(args=None):
+    args = sys.argv[1:] if args is None else args
     temps = []
     for a in args:
         try:
@@ -38,28 +60,184 @@ def prompt_for_temps(count=5):
                 print("Invalid number, try again.")
     return temps
 
-def plot_temps(temps, out_path='temperatures.png'):
-    days = [f"Day {i+1}" for i in range(len(temps))]
-    plt.figure(figsize=(8,4.5))
-    plt.plot(days, temps, marker='o', linestyle='-', color='tab:blue')
-    plt.title('5-Day Temperatures')
-    plt.xlabel('Day')
-    plt.ylabel('Temperature')
-    plt.grid(True, linestyle='--', alpha=0.5)
-    for i, t in enumerate(temps):
-        plt.text(i, t, f"{t:.1f}", ha='center', va='bottom')
-    plt.tight_layout()
-    plt.savefig(out_path, dpi=150)
+def lttb(x, y, threshold):
+    """Indices of ``threshold`` points of (x, y) chosen by Largest-Triangle-Three-Buckets
+
+    The first and last points are kept. The points in between are split
+    into threshold - 2 buckets, and each bucket keeps the point forming the
+    largest triangle with the point kept before it and the average of the
+    next bucket, which preserves peaks and troughs.
+    """
+    import numpy as np
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    counts = np.diff(edges)
+    # bucket averages, then the last point as the "next bucket" of the last bucket
+    avg_x = np.append(np.add.reduceat(x[:n - 1], edges[:-1]) / counts, x[n - 1])
+    avg_y = np.append(np.add.reduceat(y[:n - 1], edges[:-1]) / counts, y[n - 1])
+    kept = np.empty(threshold, dtype=np.intp)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - avg_x[i + 1]) * (y[start:end] - ay) - (ax - x[start:end]) * (avg_y[i + 1] - ay))
+        a = start + int(area.argmax())
+        kept[i + 1] = a
+    return kept
+
+def default_title(count):
+    return f'{count}-Day Temperatures' if count <= LABEL_LIMIT else f'Temperatures ({count:,} readings)'
+
+class ChartRenderer:
+    """One figure and axes, redrawn for each chart instead of building a new figure"""
+
+    def __init__(self, dpi=150):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        self.dpi = dpi
+        self.fig = Figure(figsize=(8,4.5))
+        FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot()
+        self.line, = self.ax.plot([], [], marker='o', linestyle='-', color='tab:blue')
+        self.ax.set_xlabel('Day')
+        self.ax.set_ylabel('Temperature')
+        self.ax.grid(True, linestyle='--', alpha=0.5)
+        self.labels = []
+
+    def width_px(self):
+        """Width of the plot area in the saved image, in pixels"""
+        return max(3, int(self.ax.get_position().width * self.fig.get_figwidth() * self.dpi))
+
+    def render(self, temps, out_path, title=None):
+        import numpy as np
+        y = np.asarray(temps, dtype=float)
+        x = np.arange(len(y))
+        title = title or default_title(len(y))
+        for label in self.labels:
+            label.remove()
+        if len(y) <= LABEL_LIMIT:
+            self.line.set_marker('o')
+            self.labels = [self.ax.text(i, t, f"{t:.1f}", ha='center', va='bottom') for i, t in enumerate(temps)]
+            self.ax.set_xticks(x)
+            self.ax.set_xticklabels([f"Day {i+1}" for i in x])
+            self.ax.set_xlabel('Day')
+        else:
+            from matplotlib.ticker import FuncFormatter, MaxNLocator
+            if np.isnan(y).any():
+                x, y = x[~np.isnan(y)], y[~np.isnan(y)]
+            kept = lttb(x, y, self.width_px())
+            x, y = x[kept], y[kept]
+            self.line.set_marker('None')
+            self.labels = []
+            self.ax.xaxis.set_major_locator(MaxNLocator(nbins=10, integer=True))
+            self.ax.xaxis.set_major_formatter(FuncFormatter(lambda v, _: f"{v:,.0f}"))
+            self.ax.set_xlabel('Reading')
+        self.line.set_data(x, y)
+        self.ax.set_title(title)
+        self.ax.relim()
+        self.ax.autoscale_view()
+        self.fig.tight_layout()
+        self.fig.savefig(out_path, dpi=self.dpi)
+        return out_path
+
+def plot_temps(temps, out_path='temperatures.png', dpi=150):
+    ChartRenderer(dpi).render(temps, out_path)
     print(f"Saved plot to {out_path}")
 
+def read_series(path, fmt=None):
+    """Yield (name, temps) from a CSV or JSONL file, one line at a time"""
+    fmt = fmt or ('jsonl' if path.endswith(('.jsonl', '.json')) else 'csv')
+    f = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+    try:
+        if fmt == 'jsonl':
+            for n, line in enumerate(f, 1):
+                if line.strip():
+                    record = json.loads(line)
+                    name = record.get('name') or record.get('station') or f'series_{n}'
+                    yield str(name), [float(t) for t in record.get('temps', record.get('values', []))]
+            return
+        for n, row in enumerate(csv.reader(f), 1):
+            if not row:
+                continue
+            temps = parse_args(row[1:])
+            if not temps and n == 1:
+                continue   # header
+            yield row[0] or f'series_{n}', temps
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def load_series(path):
+    """A long series from a .npy file (memory-mapped) or a text file of numbers"""
+    import numpy as np
+    if path.endswith('.npy'):
+        return np.load(path, mmap_mode='r')
+    return np.fromfile(path, sep=' ')
+
+def chart_path(out_dir, name):
+    return os.path.join(out_dir, re.sub(r'[^\w.-]+', '_', name).strip('._') + '.png')
+
+_renderer = None
+
+def _init_worker(dpi):
+    global _renderer
+    _renderer = ChartRenderer(dpi)
+
+def _render_job(name, temps, out_path):
+    return _renderer.render(temps, out_path, title=f"{name}: {default_title(len(temps))}")
+
+def render_batch(series, out_dir, jobs=None, dpi=150):
+    """Render every (name, temps) in ``series`` to ``out_dir``; returns the number of charts"""
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = jobs or os.cpu_count() or 1
+    tasks = ((name, temps, chart_path(out_dir, name)) for name, temps in series if temps)
+    if jobs == 1:
+        _init_worker(dpi)
+        return sum(1 for task in tasks if _render_job(*task))
+    done = 0
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(dpi,)) as pool:
+        pending = set()
+        for task in tasks:
+            if len(pending) >= jobs * 4:
+                # only read ahead of the workers by a few series
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                done += sum(1 for fut in finished if fut.result())
+            pending.add(pool.submit(_render_job, *task))
+        done += sum(1 for fut in pending if fut.result())
+    return done
+
 def main():
-    temps = parse_args()
+    parser = argparse.ArgumentParser(description='Plot temperatures and save the figure')
+    parser.add_argument('temps', nargs='*', help='5 temperature values (prompted for when missing)')
+    parser.add_argument('--batch', metavar='FILE', help='Render one chart per series in a CSV/JSONL file ("-" for stdin)')
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help='Batch input format (default: from the extension)')
+    parser.add_argument('--out-dir', default='charts', help='Where batch charts are written')
+    parser.add_argument('--jobs', '-j', type=int, help='Worker processes for batch mode (default: one per CPU)')
+    parser.add_argument('--series', metavar='FILE', help='Plot one long series from a .npy or text file')
+    parser.add_argument('--output', '-o', default='temperatures.png', help='Chart file for a single series')
+    parser.add_argument('--dpi', type=int, default=150)
+    args = parser.parse_args()
+
+    if args.batch:
+        start = time.perf_counter()
+        count = render_batch(read_series(args.batch, args.format), args.out_dir, args.jobs, args.dpi)
+        elapsed = time.perf_counter() - start
+        print(f"Rendered {count} charts to {args.out_dir} in {elapsed:.1f}s ({count / elapsed:.1f} charts/s)")
+        return
+    if args.series:
+        plot_temps(load_series(args.series), args.output, args.dpi)
+        return
+
+    temps = parse_args(args.temps)
     if len(temps) < 5:
         print("Need 5 temperatures. Prompting for missing values.")
         needed = 5 - len(temps)
         temps += prompt_for_temps(needed) if len(temps) == 0 else prompt_for_temps(needed)
     temps = temps[:5]
-    plot_temps(temps)
+    plot_temps(temps, args.output, args.dpi)
 
 if __name__ == '__main__':
     main()
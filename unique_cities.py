@@ -1,6 +1,24 @@
+"""
+Print the unique "Ship To City" values of Amazon GST tax reports.
+
+Only the header is read to find the column. The column itself is then
+streamed in chunks (``usecols`` with a categorical dtype), so memory use
+does not grow with the size of the report. Several files or glob patterns
+can be given; they are read in parallel, one process per file.
+
+Usage:
+  python3 unique_cities.py reports/2025-*.csv -o cities.txt
+"""
+
 import argparse
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional, Set, Tuple
+
 import pandas as pd
-from typing import Optional
+
+CHUNK_ROWS = 200_000
 
 
 def find_ship_to_city_column(df: pd.DataFrame) -> Optional[str]:
@@ -18,21 +36,77 @@ def find_ship_to_city_column(df: pd.DataFrame) -> Optional[str]:
     return None
 
 
+def read_header(path: str) -> pd.DataFrame:
+    """An empty frame with the columns of the CSV file"""
+    return pd.read_csv(path, nrows=0)
+
+
+def unique_cities(path: str, chunksize: int = CHUNK_ROWS) -> Tuple[Optional[str], Set[str], List[str]]:
+    """(column, unique values, all columns) of one report; column is None if not found"""
+    header = read_header(path)
+    col = find_ship_to_city_column(header)
+    if col is None:
+        return None, set(), list(header.columns)
+    values = set()
+    for chunk in pd.read_csv(path, usecols=[col], dtype={col: 'category'}, chunksize=chunksize):
+        # a chunk's categories are exactly its distinct non-null values
+        values.update(chunk[col].cat.categories)
+    return col, values, list(header.columns)
+
+
+def expand_inputs(patterns: Iterable[str]) -> List[str]:
+    """File names for the given paths and glob patterns, each file once"""
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if any(c in pattern for c in '*?[') else [pattern]
+        if not matches:
+            print(f'No files match {pattern}')
+        paths.extend(matches)
+    return list(dict.fromkeys(paths))
+
+
+def _unique_cities_job(args):
+    return unique_cities(*args)
+
+
+def collect(paths: List[str], jobs: Optional[int] = None, chunksize: int = CHUNK_ROWS):
+    """Yield (path, column, values, columns) for each report, reading up to ``jobs`` at once"""
+    jobs = min(jobs or os.cpu_count() or 1, len(paths))
+    if jobs <= 1:
+        for path in paths:
+            yield (path,) + unique_cities(path, chunksize)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for path, result in zip(paths, pool.map(_unique_cities_job, [(p, chunksize) for p in paths])):
+            yield (path,) + result
+
+
 def main():
     parser = argparse.ArgumentParser(description='Print unique values from the "Ship To City" column in Test.csv')
-    parser.add_argument('--input', '-i', default='Test.csv', help='CSV input file')
+    parser.add_argument('inputs', nargs='*', help='CSV files or glob patterns (default: Test.csv)')
+    parser.add_argument('--input', '-i', action='append', default=[], help='CSV input file (repeatable)')
     parser.add_argument('--output', '-o', help='Optional output file to save unique values')
+    parser.add_argument('--jobs', '-j', type=int, help='Files read in parallel (default: one per CPU)')
+    parser.add_argument('--chunksize', type=int, default=CHUNK_ROWS, help='Rows read at a time')
     args = parser.parse_args()
 
-    df = pd.read_csv(args.input)
-    col = find_ship_to_city_column(df)
-    if col is None:
-        print('No "Ship To City" column found. Available columns:')
-        for c in df.columns:
-            print('-', c)
+    paths = expand_inputs(args.input + args.inputs or ['Test.csv'])
+    if not paths:
+        return
+
+    values = set()
+    for path, col, found, columns in collect(paths, args.jobs, args.chunksize):
+        if col is None:
+            where = f' in {path}' if len(paths) > 1 else ''
+            print(f'No "Ship To City" column found{where}. Available columns:')
+            for c in columns:
+                print('-', c)
+            continue
+        values |= found
+    if not values:
         return
 
-    uniques = sorted(pd.Series(df[col].dropna().unique()).tolist())
+    uniques = sorted(values)
     for v in uniques:
         print(v)
 
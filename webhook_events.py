@@ -0,0 +1,50 @@
+"""
+Webhook event handling, shared by app.py and the journal replay tool.
+
+Importing this module has no side effects: app.py adds the HTTP endpoint,
+queue and journal around ``handle_event``, while
+``python3 webhook_journal.py replay`` calls it directly.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # optional: faster decoding of webhook payloads
+    orjson = None
+
+
+def decode_json(body: bytes):
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def summarize_event(event, payload):
+    """One-line description of an event for the log, instead of the full payload"""
+    fields = [f"event={event['event']}", f"delivery={event.get('delivery')}", f"bytes={len(event['body'])}"]
+    if isinstance(payload, dict):
+        if payload.get('action'):
+            fields.append(f"action={payload['action']}")
+        repo = payload.get('repository')
+        if isinstance(repo, dict) and repo.get('full_name'):
+            fields.append(f"repo={repo['full_name']}")
+        sender = payload.get('sender')
+        if isinstance(sender, dict) and sender.get('login'):
+            fields.append(f"sender={sender['login']}")
+        if payload.get('ref'):
+            fields.append(f"ref={payload['ref']}")
+        if isinstance(payload.get('commits'), list):
+            fields.append(f"commits={len(payload['commits'])}")
+    return ' '.join(fields)
+
+
+def handle_event(event):
+    """Process one webhook event"""
+    payload = None
+    if event['is_json']:
+        try:
+            payload = decode_json(event['body'])
+        except ValueError:
+            pass
+    print('Received', summarize_event(event, payload))
@@ -0,0 +1,215 @@
+"""
+Webhook delivery de-duplication and a rotating journal of accepted events.
+
+``DeliveryCache`` remembers recent ``X-GitHub-Delivery`` IDs so redeliveries
+are acknowledged without being processed again. ``EventJournal`` appends
+every accepted event as one JSONL record through a buffered file that is
+flushed at most ``flush_interval`` seconds after a write, rotates the file
+once it grows past ``max_bytes`` and can gzip rotated segments. The
+journal can be streamed back through webhook_events.handle_event to rebuild
+state after an outage:
+
+  python3 webhook_journal.py replay --journal webhook_events.jsonl --rate 50
+"""
+
+import gzip
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+
+class DeliveryCache:
+    """TTL + LRU set of delivery IDs; every operation is O(1)"""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 3600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._expires = OrderedDict()   # delivery id -> expiry, oldest first
+        self._lock = threading.Lock()
+
+    def seen(self, delivery_id: str) -> bool:
+        """Return True for a repeat delivery, otherwise remember it"""
+        now = time.monotonic()
+        with self._lock:
+            expires = self._expires
+            # entries are kept in insertion order, so expired ones are at the front
+            while expires:
+                oldest, when = next(iter(expires.items()))
+                if when > now:
+                    break
+                del expires[oldest]
+            if delivery_id in expires:
+                return True
+            expires[delivery_id] = now + self.ttl
+            if len(expires) > self.maxsize:
+                expires.popitem(last=False)
+            return False
+
+    def forget(self, delivery_id: str):
+        """Drop an ID, e.g. when its delivery was rejected and will be retried"""
+        with self._lock:
+            self._expires.pop(delivery_id, None)
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+
+class EventJournal:
+    """Buffered, size-rotated JSONL journal
+
+    Rotated segments are named like logging's RotatingFileHandler:
+    ``<path>.1`` is the newest and ``<path>.<backups>`` the oldest, with a
+    ``.gz`` suffix when ``compress`` is on.
+    """
+
+    def __init__(self, path, max_bytes: int = 10 * 1024 * 1024, backups: int = 10,
+                 compress: bool = False, buffer_size: int = 64 * 1024, flush_interval: float = 1.0):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.compress = compress
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._file = None
+        self._size = 0
+        self._last_flush = time.monotonic()
+        self._timer = None   # pending flush of buffered records
+
+    def _open(self):
+        self._file = self.path.open('ab', buffering=self.buffer_size)
+        self._size = self._file.tell()
+
+    def append(self, record: Dict):
+        line = (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+        with self._lock:
+            if self._file is None:
+                self._open()
+            if self._size and self._size + len(line) > self.max_bytes:
+                self._rotate()
+            self._file.write(line)
+            self._size += len(line)
+            wait = self._last_flush + self.flush_interval - time.monotonic()
+            if wait <= 0:
+                self._flush()
+            elif self._timer is None:
+                # a quiet spell must not leave records in the buffer
+                self._timer = threading.Timer(wait, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _segment(self, n: int) -> Path:
+        suffix = f'.{n}.gz' if self.compress else f'.{n}'
+        return self.path.with_name(self.path.name + suffix)
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        if self.backups > 0:
+            oldest = self._segment(self.backups)
+            if oldest.exists():
+                oldest.unlink()
+            for n in range(self.backups - 1, 0, -1):
+                if self._segment(n).exists():
+                    os.replace(self._segment(n), self._segment(n + 1))
+            if self.compress:
+                with self.path.open('rb') as src, gzip.open(self._segment(1), 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+                self.path.unlink()
+            else:
+                os.replace(self.path, self._segment(1))
+        else:
+            self.path.unlink()
+        self._open()
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._file is not None:
+            self._file.flush()
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def segments(self):
+        """Journal files oldest first"""
+        paths = []
+        for n in range(self.backups, 0, -1):
+            for candidate in (self.path.with_name(f'{self.path.name}.{n}.gz'),
+                              self.path.with_name(f'{self.path.name}.{n}')):
+                if candidate.exists():
+                    paths.append(candidate)
+        if self.path.exists():
+            paths.append(self.path)
+        return paths
+
+
+def read_journal(path, backups: int = 10) -> Iterator[Dict]:
+    """Stream records from a journal and its rotated segments, oldest first"""
+    for segment in EventJournal(path, backups=backups).segments():
+        opener = gzip.open if segment.suffix == '.gz' else open
+        with opener(segment, 'rt', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # torn final line from a crash mid-write
+                    continue
+
+
+def replay(path, handler, rate: Optional[float] = None, backups: int = 10) -> int:
+    """Feed journal records to ``handler``, at most ``rate`` per second"""
+    interval = 1.0 / rate if rate else 0.0
+    next_at = time.monotonic()
+    count = 0
+    for record in read_journal(path, backups=backups):
+        if interval:
+            now = time.monotonic()
+            if next_at > now:
+                time.sleep(next_at - now)
+            next_at = max(next_at, now) + interval
+        event = dict(record)
+        event['body'] = (event.get('body') or '').encode('utf-8')
+        handler(event)
+        count += 1
+    return count
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Webhook event journal tools')
+    sub = parser.add_subparsers(dest='command', required=True)
+    rep = sub.add_parser('replay', help='Stream a journal back through the webhook event handler')
+    rep.add_argument('--journal', default=os.environ.get('WEBHOOK_JOURNAL', 'webhook_events.jsonl'))
+    rep.add_argument('--rate', type=float, default=None, help='Maximum events per second (default: unlimited)')
+    rep.add_argument('--backups', type=int, default=int(os.environ.get('WEBHOOK_JOURNAL_BACKUPS', 10)))
+    args = parser.parse_args()
+
+    if args.command == 'replay':
+        # handle_event skips the queue and the journal
+        from webhook_events import handle_event
+        started = time.monotonic()
+        count = replay(args.journal, handle_event, rate=args.rate, backups=args.backups)
+        print(f"Replayed {count} events in {time.monotonic() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
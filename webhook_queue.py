@@ -0,0 +1,120 @@
+"""
+Bounded in-process queue for webhook events.
+
+The ``/webhook`` handler only verifies the signature and hands the raw event
+to ``WebhookQueue.submit``; a fixed pool of worker threads runs the real
+handler. When the queue is full ``submit`` returns False straight away so the
+caller can answer 503 instead of letting GitHub time out and redeliver.
+``close`` stops accepting events and waits for the workers to drain what is
+already queued.
+
+With ``workers=0`` events are handled inline on the caller's thread, which is
+handy when debugging a handler.
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, Dict
+
+_STOP = object()
+
+
+class WebhookQueue:
+    """Hand webhook events to a pool of worker threads"""
+
+    def __init__(self, handler: Callable[[Dict], None], workers: int = 4, maxsize: int = 1000):
+        self.handler = handler
+        self.workers = workers
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._threads = []
+        self._closed = False
+        self._lock = threading.Lock()
+        self._counters = {
+            'accepted': 0,
+            'rejected': 0,
+            'processed': 0,
+            'failed': 0,
+            'wait_seconds_total': 0.0,
+            'wait_seconds_max': 0.0,
+            'handle_seconds_total': 0.0,
+            'handle_seconds_max': 0.0,
+        }
+
+    def start(self):
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f'webhook-worker-{i}', daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def submit(self, event: Dict) -> bool:
+        """Queue an event; returns False if the queue is full or closed"""
+        if self._closed:
+            self._count('rejected')
+            return False
+        event['_queued_at'] = time.perf_counter()
+        if not self._threads:
+            self._count('accepted')
+            self._handle(event)
+            return True
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self._count('rejected')
+            return False
+        self._count('accepted')
+        return True
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _run(self):
+        while True:
+            event = self._queue.get()
+            try:
+                if event is _STOP:
+                    return
+                self._handle(event)
+            finally:
+                self._queue.task_done()
+
+    def _handle(self, event: Dict):
+        started = time.perf_counter()
+        wait = started - event.pop('_queued_at', started)
+        failed = False
+        try:
+            self.handler(event)
+        except Exception as e:
+            failed = True
+            print('Webhook handler failed:', e)
+        took = time.perf_counter() - started
+        with self._lock:
+            c = self._counters
+            c['failed' if failed else 'processed'] += 1
+            c['wait_seconds_total'] += wait
+            c['wait_seconds_max'] = max(c['wait_seconds_max'], wait)
+            c['handle_seconds_total'] += took
+            c['handle_seconds_max'] = max(c['handle_seconds_max'], took)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._counters)
+        stats['depth'] = self._queue.qsize()
+        stats['capacity'] = self._queue.maxsize
+        stats['workers'] = len(self._threads)
+        return stats
+
+    def close(self, timeout: float = None):
+        """Stop accepting events and wait for queued ones to be handled"""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            # blocks if the queue is full, which is what draining means
+            self._queue.put(_STOP)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for t in self._threads:
+            t.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        self._threads = [t for t in self._threads if t.is_alive()]